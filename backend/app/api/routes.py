@@ -1,59 +1,121 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
-from app.models.schemas import SearchQuery, SearchResult
-from app.services.vector_store import VectorStore
-from app.services.llm_service import LLMService
+from app.models.schemas import IngestRequest, ProcessingStatus, SearchQuery, SearchResult
+from app.services.analytics import get_corpus_analytics
+from app.services.container import BOOST_SECTIONS, services
+from app.services.ingest_jobs import IngestBusy
+from app.services.query_log import get_query_log
+from app.services.resilience import UpstreamUnavailable, mark_degraded
+from app.services.topic_trends import get_trends_artifact
+from app.config import get_settings
+import asyncio
+import hmac
 import json
-from collections import Counter
+
+settings = get_settings()
 
 router = APIRouter()
-vector_store = VectorStore()
-llm_service = LLMService()
+
+def service_unavailable(error: UpstreamUnavailable) -> HTTPException:
+    """503 for an upstream outage with no cached fallback, so clients back off instead of piling on."""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(int(error.retry_after + 0.5))})
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # Fail closed: operator endpoints stay disabled until ADMIN_TOKEN is configured
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Operator endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token")
+
+# Persona instructions for generate_summary; precompute_summaries.py uses the same ones
+PERSONA_CONTEXTS = {
+    "scientist": "Provide a detailed scientific summary highlighting methodology, findings, and implications for future research.",
+    "investor": "Provide a summary focused on commercial potential, emerging trends, technology readiness, and investment opportunities.",
+    "architect": "Provide a summary focused on practical mission applications, technical requirements, constraints, and risk factors."
+}
+
+def search_filter_dict(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not filters:
+        return None
+    filter_dict = {}
+    if filters.get("year"):
+        filter_dict["year"] = {"$eq": filters["year"]}
+    if filters.get("organisms"):
+        filter_dict["organisms"] = {"$in": filters["organisms"]}
+    if filters.get("section"):
+        filter_dict["section"] = {"$eq": filters["section"]}
+    return filter_dict
+
+def transform_results(raw_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Vector store matches in the shape /search returns and /summarize and /consensus take back."""
+    transformed_results = []
+    for r in raw_results:
+        metadata = r.get("metadata", {})
+        text = metadata.get("text", "")
+        
+        clean_metadata = {
+            "file": metadata.get("title", "Unknown") + ".pdf",
+            "page": safe_int(metadata.get("page")),
+            "chunk": metadata.get("chunk_index", 0),
+            "year": metadata.get("year"),
+            "organisms": metadata.get("organisms", []),
+            "section": metadata.get("section", ""),
+            "paper_id": metadata.get("paper_id", ""),
+            "keywords": metadata.get("keywords", []),
+            "experiment_type": metadata.get("experiment_type", ""),
+            "space_conditions": metadata.get("space_conditions", [])
+        }
+        
+        transformed_results.append({
+            "id": r.get("id"),
+            "score": r.get("score"),
+            "text": text,
+            "metadata": clean_metadata
+        })
+    return transformed_results
+
+def log_query(event: str, query: str, **fields):
+    """Append to the query log; a full disk or missing directory never fails the request."""
+    query_log = get_query_log()
+    if not query_log or not query:
+        return
+    try:
+        query_log.record(event, query, **fields)
+    except OSError as e:
+        print(f"Query log write failed: {e}")
+
+def result_texts(results: List[Dict[str, Any]], limit: int) -> List[str]:
+    texts = []
+    for r in results[:limit]:
+        text = r.get("text", "")
+        if text and text.strip():
+            texts.append(text)
+    return texts
 
 @router.post("/search")
 async def search_papers(query: SearchQuery) -> Dict[str, Any]:
+    log_query("search", query.query, filters=query.filters, top_k=query.top_k, persona=query.persona)
     try:
-        filter_dict = None
-        if query.filters:
-            filter_dict = {}
-            if query.filters.get("year"):
-                filter_dict["year"] = {"$eq": query.filters["year"]}
-            if query.filters.get("organisms"):
-                filter_dict["organisms"] = {"$in": query.filters["organisms"]}
-            if query.filters.get("section"):
-                filter_dict["section"] = {"$eq": query.filters["section"]}
-        
-        raw_results = vector_store.search_with_reranking(
+        # Blocking upstream calls (hedging, breaker, timeouts) run off the event loop so a
+        # slow one does not stall every other request in this worker
+        raw_results = await asyncio.to_thread(
+            services.vector_store.search_with_reranking,
             query=query.query,
             top_k=query.top_k,
-            filter_dict=filter_dict,
-            boost_sections=["abstract", "results", "conclusion"]
+            filter_dict=search_filter_dict(query.filters),
+            boost_sections=BOOST_SECTIONS
         )
+        transformed_results = transform_results(raw_results)
         
-        transformed_results = []
-        for r in raw_results:
-            metadata = r.get("metadata", {})
-            text = metadata.get("text", "")
-            
-            clean_metadata = {
-                "file": metadata.get("title", "Unknown") + ".pdf",
-                "page": metadata.get("chunk_index", 0),
-                "chunk": metadata.get("chunk_index", 0),
-                "year": metadata.get("year"),
-                "organisms": metadata.get("organisms", []),
-                "section": metadata.get("section", ""),
-                "paper_id": metadata.get("paper_id", ""),
-                "keywords": metadata.get("keywords", []),
-                "experiment_type": metadata.get("experiment_type", ""),
-                "space_conditions": metadata.get("space_conditions", [])
-            }
-            
-            transformed_results.append({
-                "id": r.get("id"),
-                "score": r.get("score"),
-                "text": text,
-                "metadata": clean_metadata
-            })
+        if settings.speculative_summaries and query.persona in PERSONA_CONTEXTS:
+            # The detail drawer summarizes one paper (results=[paper]); start that summary for
+            # the top result, the one most often opened, while the results are in transit
+            texts = result_texts(transformed_results[:1], 10)
+            if texts:
+                services.summary_prefetch.start(texts, query.persona, lambda: services.llm_service.generate_summary(
+                    texts, PERSONA_CONTEXTS[query.persona], persona=query.persona
+                ))
         
         print(f"Search returned {len(transformed_results)} results")
         if transformed_results:
@@ -66,6 +128,8 @@ async def search_papers(query: SearchQuery) -> Dict[str, Any]:
             "count": len(transformed_results),
             "query": query.query
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         print(f"Error in search_papers: {str(e)}")
         import traceback
@@ -78,6 +142,7 @@ async def summarize_results(data: Dict[str, Any]) -> Dict[str, Any]:
         query = data.get("query", "")
         results = data.get("results", [])
         persona = data.get("persona", "scientist")
+        log_query("summarize", query, persona=persona, results=len(results))
         
         if not results:
             return {
@@ -86,11 +151,7 @@ async def summarize_results(data: Dict[str, Any]) -> Dict[str, Any]:
                 "persona": persona
             }
         
-        texts = []
-        for r in results[:10]:
-            text = r.get("text", "")
-            if text and text.strip():
-                texts.append(text)
+        texts = result_texts(results, 10)
         
         if not texts:
             return {
@@ -99,16 +160,20 @@ async def summarize_results(data: Dict[str, Any]) -> Dict[str, Any]:
                 "persona": persona
             }
         
-        context_map = {
-            "scientist": "Provide a detailed scientific summary highlighting methodology, findings, and implications for future research.",
-            "investor": "Provide a summary focused on commercial potential, emerging trends, technology readiness, and investment opportunities.",
-            "architect": "Provide a summary focused on practical mission applications, technical requirements, constraints, and risk factors."
-        }
+        context = PERSONA_CONTEXTS.get(persona, PERSONA_CONTEXTS["scientist"])
         
-        context = context_map.get(persona, context_map["scientist"])
+        result = None
+        if settings.speculative_summaries:
+            result = await services.summary_prefetch.claim(texts, persona)
         
-        print(f"Calling LLM service with {len(texts)} texts...")
-        result = llm_service.generate_summary(texts, context)
+        try:
+            if result is None:
+                print(f"Calling LLM service with {len(texts)} texts...")
+                result = await asyncio.to_thread(services.llm_service.generate_summary, texts, context, persona=persona)
+        except UpstreamUnavailable as e:
+            print(f"Serving extractive summary: {e}")
+            mark_degraded("summary:extractive")
+            result = services.llm_service.fallback_summary(texts)
         
         print(f"LLM returned summary: {bool(result.get('summary'))}")
         
@@ -118,28 +183,97 @@ async def summarize_results(data: Dict[str, Any]) -> Dict[str, Any]:
             "papers_analyzed": len(results),
             "persona": persona
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         print(f"Error in summarize_results: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/summarize/all")
+async def summarize_all_personas(data: Dict[str, Any]) -> StreamingResponse:
+    """
+    One result set summarized for several personas (all of them by default), streamed
+    as NDJSON: a line per persona, shaped like the /summarize response, as each one
+    finishes. The excerpts are packed once and the completions run concurrently, so
+    the stream takes about as long as the slowest persona rather than the sum.
+    """
+    query = data.get("query", "")
+    results = data.get("results", [])
+    personas = data.get("personas") or list(PERSONA_CONTEXTS)
+    unknown = [p for p in personas if p not in PERSONA_CONTEXTS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown personas: {', '.join(unknown)}")
+    for persona in personas:
+        log_query("summarize", query, persona=persona, results=len(results))
+    
+    texts = result_texts(results, 10)
+    if not texts:
+        lines = [
+            json.dumps({
+                "summary": "No valid text content found in results. Please try searching again.",
+                "key_points": [],
+                "persona": persona
+            }) + "\n"
+            for persona in personas
+        ]
+        return StreamingResponse(iter(lines), media_type="application/x-ndjson")
+    
+    packed = services.llm_service.pack_summary_texts(texts)
+    
+    async def summarize(persona: str) -> Dict[str, Any]:
+        result = None
+        if settings.speculative_summaries:
+            result = await services.summary_prefetch.claim(texts, persona)
+        degraded = False
+        try:
+            if result is None:
+                result = await asyncio.to_thread(services.llm_service.summarize_packed, packed, persona)
+        except UpstreamUnavailable as e:
+            print(f"Serving extractive {persona} summary: {e}")
+            result = services.llm_service.fallback_summary(texts)
+            degraded = True
+        except Exception as e:
+            print(f"Error summarizing for {persona}: {str(e)}")
+            return {"persona": persona, "error": str(e)}
+        
+        line = {
+            "summary": result.get("summary", ""),
+            "key_points": result.get("key_points", []),
+            "papers_analyzed": len(results),
+            "persona": persona
+        }
+        if degraded:
+            # Headers are gone by the time a line is written, so this replaces X-Degraded
+            line["degraded"] = True
+        return line
+    
+    async def stream():
+        tasks = [asyncio.create_task(summarize(persona)) for persona in personas]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # The client went away; completions already running still finish and are cached
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.post("/consensus")
 async def analyze_consensus(data: Dict[str, Any]) -> Dict[str, Any]:
     try:
         topic = data.get("topic", "")
         results = data.get("results", [])
+        log_query("consensus", topic, results=len(results))
         
         if not results:
             return {"error": "No results to analyze"}
         
-        texts = []
-        for r in results[:8]:
-            text = r.get("text", "")
-            if text and text.strip():
-                texts.append(text)
+        texts = result_texts(results, 8)
         
-        analysis = llm_service.analyze_consensus(texts, topic)
+        analysis = await asyncio.to_thread(services.llm_service.analyze_consensus, texts, topic)
         
         try:
             parsed_analysis = json.loads(analysis)
@@ -158,28 +292,34 @@ async def analyze_consensus(data: Dict[str, Any]) -> Dict[str, Any]:
             "analysis": parsed_analysis,
             "papers_analyzed": len(results)
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def safe_int_year(year_value) -> Optional[int]:
-    """Safely convert year to int, handling floats and strings"""
-    if year_value is None:
+def safe_int(value) -> Optional[int]:
+    """Safely convert a metadata number to int, handling floats and strings"""
+    if value is None:
         return None
     try:
-        if isinstance(year_value, str):
-            year_value = float(year_value)
-        return int(year_value)
+        if isinstance(value, str):
+            value = float(value)
+        return int(value)
     except (ValueError, TypeError):
         return None
 
+def safe_int_year(year_value) -> Optional[int]:
+    """Safely convert year to int, handling floats and strings"""
+    return safe_int(year_value)
+
 @router.post("/gaps")
 async def identify_gaps(data: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        raw_results = vector_store.get_all_papers_metadata(limit=10000)
-        all_results = [r.get("metadata", {}) for r in raw_results]
+        raw_results = await asyncio.to_thread(services.vector_store.get_all_papers_metadata, limit=10000)
+        analytics = get_corpus_analytics(raw_results, safe_int_year)
 
-        under_researched = identify_coverage_gaps(all_results)
-        comparative_gaps = identify_comparative_gaps(all_results)
+        under_researched = analytics.coverage_gaps()
+        comparative_gaps = analytics.comparative_gaps()
         
         under_researched_list = [g["area"] for g in under_researched[:10]]
         
@@ -212,188 +352,18 @@ async def identify_gaps(data: Dict[str, Any]) -> Dict[str, Any]:
             "quantitative_scoring": under_researched,
             "comparative_analysis": comparative_gaps
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         print(f"Error in identify_gaps: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-def identify_coverage_gaps(metadata_list: list[dict]) -> list[dict]:
-    organism_coverage = {}
-    year_coverage = {}
-    topic_coverage = {}
-    
-    for meta in metadata_list:
-        if meta.get("organisms"):
-            for org in meta["organisms"]:
-                organism_coverage[org] = organism_coverage.get(org, 0) + 1
-        
-        year = safe_int_year(meta.get("year"))
-        if year:
-            year_coverage[year] = year_coverage.get(year, 0) + 1
-        
-        if meta.get("keywords"):
-            for kw in meta["keywords"]:
-                topic_coverage[kw] = topic_coverage.get(kw, 0) + 1
-    
-    gaps = []
-    avg_organism_papers = sum(organism_coverage.values()) / len(organism_coverage) if organism_coverage else 1
-    avg_topic_papers = sum(topic_coverage.values()) / len(topic_coverage) if topic_coverage else 1
-    
-    for organism, count in organism_coverage.items():
-        if count < avg_organism_papers * 0.5:
-            severity = 10 - int((count / avg_organism_papers) * 10)
-            gaps.append({
-                "type": "organism",
-                "area": organism,
-                "paper_count": count,
-                "severity_score": min(severity, 10),
-                "reason": "Under-studied relative to average"
-            })
-    
-    for topic, count in topic_coverage.items():
-        if count < avg_topic_papers * 0.3:
-            severity = 10 - int((count / avg_topic_papers) * 10)
-            gaps.append({
-                "type": "topic",
-                "area": topic,
-                "paper_count": count,
-                "severity_score": min(severity, 10),
-                "reason": "Minimal research coverage"
-            })
-    
-    if len(year_coverage) >= 3:
-        sorted_years = sorted(year_coverage.keys())
-        recent_years = sorted_years[-3:]
-        min_year = sorted_years[0]
-        max_year = sorted_years[-1]
-        
-        for year in range(min_year, max_year + 1):
-            if year not in year_coverage and year not in recent_years:
-                gaps.append({
-                    "type": "temporal",
-                    "area": f"Research from {year}",
-                    "paper_count": 0,
-                    "severity_score": 7,
-                    "reason": "No publications in this year"
-                })
-    
-    return sorted(gaps, key=lambda x: x['severity_score'], reverse=True)[:15]
-
-def identify_comparative_gaps(metadata_list: list[dict]) -> dict:
-    organism_condition_matrix = {}
-    
-    for meta in metadata_list:
-        organisms = meta.get('organisms', [])
-        conditions = meta.get('space_conditions', [])
-        
-        for org in organisms:
-            if org not in organism_condition_matrix:
-                organism_condition_matrix[org] = {}
-            
-            for cond in conditions:
-                organism_condition_matrix[org][cond] = organism_condition_matrix[org].get(cond, 0) + 1
-    
-    all_organisms = list(organism_condition_matrix.keys())
-    all_conditions = set()
-    for conds in organism_condition_matrix.values():
-        all_conditions.update(conds.keys())
-    
-    cross_gaps = []
-    for org in all_organisms:
-        for cond in all_conditions:
-            if cond not in organism_condition_matrix[org]:
-                cross_gaps.append({
-                    "organism": org,
-                    "condition": cond,
-                    "status": "not_studied"
-                })
-    
-    return {
-        "organism_condition_gaps": cross_gaps[:20],
-        "total_combinations": len(all_organisms) * len(all_conditions),
-        "studied_combinations": sum(len(conds) for conds in organism_condition_matrix.values()),
-        "coverage_percentage": round((sum(len(conds) for conds in organism_condition_matrix.values()) / (len(all_organisms) * len(all_conditions)) * 100), 2) if all_organisms and all_conditions else 0
-    }
-
-def calculate_temporal_trends(year_counts: Counter, organism_year_map: dict, topic_year_map: dict) -> dict:
-    years = sorted(year_counts.keys())
-    if len(years) < 2:
-        return {
-            "growth_rate": 0,
-            "trend": "insufficient_data",
-            "peak_year": str(years[0]) if years else "unknown",
-            "peak_papers": year_counts[years[0]] if years else 0
-        }
-    
-    recent_avg = sum(year_counts[y] for y in years[-3:]) / 3 if len(years) >= 3 else year_counts[years[-1]]
-    older_avg = sum(year_counts[y] for y in years[:3]) / 3 if len(years) >= 3 else year_counts[years[0]]
-    
-    growth_rate = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
-    
-    peak_year = max(years, key=lambda y: year_counts[y])
-    
-    return {
-        "growth_rate": round(growth_rate, 2),
-        "trend": "growing" if growth_rate > 10 else "stable" if growth_rate > -10 else "declining",
-        "peak_year": str(peak_year),
-        "peak_papers": year_counts[peak_year]
-    }
-
-def calculate_collaboration_network(organism_pair_counts: Counter, organism_counts: Counter) -> list:
-    network = []
-    for (org1, org2), count in organism_pair_counts.most_common(15):
-        total_org1 = organism_counts[org1]
-        total_org2 = organism_counts[org2]
-        strength = count / min(total_org1, total_org2) if min(total_org1, total_org2) > 0 else 0
-        
-        network.append({
-            "organism1": org1,
-            "organism2": org2,
-            "co_occurrences": count,
-            "strength": round(strength, 3)
-        })
-    
-    return network
-
-def identify_emerging_areas(topic_counts: Counter, year_counts: Counter, topic_year_map: dict) -> list:
-    years = sorted(year_counts.keys())
-    if len(years) < 3:
-        return []
-    
-    recent_years = years[-3:]
-    older_years = years[:-3]
-    
-    emerging = []
-    
-    for topic, total_count in topic_counts.most_common(30):
-        recent_count = sum(
-            topic_year_map.get(f"{topic}_{year}", 0) 
-            for year in recent_years
-        )
-        
-        older_count = sum(
-            topic_year_map.get(f"{topic}_{year}", 0) 
-            for year in older_years
-        ) if older_years else 0
-        
-        if recent_count >= 3:
-            growth = ((recent_count - older_count) / older_count * 100) if older_count > 0 else 100
-            
-            if growth > 50:
-                emerging.append({
-                    "topic": topic,
-                    "recent_papers": recent_count,
-                    "growth_rate": round(growth, 2),
-                    "total_papers": total_count
-                })
-    
-    return sorted(emerging, key=lambda x: x["growth_rate"], reverse=True)[:8]
-
 @router.get("/filters")
 async def get_available_filters() -> Dict[str, Any]:
     try:
-        results = vector_store.get_all_papers_metadata(limit=10000)
+        results = await asyncio.to_thread(services.vector_store.get_all_papers_metadata, limit=10000)
         
         years = set()
         organisms = set()
@@ -414,27 +384,18 @@ async def get_available_filters() -> Dict[str, Any]:
             "organisms": sorted(list(organisms)),
             "sections": sorted(list(sections))
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stats")
 async def get_statistics() -> Dict[str, Any]:
     try:
-        stats = vector_store.get_all_metadata()
-        
-        if isinstance(stats, dict):
-            total_vectors = (
-                stats.get("total_vector_count") or 
-                stats.get("namespaces", {}).get("", {}).get("vector_count", 0)
-            )
-        else:
-            total_vectors = getattr(stats, 'total_vector_count', 0)
-            if hasattr(stats, 'namespaces') and hasattr(stats.namespaces, ''):
-                ns = getattr(stats.namespaces, '')
-                if hasattr(ns, 'vector_count'):
-                    total_vectors = ns.vector_count
-        
-        results = vector_store.get_all_papers_metadata(limit=10000)
+        # Only the active generation's namespace counts when the index is aliased
+        total_vectors = await asyncio.to_thread(services.vector_store.vector_count)
+        
+        results = await asyncio.to_thread(services.vector_store.get_all_papers_metadata, limit=10000)
         
         paper_ids = set()
         for r in results:
@@ -454,6 +415,8 @@ async def get_statistics() -> Dict[str, Any]:
             "total_papers": len(paper_ids),
             "index_fullness": index_fullness
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         print(f"Stats error: {e}")
         import traceback
@@ -463,66 +426,69 @@ async def get_statistics() -> Dict[str, Any]:
 @router.get("/trends")
 async def analyze_trends() -> Dict[str, Any]:
     try:
-        results = vector_store.get_all_papers_metadata(limit=10000)
-
-        years = []
-        organisms = []
-        topics = []
-        organism_year_map = {}
-        topic_year_map = {}
-        organism_pairs = []
-
-        for r in results:
-            metadata = r.get("metadata", {})
-            year = safe_int_year(metadata.get("year"))
-            
-            if year:
-                years.append(year)
-                
-                if metadata.get("organisms"):
-                    for org in metadata["organisms"]:
-                        organisms.append(org)
-                        key = f"{org}_{year}"
-                        organism_year_map[key] = organism_year_map.get(key, 0) + 1
-                
-                if metadata.get("keywords"):
-                    for kw in metadata["keywords"]:
-                        topics.append(kw)
-                        key = f"{kw}_{year}"
-                        topic_year_map[key] = topic_year_map.get(key, 0) + 1
-                
-                orgs = metadata.get("organisms", [])
-                if len(orgs) >= 2:
-                    for i in range(len(orgs)):
-                        for j in range(i+1, len(orgs)):
-                            pair = tuple(sorted([orgs[i], orgs[j]]))
-                            organism_pairs.append(pair)
-
-        year_counts = Counter(years)
-        organism_counts = Counter(organisms)
-        topic_counts = Counter(topics)
-        organism_pair_counts = Counter(organism_pairs)
-
-        temporal_analysis = calculate_temporal_trends(year_counts, organism_year_map, topic_year_map)
-        collaboration_network = calculate_collaboration_network(organism_pair_counts, organism_counts)
-        emerging = identify_emerging_areas(topic_counts, year_counts, topic_year_map)
+        results = await asyncio.to_thread(services.vector_store.get_all_papers_metadata, limit=10000)
+        analytics = get_corpus_analytics(results, safe_int_year)
+        # Clustered topics and yearly series from the last build_topic_trends.py run, if any
+        trends_artifact = get_trends_artifact()
+        topics = trends_artifact.get() if trends_artifact else None
+        store = services.vector_store
+        if topics and (topics.get("source_index"), topics.get("source_namespace")) != (store.index_name, store.namespace):
+            # Built from another index generation than the one promoted now; fall back to live analytics
+            mark_degraded("trends:stale_topics")
+            topics = None
 
-        research_by_year = {str(k): v for k, v in year_counts.items()}
-
-        print(f"Trends: {len(year_counts)} years, {len(organism_counts)} organisms, {len(topic_counts)} topics")
+        print(f"Trends: {len(analytics.years)} years, {len(analytics.organisms)} organisms, {len(analytics.keywords)} topics")
 
         return {
-            "research_by_year": research_by_year,
-            "top_organisms": dict(organism_counts.most_common(10)),
-            "top_topics": dict(topic_counts.most_common(10)),
-            "emerging_areas": emerging,
-            "temporal_analysis": temporal_analysis,
-            "collaboration_network": collaboration_network,
-            "organism_trends_by_year": [],
-            "topic_evolution": []
+            "research_by_year": analytics.research_by_year(),
+            "top_organisms": analytics.top_organisms(10),
+            "top_topics": topics["top_topics"] if topics else analytics.top_topics(10),
+            "emerging_areas": analytics.emerging_areas(),
+            "temporal_analysis": analytics.temporal_trends(),
+            "collaboration_network": analytics.collaboration_network(),
+            "organism_trends_by_year": topics["organism_trends_by_year"] if topics else [],
+            "topic_evolution": topics["topic_evolution"] if topics else []
         }
+    except UpstreamUnavailable as e:
+        raise service_unavailable(e)
     except Exception as e:
         print(f"Trends error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/ingest", dependencies=[Depends(require_admin)], status_code=202)
+async def submit_ingest_job(request: IngestRequest) -> ProcessingStatus:
+    try:
+        return services.ingest_jobs.submit(request.files)
+    except IngestBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/ingest", dependencies=[Depends(require_admin)])
+async def list_ingest_jobs() -> List[ProcessingStatus]:
+    return services.ingest_jobs.list_jobs()
+
+@router.get("/ingest/{job_id}", dependencies=[Depends(require_admin)])
+async def get_ingest_job(job_id: str) -> ProcessingStatus:
+    try:
+        return services.ingest_jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job {job_id}")
+
+@router.delete("/ingest/{job_id}", dependencies=[Depends(require_admin)])
+async def cancel_ingest_job(job_id: str) -> ProcessingStatus:
+    try:
+        return services.ingest_jobs.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job {job_id}")
+
+@router.post("/ingest/{job_id}/resume", dependencies=[Depends(require_admin)], status_code=202)
+async def resume_ingest_job(job_id: str) -> ProcessingStatus:
+    try:
+        return services.ingest_jobs.resume(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job {job_id}")
+    except (IngestBusy, ValueError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional
 
 class Settings(BaseSettings):
     openai_api_key: str
@@ -8,6 +9,7 @@ class Settings(BaseSettings):
     pinecone_index_name: str
     
     embedding_model: str = "text-embedding-3-small"
+    # text-embedding-3 models can return shortened vectors (e.g. 512 or 768); see migrate_embeddings.py
     embedding_dimensions: int = 1536
     llm_model: str = "gpt-4o"
     
@@ -15,6 +17,94 @@ class Settings(BaseSettings):
     chunk_size: int = 800  # Reduced from 1000 for more focused chunks
     chunk_overlap: int = 150  # Reduced from 200 for better balance
     
+    # Near-duplicate papers (preprint vs journal version): "skip", "link" or "off"
+    dedup_mode: str = "skip"
+    dedup_threshold: float = 0.8
+    
+    # Search reranking: fetch top_k * multiplier candidates (capped), boost preferred
+    # sections and recent papers, then drop scores below the threshold. Tune with sweep_retrieval.py
+    rerank_fetch_multiplier: int = 3
+    rerank_max_fetch: int = 150
+    min_score_threshold: float = 0.30
+    section_boost: float = 1.15
+    recency_boost: float = 1.05
+    recency_year: int = 2020
+    
+    # Keep only filterable fields on vectors and hydrate text/paper fields from a local chunk store
+    slim_vector_metadata: bool = False
+    chunk_store_path: str = "data/processed/chunk_store"
+    
+    # "pinecone", or "local" for the on-disk stand-in used offline
+    vector_backend: str = "pinecone"
+    local_index_path: str = "data/local_index"
+    # Maps PINECONE_INDEX_NAME (as an alias) to the active index generation; see reindex.py
+    index_alias_path: str = "data/index_aliases.json"
+    
+    # Background ingestion jobs (POST /api/ingest)
+    pdf_directory: str = "data/pdfs"
+    ingest_workers: int = 1
+    # flock held by whichever process is ingesting (jobs, watch_pdfs.py, ingest_pdfs.py); one at a time
+    ingest_lock_path: str = "data/processed/ingest.lock"
+    # Required as X-Admin-Token on operator endpoints; they return 403 while it is unset
+    admin_token: Optional[str] = None
+    
+    # TTL cache shared by all server workers on a host (see serve.py); an empty path disables it.
+    # TTLs are in seconds; 0 turns that tier off.
+    shared_cache_path: Optional[str] = "data/cache/shared.sqlite"
+    shared_cache_max_entries: int = 200000
+    cache_ttl_query_embedding: int = 7 * 86400
+    cache_ttl_search: int = 600
+    cache_ttl_llm: int = 86400
+    # Expired entries are kept this much longer and served when OpenAI or the index is down
+    cache_stale_grace: int = 86400
+    # Seconds the corpus metadata behind stats, filters, trends and gaps is reused in memory
+    corpus_metadata_ttl: int = 300
+    
+    # Upstream calls (see app/services/resilience.py). Each API request gets request_timeout
+    # seconds in total and every OpenAI or index call is further capped by its own timeout.
+    # The default stays under the 60 s client timeout in test_api.py.
+    request_timeout: float = 55.0
+    embedding_timeout: float = 10.0
+    # Ingest's batch embeddings; they use their own breaker, so a slow batch never opens the one search uses
+    embedding_batch_timeout: float = 120.0
+    index_query_timeout: float = 10.0
+    llm_timeout: float = 45.0
+    # Embeddings and index queries slower than this quantile of recent calls are sent again
+    hedge_quantile: float = 0.95
+    hedge_min_delay_ms: float = 20.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    upstream_threads: int = 32
+    
+    # Daily append-only log of search, summarize and consensus requests, read by
+    # precompute_summaries.py; an empty directory disables it
+    query_log_directory: Optional[str] = "data/logs/queries"
+    query_log_retention_days: int = 30
+    
+    # Topic clusters and organism/topic yearly series written by build_topic_trends.py and
+    # served by /api/trends (reloaded when the file changes); an empty path disables them
+    trends_artifact_path: Optional[str] = "data/processed/topic_trends.json"
+    
+    # Speculative summaries (see app/services/prefetch.py): /search with a persona starts that
+    # persona's summary of the top result before the detail drawer asks for it; unclaimed ones are
+    # dropped after prefetch_ttl
+    speculative_summaries: bool = False
+    prefetch_max_inflight: int = 4
+    prefetch_ttl: float = 60.0
+    
+    # Startup warm-up (see app/services/container.py): /ready returns 503 until it has run.
+    # An empty list warms the first query of each persona.
+    warmup_enabled: bool = True
+    warmup_queries: List[str] = []
+    
+    # Opt-in request profiling (see app/services/profiler.py); when off the middleware is not installed.
+    # Requests sending "X-Profile: 1" with a valid X-Admin-Token are always profiled.
+    profiling_enabled: bool = False
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_directory: str = "data/profiles"
+    profile_keep: int = 50
+    
     class Config:
         env_file = ".env"
 
@@ -1,14 +1,53 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import random
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.routes import router
+from app.services.container import services
+from app.services.resilience import breaker_states, deadline, start_degraded
+from app.services.metrics import HTTP_LATENCY, HTTP_REQUESTS, render_metrics, server_timing_header, start_request
 from app.config import get_settings
 
 settings = get_settings()
 
+# Seconds between warm-up attempts while the index or OpenAI is unreachable
+WARMUP_RETRY_DELAYS = [1, 2, 5, 10, 30]
+
+async def warm_up_services():
+    attempt = 0
+    while True:
+        try:
+            timings = await asyncio.to_thread(services.warm_up)
+            print(f"Warm-up finished: {timings}")
+            return
+        except Exception as e:
+            services.warmup_error = str(e)
+            delay = WARMUP_RETRY_DELAYS[min(attempt, len(WARMUP_RETRY_DELAYS) - 1)]
+            print(f"Warm-up failed ({e}); retrying in {delay}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the worker accepts connections (and answers
+    # /health) at once; load balancers should route on /ready instead
+    warmup = asyncio.create_task(warm_up_services()) if settings.warmup_enabled else None
+    if warmup is None:
+        services.ready = True
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    services.close()
+
 app = FastAPI(
     title="Space Biology Knowledge Engine API",
     description="API for NASA Space Biology Research Knowledge Base",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -19,7 +58,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(router, prefix="/api", tags=["research"])
+API_PREFIX = "/api"
+
+app.include_router(router, prefix=API_PREFIX, tags=["research"])
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    timings = start_request()
+    degraded = start_degraded()
+    start = time.perf_counter()
+    # Upstream calls made for this request give up once the deadline has passed
+    with deadline(settings.request_timeout):
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    # Label by route template, not the raw path, so IDs in URLs do not create new series
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    if route is not None and route in router.routes:
+        # Newer FastAPI matches the router's own (unprefixed) route objects
+        route_path = API_PREFIX + route_path
+    HTTP_LATENCY.observe(request.method, route_path, value=elapsed)
+    HTTP_REQUESTS.inc(request.method, route_path, str(response.status_code))
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    if degraded:
+        # Parts of the response came from stale caches or fallbacks, e.g. "search:stale"
+        response.headers["X-Degraded"] = ", ".join(degraded)
+    return response
+
+if settings.profiling_enabled:
+    from app.services.profiler import PROFILE_SLOT, ProfileRing, StackSampler
+    
+    profile_ring = ProfileRing(settings.profile_directory, settings.profile_keep)
+    
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        token = request.headers.get("x-admin-token", "")
+        if (
+            request.headers.get("x-profile") == "1"
+            and settings.admin_token
+            and hmac.compare_digest(token, settings.admin_token)
+        ):
+            trigger = "header"
+        elif random.random() < settings.profile_sample_rate:
+            trigger = "sampled"
+        else:
+            return await call_next(request)
+        
+        if not PROFILE_SLOT.acquire(blocking=False):
+            # Another request is being profiled; serve this one normally
+            return await call_next(request)
+        try:
+            start = time.perf_counter()
+            with StackSampler(settings.profile_interval_ms / 1000) as sampler:
+                response = await call_next(request)
+            elapsed = time.perf_counter() - start
+            profile_id = profile_ring.save(sampler, {
+                "method": request.method,
+                "path": request.url.path,
+                "query": request.url.query,
+                "status": response.status_code,
+                "trigger": trigger,
+                "duration_ms": round(elapsed * 1000, 1),
+                "server_timing": response.headers.get("server-timing")
+            })
+        finally:
+            PROFILE_SLOT.release()
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text format; counters are per server process."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
@@ -29,11 +140,14 @@ async def root():
         "endpoints": {
             "search": "/api/search",
             "summarize": "/api/summarize",
+            "summarize_all": "/api/summarize/all",
             "consensus": "/api/consensus",
             "gaps": "/api/gaps",
             "trends": "/api/trends",
             "filters": "/api/filters",
-            "stats": "/api/stats"
+            "stats": "/api/stats",
+            "ingest": "/api/ingest",
+            "metrics": "/metrics"
         }
     }
 
@@ -41,6 +155,17 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """503 until this worker has warmed its connections and caches."""
+    if services.ready:
+        # Open breakers do not make a worker unready: it still serves cached and degraded responses
+        return {"status": "ready", "warmup_ms": services.warmup_timings, "circuits": breaker_states()}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "warming_up", "error": services.warmup_error}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
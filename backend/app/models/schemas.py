@@ -14,6 +14,25 @@ class PaperMetadata(BaseModel):
     space_conditions: List[str]
     findings_summary: str
     file_path: str
+    doi: Optional[str] = None
+
+class SectionSpan(BaseModel):
+    # Character range [start, end) within pages[page] (zero-based page index)
+    section: str
+    page: int
+    start: int
+    end: int
+
+class TextLine(BaseModel):
+    text: str
+    size: float
+
+class PaperText(BaseModel):
+    pages: List[str]
+    spans: List[SectionSpan] = []
+    # Document info dictionary and first-page lines with font sizes, for local metadata heuristics
+    pdf_metadata: Dict[str, Any] = {}
+    first_page_lines: List[TextLine] = []
 
 class ChunkMetadata(BaseModel):
     paper_id: str
@@ -39,4 +58,17 @@ class ProcessingStatus(BaseModel):
     total_papers: int
     processed_papers: int
     failed_papers: List[str]
+    # queued, running, cancelling, cancelled, completed, failed, or interrupted (worker died)
     status: str
+    job_id: Optional[str] = None
+    skipped_papers: int = 0
+    chunks_upserted: int = 0
+    papers_per_minute: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class IngestRequest(BaseModel):
+    # PDF filenames in data/pdfs; all of them when omitted
+    files: Optional[List[str]] = None
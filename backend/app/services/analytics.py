@@ -0,0 +1,280 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+class Incidence:
+    """
+    Sparse papers × labels matrix in coordinate form: one entry per label occurrence,
+    in corpus order, so a label repeated within a paper counts twice as it always has.
+    Label IDs follow first appearance, which keeps Counter-style tie order.
+    """
+    def __init__(self, values: List[List[Any]], n_rows: int):
+        ids: Dict[Any, int] = {}
+        self.cols = np.array([ids.setdefault(label, len(ids)) for v in values for label in v], dtype=np.int64)
+        self.rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.array(list(map(len, values)), dtype=np.int64))
+        self.labels: List[Any] = list(ids)
+    
+    def __len__(self) -> int:
+        return len(self.labels)
+    
+    def entries(self, row_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Positions of the entries in rows where row_mask is set (all of them without one)."""
+        if row_mask is None:
+            return np.arange(len(self.cols))
+        return np.flatnonzero(row_mask[self.rows])
+    
+    def totals(self, row_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(self.cols[self.entries(row_mask)], minlength=len(self.labels))
+    
+    def first_seen(self, row_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Position of each label's first entry, or a value past the end if it never appears."""
+        entries = self.entries(row_mask)
+        first = np.full(len(self.labels), len(self.cols), dtype=np.int64)
+        np.minimum.at(first, self.cols[entries], entries)
+        return first
+    
+    def by_group(self, groups: np.ndarray, n_groups: int, row_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Labels × groups counts for a per-row group ID (e.g. the year), i.e. incidenceᵀ @ one_hot(groups)."""
+        entries = self.entries(row_mask)
+        codes = self.cols[entries] * n_groups + groups[self.rows[entries]]
+        return np.bincount(codes, minlength=len(self.labels) * n_groups).reshape(len(self.labels), n_groups)
+
+def _row_pairs(a_rows: np.ndarray, b_rows: np.ndarray, n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every (i, j) with a_rows[i] == b_rows[j], both inputs sorted by row: the nonzero
+    terms of Aᵀ @ B, expanded without Python loops.
+    """
+    b_count = np.bincount(b_rows, minlength=n_rows)
+    b_start = np.concatenate(([0], np.cumsum(b_count)[:-1]))
+    fanout = b_count[a_rows]
+    left = np.repeat(np.arange(len(a_rows)), fanout)
+    offsets = np.arange(fanout.sum()) - np.repeat(np.cumsum(fanout) - fanout, fanout)
+    right = np.repeat(b_start[a_rows], fanout) + offsets
+    return left, right
+
+class CorpusAnalytics:
+    """
+    Counts behind /api/trends and /api/gaps, computed with array operations over
+    integer-coded organisms, keywords and conditions instead of per-paper dicts, so
+    both stay interactive on 100k+ chunks. Built once per corpus metadata snapshot
+    (see get_corpus_analytics); the methods return the JSON the routes serve.
+    """
+    def __init__(self, metadata_list: List[Dict[str, Any]], years: List[Optional[int]]):
+        n = len(metadata_list)
+        self.n_rows = n
+        self.organisms = Incidence([meta.get("organisms") or [] for meta in metadata_list], n)
+        self.keywords = Incidence([meta.get("keywords") or [] for meta in metadata_list], n)
+        self.conditions = Incidence([meta.get("space_conditions") or [] for meta in metadata_list], n)
+        
+        # Year IDs in order of first appearance; -1 for chunks without a usable year
+        year_values = np.array([year or 0 for year in years], dtype=np.int64)
+        self.dated = year_values != 0
+        unique, first, inverse = np.unique(year_values[self.dated], return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        self.years: List[int] = unique[order].tolist()
+        self.year_ids = np.full(n, -1, dtype=np.int64)
+        self.year_ids[self.dated] = rank[inverse.ravel()]
+        self.year_counts = np.bincount(self.year_ids[self.dated], minlength=len(self.years))
+    
+    @staticmethod
+    def _most_common(incidence: Incidence, limit: int, row_mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Label IDs and totals of the `limit` most common labels, ties in order of first appearance."""
+        totals = incidence.totals(row_mask)
+        present = np.flatnonzero(totals)
+        order = np.lexsort((incidence.first_seen(row_mask)[present], -totals[present]))[:limit]
+        return present[order], totals[present[order]]
+    
+    def top_organisms(self, limit: int = 10) -> Dict[str, int]:
+        ids, totals = self._most_common(self.organisms, limit, self.dated)
+        return {self.organisms.labels[i]: int(t) for i, t in zip(ids, totals)}
+    
+    def top_topics(self, limit: int = 10) -> Dict[str, int]:
+        ids, totals = self._most_common(self.keywords, limit, self.dated)
+        return {self.keywords.labels[i]: int(t) for i, t in zip(ids, totals)}
+    
+    def research_by_year(self) -> Dict[str, int]:
+        return {str(year): int(count) for year, count in zip(self.years, self.year_counts)}
+    
+    def _sorted_years(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Year IDs in calendar order and their paper counts."""
+        order = np.argsort(self.years, kind="stable")
+        return order, self.year_counts[order]
+    
+    def temporal_trends(self) -> Dict[str, Any]:
+        order, counts = self._sorted_years()
+        if len(order) < 2:
+            return {
+                "growth_rate": 0,
+                "trend": "insufficient_data",
+                "peak_year": str(self.years[order[0]]) if len(order) else "unknown",
+                "peak_papers": int(counts[0]) if len(order) else 0
+            }
+        
+        recent_avg = int(counts[-3:].sum()) / 3 if len(order) >= 3 else int(counts[-1])
+        older_avg = int(counts[:3].sum()) / 3 if len(order) >= 3 else int(counts[0])
+        
+        growth_rate = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
+        
+        peak = int(np.argmax(counts))
+        
+        return {
+            "growth_rate": round(growth_rate, 2),
+            "trend": "growing" if growth_rate > 10 else "stable" if growth_rate > -10 else "declining",
+            "peak_year": str(self.years[order[peak]]),
+            "peak_papers": int(counts[peak])
+        }
+    
+    def collaboration_network(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Organisms studied together in a chunk: the upper triangle of Oᵀ @ O over dated chunks."""
+        entries = self.organisms.entries(self.dated)
+        rows = self.organisms.rows[entries]
+        left, right = _row_pairs(rows, rows, self.n_rows)
+        keep = left < right
+        left, right = entries[left[keep]], entries[right[keep]]
+        if not len(left):
+            return []
+        
+        # Pairs are unordered and named alphabetically, as the network always showed them
+        labels = self.organisms.labels
+        name_rank = np.empty(len(labels), dtype=np.int64)
+        name_rank[sorted(range(len(labels)), key=labels.__getitem__)] = np.arange(len(labels))
+        a, b = self.organisms.cols[left], self.organisms.cols[right]
+        swap = name_rank[a] > name_rank[b]
+        a, b = np.where(swap, b, a), np.where(swap, a, b)
+        
+        n_labels = len(labels)
+        pair_codes, pair_index, counts = np.unique(a * n_labels + b, return_inverse=True, return_counts=True)
+        first = np.full(len(pair_codes), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first, pair_index.ravel(), left * len(self.organisms.cols) + right)
+        top = np.lexsort((first, -counts))[:limit]
+        
+        organism_counts = self.organisms.totals(self.dated)
+        network = []
+        for code, count in zip(pair_codes[top], counts[top]):
+            org1, org2 = divmod(int(code), n_labels)
+            smaller = min(organism_counts[org1], organism_counts[org2])
+            strength = count / smaller if smaller > 0 else 0
+            network.append({
+                "organism1": labels[org1],
+                "organism2": labels[org2],
+                "co_occurrences": int(count),
+                "strength": round(float(strength), 3)
+            })
+        return network
+    
+    def emerging_areas(self, limit: int = 8) -> List[Dict[str, Any]]:
+        order, _ = self._sorted_years()
+        if len(order) < 3:
+            return []
+        
+        ids, totals = self._most_common(self.keywords, 30, self.dated)
+        topic_years = self.keywords.by_group(self.year_ids, len(self.years), self.dated)[ids]
+        recent = topic_years[:, order[-3:]].sum(axis=1)
+        older = topic_years[:, order[:-3]].sum(axis=1)
+        
+        candidates = np.flatnonzero(recent >= 3)
+        growth = np.where(older[candidates] > 0, (recent[candidates] - older[candidates]) / np.maximum(older[candidates], 1) * 100, 100.0)
+        candidates, growth = candidates[growth > 50], growth[growth > 50]
+        ranked = np.argsort(-growth, kind="stable")[:limit]
+        
+        return [
+            {
+                "topic": self.keywords.labels[ids[i]],
+                "recent_papers": int(recent[i]),
+                # Topics with nothing before the last three years report a flat 100
+                "growth_rate": round(float(g), 2) if older[i] > 0 else 100,
+                "total_papers": int(totals[i])
+            }
+            for i, g in zip(candidates[ranked], growth[ranked])
+        ]
+    
+    def coverage_gaps(self, limit: int = 15) -> List[Dict[str, Any]]:
+        gaps = []
+        for incidence, kind, cutoff, reason in (
+            (self.organisms, "organism", 0.5, "Under-studied relative to average"),
+            (self.keywords, "topic", 0.3, "Minimal research coverage")
+        ):
+            totals = incidence.totals()
+            present = np.flatnonzero(totals)
+            average = int(totals.sum()) / len(present) if len(present) else 1
+            under = present[totals[present] < average * cutoff]
+            under = under[np.argsort(incidence.first_seen()[under], kind="stable")]
+            severity = np.minimum(10 - ((totals[under] / average) * 10).astype(np.int64), 10)
+            gaps.extend(
+                {
+                    "type": kind,
+                    "area": incidence.labels[i],
+                    "paper_count": int(totals[i]),
+                    "severity_score": int(s),
+                    "reason": reason
+                }
+                for i, s in zip(under, severity)
+            )
+        
+        if len(self.years) >= 3:
+            sorted_years = sorted(self.years)
+            recent_years = set(sorted_years[-3:])
+            covered = set(self.years)
+            for year in range(sorted_years[0], sorted_years[-1] + 1):
+                if year not in covered and year not in recent_years:
+                    gaps.append({
+                        "type": "temporal",
+                        "area": f"Research from {year}",
+                        "paper_count": 0,
+                        "severity_score": 7,
+                        "reason": "No publications in this year"
+                    })
+        
+        return sorted(gaps, key=lambda x: x['severity_score'], reverse=True)[:limit]
+    
+    def comparative_gaps(self, limit: int = 20) -> Dict[str, Any]:
+        """Organism × condition cells no chunk covers, from the zeros of Oᵀ @ C."""
+        left, right = _row_pairs(self.organisms.rows, self.conditions.rows, self.n_rows)
+        n_conditions = len(self.conditions)
+        matrix = np.zeros((len(self.organisms), n_conditions), dtype=np.int64)
+        np.add.at(matrix, (self.organisms.cols[left], self.conditions.cols[right]), 1)
+        
+        # Only conditions seen alongside some organism count, in order of first appearance
+        organisms = np.argsort(self.organisms.first_seen(), kind="stable")
+        conditions = np.flatnonzero(matrix.any(axis=0))
+        conditions = conditions[np.argsort(self.conditions.first_seen()[conditions], kind="stable")]
+        matrix = matrix[np.ix_(organisms, conditions)]
+        
+        total = matrix.size
+        studied = int(np.count_nonzero(matrix))
+        missing_org, missing_cond = np.nonzero(matrix == 0)
+        cross_gaps = [
+            {
+                "organism": self.organisms.labels[organisms[o]],
+                "condition": self.conditions.labels[conditions[c]],
+                "status": "not_studied"
+            }
+            for o, c in zip(missing_org[:limit], missing_cond[:limit])
+        ]
+        
+        return {
+            "organism_condition_gaps": cross_gaps,
+            "total_combinations": total,
+            "studied_combinations": studied,
+            "coverage_percentage": round(studied / total * 100, 2) if total else 0
+        }
+
+_cached: Optional[Tuple[list, CorpusAnalytics]] = None
+_cache_lock = threading.Lock()
+
+def get_corpus_analytics(results: List[Dict[str, Any]], year: Callable[[Any], Optional[int]]) -> CorpusAnalytics:
+    """
+    Analytics for get_all_papers_metadata() results. That memo hands back the same list
+    until the corpus is refetched, so the engine is built once per snapshot.
+    """
+    global _cached
+    with _cache_lock:
+        if _cached is not None and _cached[0] is results:
+            return _cached[1]
+    metadata_list = [r.get("metadata", {}) for r in results]
+    analytics = CorpusAnalytics(metadata_list, [year(meta.get("year")) for meta in metadata_list])
+    with _cache_lock:
+        _cached = (results, analytics)
+    return analytics
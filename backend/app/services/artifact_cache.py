@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.models.schemas import ChunkMetadata, PaperMetadata, PaperText, SectionSpan
+
+def _write_json(path: Path, data: Any):
+    """Write JSON atomically so an interrupted ingest never leaves a torn artifact."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _read_json(path: Path) -> Optional[Any]:
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class ArtifactCache:
+    """
+    Cache for each ingest stage, so changing one stage only reruns that stage:
+    
+    - pages/{paper_id}.json: raw page text and document info, keyed by the PDF's content hash
+    - metadata/{key}.json: LLM metadata, keyed by text hash + prompt version + model
+    - chunks/{paper_id}-{key}.json: chunks, keyed by metadata, section spans and chunker parameters
+    - manifest.json: which artifacts are current for each paper
+    """
+    def __init__(self, root: str = "data/processed"):
+        self.root = Path(root)
+        self.pages_dir = self.root / "pages"
+        self.metadata_dir = self.root / "metadata"
+        self.chunks_dir = self.root / "chunks"
+        self.manifest_path = self.root / "manifest.json"
+        
+        for directory in (self.pages_dir, self.metadata_dir, self.chunks_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        
+        self._manifest_lock = threading.Lock()
+    
+    @staticmethod
+    def file_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def text_hash(pages: List[str]) -> str:
+        digest = hashlib.sha256()
+        for page in pages:
+            digest.update(page.encode("utf-8"))
+            digest.update(b"\f")
+        return digest.hexdigest()
+    
+    @staticmethod
+    def metadata_key(text_hash: str, prompt_version: str, model: str) -> str:
+        return f"{text_hash[:24]}-v{prompt_version}-{model}"
+    
+    @staticmethod
+    def chunks_key(metadata_key: str, spans: List[SectionSpan], chunk_size: int, chunk_overlap: int, chunker_version: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{metadata_key}|{chunk_size}|{chunk_overlap}|{chunker_version}".encode("utf-8"))
+        for span in spans:
+            digest.update(f"|{span.section}:{span.page}:{span.start}:{span.end}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+    
+    def load_pages(self, paper_id: str, source_hash: str) -> Optional[PaperText]:
+        cached = _read_json(self.pages_dir / f"{paper_id}.json")
+        # Artifacts without first-page layout predate the metadata heuristics
+        if cached and cached.get("source_sha256") == source_hash and "first_page_lines" in cached:
+            return PaperText(**{k: v for k, v in cached.items() if k != "source_sha256"})
+        return None
+    
+    def save_pages(self, paper_id: str, source_hash: str, paper_text: PaperText):
+        # Section spans are cheap to rebuild and change with the heuristics, so they are not cached
+        _write_json(self.pages_dir / f"{paper_id}.json", {
+            "source_sha256": source_hash,
+            **paper_text.model_dump(exclude={"spans"})
+        })
+    
+    def load_metadata(self, key: str, paper_id: str, file_path: str) -> Optional[PaperMetadata]:
+        cached = _read_json(self.metadata_dir / f"{key}.json")
+        if cached is None:
+            return None
+        # Identical text under another filename shares the extraction
+        cached.update({"paper_id": paper_id, "file_path": file_path})
+        return PaperMetadata(**cached)
+    
+    def save_metadata(self, key: str, metadata: PaperMetadata):
+        _write_json(self.metadata_dir / f"{key}.json", metadata.model_dump())
+    
+    def load_chunks(self, paper_id: str, key: str) -> Optional[List[ChunkMetadata]]:
+        cached = _read_json(self.chunks_dir / f"{paper_id}-{key}.json")
+        if cached is None:
+            return None
+        return [ChunkMetadata(**c) for c in cached]
+    
+    def save_chunks(self, paper_id: str, key: str, chunks: List[ChunkMetadata]):
+        _write_json(self.chunks_dir / f"{paper_id}-{key}.json", [c.model_dump() for c in chunks])
+    
+    def load_legacy(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """Combined metadata + chunks file written before the cache was split into stages."""
+        return _read_json(self.root / f"{paper_id}.json")
+    
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        return _read_json(self.manifest_path) or {}
+    
+    def record(self, paper_id: str, entry: Dict[str, Any]):
+        with self._manifest_lock:
+            manifest = self.load_manifest()
+            manifest[paper_id] = entry
+            _write_json(self.manifest_path, manifest)
+    
+    def forget(self, paper_ids: List[str]):
+        """Drop manifest entries, e.g. for PDFs that were removed from data/pdfs."""
+        with self._manifest_lock:
+            manifest = self.load_manifest()
+            for paper_id in paper_ids:
+                manifest.pop(paper_id, None)
+            _write_json(self.manifest_path, manifest)
+    
+    def clear(self):
+        """Drop page, metadata and chunk artifacts. Embeddings are keyed by content and kept."""
+        for directory in (self.pages_dir, self.metadata_dir, self.chunks_dir):
+            for artifact in directory.glob("*.json"):
+                artifact.unlink()
+        for legacy_file in self.root.glob("*.json"):
+            legacy_file.unlink()
+
+class EmbeddingCache:
+    """SQLite store of embeddings keyed by model, dimensions and the exact input text."""
+    def __init__(self, path: str = "data/processed/embeddings.sqlite"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self.conn.commit()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(text: str, model: str, dimensions: int) -> str:
+        return hashlib.sha256(f"{model}|{dimensions}|{text}".encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array('f', blob).tolist()
+        return found
+    
+    def put_many(self, items: Dict[str, List[float]]):
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array('f', vector).tobytes()) for key, vector in items.items()]
+            )
+            self.conn.commit()
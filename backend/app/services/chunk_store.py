@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.models.schemas import ChunkMetadata
+from app.services.file_lock import FileLock
+
+# Chunk metadata that is per paper rather than per chunk; stored once in papers.json
+PAPER_FIELDS = ["title", "authors", "year", "organisms", "keywords", "experiment_type", "space_conditions"]
+
+class ChunkStore:
+    """
+    Local store for chunk text and paper fields, so vectors only need to carry filterable metadata.
+    
+    texts.dat is an append-only UTF-8 file read through mmap; index.json maps vector IDs to
+    (offset, length) plus per-chunk fields, and papers.json holds paper-level fields once.
+    Readers reopen the files whenever ingestion has written a newer index.
+    
+    Writers in different processes take store.lock around each append and index write:
+    appends land one after another so recorded offsets are exact, and a flush merges its
+    own changes into the index on disk instead of overwriting entries another process added.
+    """
+    def __init__(self, path: str = "data/processed/chunk_store"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.texts_path = self.path / "texts.dat"
+        self.index_path = self.path / "index.json"
+        self.papers_path = self.path / "papers.json"
+        self.texts_path.touch(exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(str(self.path / "store.lock"))
+        # Changes not yet written to index.json / papers.json; None marks a removed chunk
+        self._pending_index: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending_papers: Dict[str, Dict[str, Any]] = {}
+        self._loaded_mtime = None
+        self._dirty = False
+        self._mmap = None
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.papers: Dict[str, Dict[str, Any]] = {}
+    
+    def put_chunks(self, chunks: List[ChunkMetadata], vector_ids: List[str], flush: bool = True):
+        """Append chunk texts. Bulk loaders pass flush=False and call flush() once at the end."""
+        if not chunks:
+            return
+        
+        with self._lock, self._file_lock:
+            self._refresh()
+            recorded = set()
+            with open(self.texts_path, 'ab') as f:
+                for chunk, vector_id in zip(chunks, vector_ids):
+                    data = chunk.text.encode("utf-8")
+                    # No other process appends while the file lock is held, so this is where the chunk lands
+                    offset = f.tell()
+                    f.write(data)
+                    entry = {
+                        "offset": offset,
+                        "length": len(data),
+                        "paper_id": chunk.paper_id,
+                        "chunk_type": chunk.chunk_type,
+                        "chunk_index": chunk.chunk_index,
+                        "section_chunk": chunk.metadata.get("section_chunk"),
+                        "page": chunk.metadata.get("page")
+                    }
+                    self.index[vector_id] = entry
+                    self._pending_index[vector_id] = entry
+                    # Bulk callers (restore, reconcile) mix papers; the first chunk of each carries its fields
+                    if chunk.paper_id not in recorded:
+                        recorded.add(chunk.paper_id)
+                        fields = {field: chunk.metadata.get(field) for field in PAPER_FIELDS}
+                        self.papers[chunk.paper_id] = fields
+                        self._pending_papers[chunk.paper_id] = fields
+            
+            self._dirty = True
+            if flush:
+                self._flush_locked()
+    
+    def flush(self):
+        with self._lock, self._file_lock:
+            self._flush_locked()
+    
+    def remove(self, vector_ids: List[str]):
+        """Forget chunks; their bytes stay in texts.dat until compact()."""
+        with self._lock, self._file_lock:
+            self._refresh()
+            for vector_id in vector_ids:
+                self.index.pop(vector_id, None)
+                self._pending_index[vector_id] = None
+            self._dirty = True
+            self._flush_locked()
+    
+    def get_text(self, vector_id: str) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            entry = self.index.get(vector_id)
+            if entry is None or self._mmap is None:
+                return None
+            return self._mmap[entry["offset"]:entry["offset"] + entry["length"]].decode("utf-8")
+    
+    def hydrate(self, results: List[Dict[str, Any]], include_text: bool = True) -> List[Dict[str, Any]]:
+        """Fill each result's metadata with its paper fields, chunk fields and (optionally) text."""
+        with self._lock:
+            self._refresh()
+            for result in results:
+                metadata = dict(result.get("metadata") or {})
+                entry = self.index.get(result["id"])
+                if entry:
+                    paper = self.papers.get(entry["paper_id"], {})
+                    metadata.update(paper)
+                    metadata.update({k: v for k, v in entry.items() if k not in ("offset", "length") and v is not None})
+                    if include_text and self._mmap is not None:
+                        metadata["text"] = self._mmap[entry["offset"]:entry["offset"] + entry["length"]].decode("utf-8")
+                result["metadata"] = metadata
+        return results
+    
+    def compact(self):
+        """Rewrite texts.dat without the bytes of removed or replaced chunks."""
+        with self._lock, self._file_lock:
+            self._flush_locked()
+            self._refresh()
+            tmp_path = self.texts_path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                offset = 0
+                for entry in self.index.values():
+                    data = self._mmap[entry["offset"]:entry["offset"] + entry["length"]] if self._mmap else b""
+                    f.write(data)
+                    entry["offset"] = offset
+                    offset += len(data)
+            self._close()
+            os.replace(tmp_path, self.texts_path)
+            self._write_json(self.index_path, self.index)
+            self._loaded_mtime = None
+    
+    def _flush_locked(self):
+        """Apply this process's pending changes to the files as they are now; needs both locks."""
+        if not self._dirty:
+            return
+        index = self._read_json(self.index_path)
+        papers = self._read_json(self.papers_path)
+        for vector_id, entry in self._pending_index.items():
+            if entry is None:
+                index.pop(vector_id, None)
+            else:
+                index[vector_id] = entry
+        papers.update(self._pending_papers)
+        
+        self._write_json(self.papers_path, papers)
+        # The index is written last so readers never see IDs pointing past the text file
+        self._write_json(self.index_path, index)
+        self.index = index
+        self.papers = papers
+        self._pending_index = {}
+        self._pending_papers = {}
+        self._dirty = False
+        self._loaded_mtime = None
+    
+    def _refresh(self):
+        if self._dirty or not self.index_path.exists():
+            return
+        mtime = self.index_path.stat().st_mtime_ns
+        if mtime == self._loaded_mtime:
+            return
+        
+        with open(self.index_path, 'r') as f:
+            self.index = json.load(f)
+        if self.papers_path.exists():
+            with open(self.papers_path, 'r') as f:
+                self.papers = json.load(f)
+        
+        self._close()
+        if self.texts_path.stat().st_size > 0:
+            with open(self.texts_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._loaded_mtime = mtime
+    
+    def _close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+    
+    def _read_json(self, path: Path) -> Dict[str, Any]:
+        if not path.exists():
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def _write_json(self, path: Path, data: Any):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
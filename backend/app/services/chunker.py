@@ -0,0 +1,101 @@
+import bisect
+import re
+from itertools import accumulate
+from typing import List, Tuple
+
+# Sentence-ending punctuation followed by whitespace; the boundary is the
+# whitespace run. Same splits as r'(?<=[.!?])\s+' without the costly lookbehind.
+SENTENCE_BOUNDARY = re.compile(r'[.!?]\s+')
+WORD = re.compile(r'\S+')
+
+def split_text_spans(text: str, target_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Sentence-aware chunking that returns (start, end) character spans into text.
+    
+    The text is tokenized once: sentence boundaries come from a single regex pass
+    and each sentence is counted once into a prefix-sum array of word offsets, so
+    chunk sizes and overlap windows are plain index arithmetic. Chunk boundaries
+    and word content match the original sentence-joining chunker exactly; use
+    split_text for the chunk strings themselves.
+    """
+    sentence_starts, sentence_ends, _, chunks = _chunk_sentences(text, target_size, overlap)
+    return [
+        (sentence_starts[first], sentence_ends[last - 1]) if first is not None else (start, end)
+        for first, last, start, end in chunks
+    ]
+
+def split_text(text: str, target_size: int, overlap: int) -> List[Tuple[int, str]]:
+    """
+    (start offset, chunk text) pairs, with text byte-identical to the original
+    chunker: sentences joined by single spaces and over-long sentences re-joined
+    word by word, so chunks, their embeddings and cache keys do not change.
+    
+    The sentences are joined once and chunks are sliced out of the joined text by
+    prefix sums of sentence lengths.
+    """
+    sentence_starts, _, sentences, chunks = _chunk_sentences(text, target_size, overlap)
+    joined = " ".join(sentences)
+    # joined_starts[k] is where sentence k starts in joined
+    joined_starts = list(accumulate((len(sentence) + 1 for sentence in sentences), initial=0))
+    
+    result = []
+    for first, last, start, end in chunks:
+        if first is None:
+            result.append((start, " ".join(text[start:end].split())))
+        else:
+            result.append((sentence_starts[first], joined[joined_starts[first]:joined_starts[last] - 1]))
+    return result
+
+def _chunk_sentences(text: str, target_size: int, overlap: int):
+    """
+    Sentence start and end offsets, the sentences, and the chunks as (first sentence,
+    last sentence + 1, None, None) or, for pieces of a sentence split by words,
+    (None, None, start, end).
+    """
+    boundaries = [boundary.span() for boundary in SENTENCE_BOUNDARY.finditer(text)]
+    sentence_starts = [0] + [end for _, end in boundaries]
+    sentence_ends = [start + 1 for start, _ in boundaries] + [len(text)]
+    
+    sentences = [text[start:end] for start, end in zip(sentence_starts, sentence_ends)]
+    
+    # word_offsets[k] is the number of words before sentence k
+    word_offsets = list(accumulate((len(sentence.split()) for sentence in sentences), initial=0))
+    
+    chunks = []
+    # Current chunk is sentences [chunk_start, chunk_end)
+    chunk_start = 0
+    chunk_end = 0
+    step = max(target_size - overlap, 1)
+    
+    for k in range(len(sentence_starts)):
+        sentence_words = word_offsets[k + 1] - word_offsets[k]
+        
+        # If single sentence is too long, split it by words
+        if sentence_words > target_size:
+            if chunk_end > chunk_start:
+                chunks.append((chunk_start, chunk_end, None, None))
+            
+            words = [word.span() for word in WORD.finditer(text, sentence_starts[k], sentence_ends[k])]
+            for i in range(0, sentence_words, step):
+                chunks.append((None, None, words[i][0], words[min(i + target_size, sentence_words) - 1][1]))
+            
+            chunk_start = chunk_end = k + 1
+            continue
+        
+        if word_offsets[k + 1] - word_offsets[chunk_start] <= target_size:
+            chunk_end = k + 1
+            continue
+        
+        if chunk_end > chunk_start:
+            chunks.append((chunk_start, chunk_end, None, None))
+        
+        # Overlap is the longest run of trailing sentences that fits in `overlap` words
+        chunk_start = bisect.bisect_left(
+            word_offsets, word_offsets[chunk_end] - overlap, chunk_start, chunk_end
+        )
+        chunk_end = k + 1
+    
+    if chunk_end > chunk_start:
+        chunks.append((chunk_start, chunk_end, None, None))
+    
+    return sentence_starts, sentence_ends, sentences, chunks
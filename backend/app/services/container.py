@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from app.config import get_settings
+from app.models.schemas import SearchQuery
+
+settings = get_settings()
+
+# Sections /api/search boosts; the warm-up must use the same value to hit the search cache
+BOOST_SECTIONS = ["abstract", "results", "conclusion"]
+
+# First query of each persona in test_personas.py
+DEFAULT_WARMUP_QUERIES = [
+    "What are the molecular mechanisms of muscle atrophy in microgravity?",
+    "What are the emerging commercial opportunities in space biology research?",
+    "What are the critical biological constraints for long-duration space missions?"
+]
+
+class ServiceContainer:
+    """
+    The services behind the API, one of each per process.
+    
+    Each is built on first use instead of at import, so importing the app stays
+    cheap and gunicorn can preload it before forking: nothing here holds a socket
+    until a worker asks for it. The lifespan handler in main.py calls warm_up()
+    once per worker and close() on shutdown.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vector_store = None
+        self._llm_service = None
+        self._ingest_jobs = None
+        self._summary_prefetch = None
+        self.ready = False
+        self.warmup_error: Optional[str] = None
+        self.warmup_timings: Dict[str, float] = {}
+    
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            with self._lock:
+                if self._vector_store is None:
+                    from app.services.vector_store import VectorStore
+                    self._vector_store = VectorStore()
+        return self._vector_store
+    
+    @property
+    def llm_service(self):
+        if self._llm_service is None:
+            with self._lock:
+                if self._llm_service is None:
+                    from app.services.llm_service import LLMService
+                    self._llm_service = LLMService()
+        return self._llm_service
+    
+    @property
+    def ingest_jobs(self):
+        if self._ingest_jobs is None:
+            with self._lock:
+                if self._ingest_jobs is None:
+                    from app.services.ingest_jobs import IngestJobManager
+                    self._ingest_jobs = IngestJobManager(settings.pdf_directory, workers=settings.ingest_workers)
+        return self._ingest_jobs
+    
+    @property
+    def summary_prefetch(self):
+        if self._summary_prefetch is None:
+            with self._lock:
+                if self._summary_prefetch is None:
+                    from app.services.prefetch import SummaryPrefetcher
+                    self._summary_prefetch = SummaryPrefetcher(settings.prefetch_max_inflight, settings.prefetch_ttl)
+        return self._summary_prefetch
+    
+    def warm_up(self, queries: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Resolve the index, open the vector and OpenAI connection pools, and fill the
+        corpus metadata memo and the search cache, so the first real requests do not
+        pay for them. Returns milliseconds per step.
+        """
+        queries = queries if queries is not None else (settings.warmup_queries or DEFAULT_WARMUP_QUERIES)
+        timings = {}
+        
+        start = time.perf_counter()
+        store = self.vector_store
+        store._ensure_index()
+        timings["index"] = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        store.vector_count()
+        store.get_all_papers_metadata(limit=10000)
+        timings["corpus_metadata"] = (time.perf_counter() - start) * 1000
+        
+        # Same arguments as a default /api/search, so these land in the search cache
+        start = time.perf_counter()
+        for query in queries:
+            store.search_with_reranking(query, top_k=SearchQuery.model_fields["top_k"].default, boost_sections=BOOST_SECTIONS)
+        timings["queries"] = (time.perf_counter() - start) * 1000
+        
+        # Shares the OpenAI client, whose pool the query embeddings have just opened
+        self.llm_service
+        self.warmup_timings = {step: round(ms, 1) for step, ms in timings.items()}
+        self.warmup_error = None
+        self.ready = True
+        return self.warmup_timings
+    
+    def close(self):
+        self.ready = False
+        if self._ingest_jobs is not None:
+            # Running jobs keep their checkpoints and can be resumed after restart
+            self._ingest_jobs.executor.shutdown(wait=False, cancel_futures=True)
+        if self._summary_prefetch is not None:
+            self._summary_prefetch.close()
+        from app.services.openai_client import get_openai_client
+        if get_openai_client.cache_info().currsize:
+            get_openai_client().close()
+            get_openai_client.cache_clear()
+
+services = ServiceContainer()
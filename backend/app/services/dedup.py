@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+# Multiplier for rolling word hashes into shingle hashes
+SHINGLE_BASE = np.uint64(1000003)
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures over word shingles, bucketed with LSH banding.
+    
+    Signatures are persisted under data/processed/minhash so each new paper is
+    only compared against the candidates sharing a band with it, never the whole corpus.
+    check() is safe to call from several ingest threads. Every change is appended to
+    signatures.log as it happens, so a crash mid-run cannot let a later duplicate of an
+    indexed paper through; save() writes the full snapshot once per batch and empties the log.
+    """
+    def __init__(
+        self,
+        path: str = "data/processed/minhash",
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        
+        rng = np.random.default_rng(1)
+        # a < 2^31 keeps a * hash + b within uint64 for 32-bit hashes
+        self.perm_a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.perm_b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.duplicates: Dict[str, Dict[str, object]] = {}
+        self.buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+        self.log_path = self.path / "signatures.log"
+        self._lock = threading.Lock()
+        self._load()
+    
+    def signature(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall(text.lower())
+        signature = np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        if len(words) < self.shingle_size:
+            return signature
+        
+        word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+        shingles = np.zeros(len(words) - self.shingle_size + 1, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            shingles = shingles * SHINGLE_BASE + word_hashes[offset:offset + len(shingles)]
+        shingles = np.unique(shingles & np.uint64(0xFFFFFFFF))
+        
+        # Blocked so a long paper never materialises a full shingles x permutations matrix
+        for start in range(0, len(shingles), 4096):
+            block = shingles[start:start + 4096, None]
+            hashed = (block * self.perm_a + self.perm_b) % MERSENNE_PRIME
+            signature = np.minimum(signature, hashed.min(axis=0))
+        return signature
+    
+    def check(self, paper_id: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Return (canonical_paper_id, estimated_similarity) if paper_id duplicates an indexed
+        paper; otherwise index it as a new canonical paper and return None.
+        """
+        signature = self.signature(text)
+        if np.all(signature == MERSENNE_PRIME):
+            # Too little text to shingle; never call it a duplicate
+            return None
+        
+        # Matching and indexing are one step, so two copies ingested at once cannot both
+        # miss each other and both become canonical
+        with self._lock:
+            best = None
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self.buckets.get(band_key, []))
+            candidates.discard(paper_id)
+            
+            for candidate in candidates:
+                if candidate in self.duplicates:
+                    continue
+                similarity = float(np.mean(self.signatures[candidate] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+            
+            if best:
+                self._record({"duplicate": paper_id, "canonical": best[0], "similarity": round(best[1], 3)})
+                return best
+            
+            self._record({"add": paper_id, "signature": signature.tolist()})
+            return None
+    
+    def remove(self, paper_id: str):
+        """Forget a paper so later papers are no longer matched against it."""
+        with self._lock:
+            self._record({"remove": paper_id})
+    
+    def clusters(self) -> Dict[str, List[Dict[str, object]]]:
+        with self._lock:
+            groups = defaultdict(list)
+            for paper_id, link in sorted(self.duplicates.items()):
+                groups[link["canonical"]].append({"paper_id": paper_id, "similarity": link["similarity"]})
+            return dict(groups)
+    
+    def save(self):
+        """Write the full snapshot atomically, then drop the log it now contains."""
+        with self._lock:
+            ids = sorted(self.signatures)
+            matrix = np.stack([self.signatures[i] for i in ids]) if ids else np.zeros((0, self.num_perm), dtype=np.uint64)
+            tmp_path = self.path / "signatures.npz.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, ids=np.array(ids, dtype=str), signatures=matrix)
+            os.replace(tmp_path, self.path / "signatures.npz")
+            
+            tmp_path = self.path / "duplicates.json.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.duplicates, f, indent=2)
+            os.replace(tmp_path, self.path / "duplicates.json")
+            # Replaying the log over the new snapshot is harmless, so a crash before this is too
+            self.log_path.unlink(missing_ok=True)
+    
+    def _record(self, change: Dict[str, object]):
+        """Apply a change and append it to the log: one short line instead of a full snapshot per paper."""
+        self._apply(change)
+        with open(self.log_path, 'a') as f:
+            f.write(json.dumps(change) + "\n")
+    
+    def _apply(self, change: Dict[str, object]):
+        if "add" in change:
+            self.duplicates.pop(change["add"], None)
+            self._add(change["add"], np.array(change["signature"], dtype=np.uint64))
+        elif "duplicate" in change:
+            self.duplicates[change["duplicate"]] = {"canonical": change["canonical"], "similarity": change["similarity"]}
+        elif "remove" in change:
+            self.duplicates.pop(change["remove"], None)
+            signature = self.signatures.pop(change["remove"], None)
+            if signature is not None:
+                for band_key in self._band_keys(signature):
+                    self.buckets[band_key].remove(change["remove"])
+    
+    def _add(self, paper_id: str, signature: np.ndarray):
+        previous = self.signatures.get(paper_id)
+        if previous is not None:
+            for band_key in self._band_keys(previous):
+                self.buckets[band_key].remove(paper_id)
+        self.signatures[paper_id] = signature
+        for band_key in self._band_keys(signature):
+            self.buckets[band_key].append(paper_id)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+    
+    def _load(self):
+        signatures_file = self.path / "signatures.npz"
+        if signatures_file.exists():
+            data = np.load(signatures_file)
+            if data["signatures"].shape[1:] == (self.num_perm,):
+                for paper_id, signature in zip(data["ids"], data["signatures"]):
+                    self._add(str(paper_id), signature)
+        
+        duplicates_file = self.path / "duplicates.json"
+        if duplicates_file.exists():
+            with open(duplicates_file, 'r') as f:
+                self.duplicates = json.load(f)
+        
+        # Changes since the last save(); a line torn by a crash is skipped
+        if self.log_path.exists():
+            with open(self.log_path, 'r') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if "add" in change and len(change["signature"]) != self.num_perm:
+                        continue
+                    self._apply(change)
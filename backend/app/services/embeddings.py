@@ -1,36 +1,147 @@
-from openai import OpenAI
-from typing import List
+from array import array
+from typing import Dict, List, Optional
+import numpy as np
+from app.services.artifact_cache import EmbeddingCache
+from app.services.metrics import record_cache, record_tokens, timed
+from app.services.openai_client import get_openai_client
+from app.services.resilience import UpstreamUnavailable, call_upstream
+from app.services.shared_cache import get_shared_cache
 from app.config import get_settings
 
 settings = get_settings()
 
+# Full output size of models that accept a `dimensions` parameter
+NATIVE_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072
+}
+
+def reproject_embeddings(vectors: List[List[float]], dimensions: int) -> List[List[float]]:
+    """
+    Shorten text-embedding-3 vectors locally: keep the first `dimensions` values and
+    renormalize to unit length, which is how the API itself shortens embeddings.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)[:, :dimensions]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).tolist()
+
 class EmbeddingService:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    def __init__(self, cache: Optional[EmbeddingCache] = None, dimensions: Optional[int] = None):
+        self.client = get_openai_client()
+        self.cache = cache
+        # Query embeddings, shared between server workers
+        self.shared_cache = get_shared_cache()
+        self.dimensions = dimensions or settings.embedding_dimensions
+        self.native_dimensions = NATIVE_DIMENSIONS.get(settings.embedding_model)
+        
+        if self.native_dimensions and self.dimensions > self.native_dimensions:
+            raise ValueError(f"{settings.embedding_model} returns at most {self.native_dimensions} dimensions")
     
     def generate_embedding(self, text: str) -> List[float]:
         text = text.replace("\n", " ").strip()
         
         if not text:
-            return [0.0] * settings.embedding_dimensions
+            return [0.0] * self.dimensions
+        
+        key = None
+        if self.shared_cache and settings.cache_ttl_query_embedding:
+            key = EmbeddingCache.key(text, settings.embedding_model, self.dimensions)
+            cached = self.shared_cache.get("query_embedding", key)
+            if cached is not None:
+                return array('f', cached).tolist()
         
-        response = self.client.embeddings.create(
-            input=text,
-            model=settings.embedding_model
-        )
-        return response.data[0].embedding
+        try:
+            with timed("embed_query"):
+                response = call_upstream(
+                    "openai_embeddings",
+                    lambda timeout: self.client.embeddings.create(input=text, timeout=timeout, **self._request_params()),
+                    settings.embedding_timeout,
+                    hedge=True
+                )
+        except UpstreamUnavailable:
+            # An embedding never goes out of date for the same model, so an expired one is as good
+            if key:
+                cached = self.shared_cache.get("query_embedding", key, stale=True)
+                if cached is not None:
+                    return array('f', cached).tolist()
+            raise
+        record_tokens("embedding", getattr(response, "usage", None))
+        embedding = response.data[0].embedding
+        if key:
+            self.shared_cache.set("query_embedding", key, array('f', embedding).tobytes(), settings.cache_ttl_query_embedding)
+        return embedding
     
     def generate_embeddings_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        if self.cache is None:
+            return self._embed_texts(texts, batch_size)
+        
+        # Only texts that were never embedded with this model go to the API
+        texts_clean = [text.replace("\n", " ").strip() for text in texts]
+        keys = [EmbeddingCache.key(text, settings.embedding_model, self.dimensions) for text in texts_clean]
+        cached = self.cache.get_many(list(set(keys)))
+        
+        missing = {}
+        for key, text in zip(keys, texts_clean):
+            if key not in cached:
+                missing[key] = text
+        
+        reprojected = self._reproject_from_cache(missing)
+        cached.update(reprojected)
+        for key in reprojected:
+            del missing[key]
+        
+        if missing:
+            new_embeddings = self._embed_texts(list(missing.values()), batch_size)
+            fresh = dict(zip(missing.keys(), new_embeddings))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+        
+        record_cache("embedding", len(texts) - len(missing), len(missing))
+        print(f"Embeddings: {len(texts) - len(missing) - len(reprojected)} cached, {len(reprojected)} reprojected, {len(missing)} generated")
+        return [cached[key] for key in keys]
+    
+    def _reproject_from_cache(self, missing: Dict[str, str]) -> Dict[str, List[float]]:
+        """Derive shortened embeddings from cached full-size ones instead of calling the API."""
+        if not missing or not self.native_dimensions or self.dimensions >= self.native_dimensions:
+            return {}
+        
+        full_keys = {
+            key: EmbeddingCache.key(text, settings.embedding_model, self.native_dimensions)
+            for key, text in missing.items()
+        }
+        full = self.cache.get_many(list(set(full_keys.values())))
+        keys = [key for key, full_key in full_keys.items() if full_key in full]
+        if not keys:
+            return {}
+        
+        vectors = reproject_embeddings([full[full_keys[key]] for key in keys], self.dimensions)
+        reprojected = dict(zip(keys, vectors))
+        self.cache.put_many(reprojected)
+        return reprojected
+    
+    def _request_params(self) -> Dict[str, object]:
+        params = {"model": settings.embedding_model}
+        # Older models such as ada-002 reject the dimensions parameter
+        if self.native_dimensions:
+            params["dimensions"] = self.dimensions
+        return params
+    
+    def _embed_texts(self, texts: List[str], batch_size: int) -> List[List[float]]:
         embeddings = []
         
         for i in range(0, len(texts), batch_size):
             batch = texts[i:i + batch_size]
             batch_clean = [text.replace("\n", " ").strip() for text in batch]
             
-            response = self.client.embeddings.create(
-                input=batch_clean,
-                model=settings.embedding_model
-            )
+            with timed("embed_batch"):
+                # Not "openai_embeddings": batch failures must not open the breaker query embeddings use
+                response = call_upstream(
+                    "openai_embeddings_batch",
+                    lambda timeout: self.client.embeddings.create(input=batch_clean, timeout=timeout, **self._request_params()),
+                    settings.embedding_batch_timeout
+                )
+            record_tokens("embedding", getattr(response, "usage", None))
             
             batch_embeddings = [item.embedding for item in response.data]
             embeddings.extend(batch_embeddings)
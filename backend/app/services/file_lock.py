@@ -0,0 +1,51 @@
+import fcntl
+import os
+from pathlib import Path
+from typing import Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+class FileLock:
+    """
+    Exclusive advisory lock (flock) on a file, held across every process on the host.
+    
+    The lock belongs to the open file rather than the thread, so one thread can take it
+    and another release it, and two FileLocks on the same path exclude each other even
+    inside one process. The kernel drops it when the holder exits, so a crashed
+    process never leaves it held.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd: Optional[int] = None
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+    
+    def release(self):
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            # Closing the descriptor releases the lock
+            os.close(fd)
+    
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.release()
+
+def ingest_lock() -> FileLock:
+    """
+    The lock held by whatever is ingesting (an /api/ingest job, watch_pdfs.py, ingest_pdfs.py,
+    reconcile_index.py) while it writes the manifest, duplicate index and chunk store.
+    """
+    return FileLock(settings.ingest_lock_path)
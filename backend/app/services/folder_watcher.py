@@ -0,0 +1,143 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.services.artifact_cache import ArtifactCache
+from app.services.file_lock import ingest_lock
+from app.services.ingestion import IngestionPipeline
+
+# (size, mtime_ns): cheap change detection without reading the file
+FileStamp = Tuple[int, int]
+
+class FolderWatcher:
+    """
+    Polls a PDF folder and ingests only new or modified files.
+    
+    A file is ingested once its size and mtime have stayed the same for `debounce`
+    seconds, so half-copied PDFs are not picked up. Stamps of handled files persist in
+    watch_state.json; after a restart only files whose stamp changed are hashed, and a
+    file whose content hash matches the manifest is not re-ingested. A file that fails
+    to ingest is not stamped: it is retried with exponential backoff (retry_backoff
+    seconds, doubling up to max_retry_backoff) until it succeeds or changes.
+    
+    Each pass that has work holds the host-wide ingest lock, as /api/ingest jobs and
+    ingest_pdfs.py write the same manifest and stores; while one of them holds it the
+    pass is skipped and its files are picked up by a later one.
+    """
+    def __init__(
+        self,
+        pipeline: IngestionPipeline,
+        pdf_directory: str = "data/pdfs",
+        state_path: str = "data/processed/watch_state.json",
+        debounce: float = 5.0,
+        retry_backoff: float = 30.0,
+        max_retry_backoff: float = 3600.0
+    ):
+        self.pipeline = pipeline
+        self.pdf_directory = Path(pdf_directory)
+        self.state_path = Path(state_path)
+        self.debounce = debounce
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.cache: ArtifactCache = pipeline.processor.cache
+        
+        self.handled: Dict[str, FileStamp] = {}
+        if self.state_path.exists():
+            with open(self.state_path, 'r') as f:
+                self.handled = {name: tuple(stamp) for name, stamp in json.load(f).items()}
+        # Files seen changing: name -> (stamp, monotonic time the stamp was first seen)
+        self.pending: Dict[str, Tuple[FileStamp, float]] = {}
+        # Files that failed to ingest: name -> (stamp, attempts, monotonic time of the next retry)
+        self.failures: Dict[str, Tuple[FileStamp, int, float]] = {}
+    
+    def scan(self) -> Dict[str, FileStamp]:
+        stamps = {}
+        with os.scandir(self.pdf_directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                    stat = entry.stat()
+                    stamps[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return stamps
+    
+    def poll(self, now: Optional[float] = None, wait: bool = False) -> Dict[str, List[str]]:
+        """
+        One pass: returns the files ingested, skipped as unchanged, removed and failed.
+        wait=True blocks on the ingest lock instead of skipping the pass while it is held.
+        """
+        now = time.monotonic() if now is None else now
+        stamps = self.scan()
+        outcome = {"ingested": [], "unchanged": [], "removed": [], "failed": []}
+        
+        ready = []
+        for name, stamp in stamps.items():
+            if self.handled.get(name) == stamp:
+                self.pending.pop(name, None)
+                continue
+            failure = self.failures.get(name)
+            if failure and failure[0] == stamp:
+                # Already debounced; wait out the backoff
+                if now >= failure[2]:
+                    ready.append(name)
+                continue
+            self.failures.pop(name, None)
+            seen = self.pending.get(name)
+            if seen is None or seen[0] != stamp:
+                self.pending[name] = (stamp, now)
+            elif now - seen[1] >= self.debounce:
+                ready.append(name)
+        
+        for name in set(self.failures) - set(stamps):
+            del self.failures[name]
+        removed = sorted(set(self.handled) - set(stamps))
+        if not ready and not removed:
+            return outcome
+        
+        lock = ingest_lock()
+        if not lock.acquire(blocking=wait):
+            print(f"Another ingest is running; {len(ready)} new or changed and {len(removed)} removed PDFs wait for the next scan")
+            return outcome
+        try:
+            self._handle(ready, removed, stamps, now, outcome)
+        finally:
+            lock.release()
+        return outcome
+    
+    def _handle(self, ready: List[str], removed: List[str], stamps: Dict[str, FileStamp], now: float, outcome: Dict[str, List[str]]):
+        for name in sorted(ready):
+            stamp = stamps[name]
+            self.pending.pop(name, None)
+            path = self.pdf_directory / name
+            entry = self.cache.load_manifest().get(Path(name).stem)
+            if entry and entry.get("source_sha256") == self.cache.file_hash(str(path)):
+                # Touched or copied back, but the content is already indexed
+                outcome["unchanged"].append(name)
+            else:
+                try:
+                    chunks = self.pipeline.ingest_file(str(path))
+                    print(f"✓ Ingested {name}: {'near-duplicate, skipped' if chunks is None else f'{chunks} chunks'}")
+                    outcome["ingested"].append(name)
+                except Exception as e:
+                    attempts = self.failures[name][1] + 1 if name in self.failures else 1
+                    delay = min(self.retry_backoff * 2 ** (attempts - 1), self.max_retry_backoff)
+                    self.failures[name] = (stamp, attempts, now + delay)
+                    print(f"✗ Failed to ingest {name} (attempt {attempts}, retrying in {delay:.0f}s): {str(e)}")
+                    outcome["failed"].append(name)
+                    continue
+            self.failures.pop(name, None)
+            self.handled[name] = stamp
+        
+        for name in removed:
+            del self.handled[name]
+            deleted = self.pipeline.remove_paper(Path(name).stem)
+            print(f"✓ Removed {name}: {deleted} vectors deleted")
+            outcome["removed"].append(name)
+        
+        self.pipeline.finish()
+        self._save_state()
+    
+    def _save_state(self):
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.handled, f)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+class IndexAliasRegistry:
+    """
+    Maps a logical index name (the alias) to physical generations, each an index + namespace.
+    
+    data/index_aliases.json holds, per alias, the active and previous generation and every
+    generation's target. Promoting rewrites the file atomically, and VectorStore re-resolves
+    when the file changes, so search flips from one fully built generation to the next and
+    rollback is a single swap back to the previous one.
+    """
+    def __init__(self, path: str = "data/index_aliases.json"):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+    
+    def resolve(self, alias: str) -> Optional[Dict[str, Any]]:
+        """The active generation's target, or None if the name is not an alias."""
+        entry = self._read().get(alias)
+        if not entry or not entry.get("active"):
+            return None
+        return {"generation": entry["active"], **entry["generations"][entry["active"]]}
+    
+    def changed(self) -> bool:
+        mtime = self.path.stat().st_mtime_ns if self.path.exists() else None
+        return mtime != self._loaded_mtime
+    
+    def generations(self, alias: str) -> Dict[str, Any]:
+        return self._read().get(alias, {})
+    
+    def adopt(self, alias: str, target: Dict[str, Any]) -> str:
+        """Register an existing, unaliased index as the active generation g0."""
+        with self._lock:
+            aliases = self._read()
+            entry = aliases.setdefault(alias, {"active": None, "previous": None, "generations": {}})
+            entry["generations"]["g0"] = {**target, "status": "active", "created_at": time.time()}
+            entry["active"] = "g0"
+            self._write(aliases)
+        return "g0"
+    
+    def stage(self, alias: str, target: Dict[str, Any]) -> str:
+        """Record a new generation that is being built; it serves no traffic until promoted."""
+        with self._lock:
+            aliases = self._read()
+            entry = aliases.setdefault(alias, {"active": None, "previous": None, "generations": {}})
+            numbers = [int(name[1:]) for name in entry["generations"]]
+            generation = f"g{max(numbers, default=0) + 1}"
+            entry["generations"][generation] = {**target, "status": "building", "created_at": time.time()}
+            self._write(aliases)
+        return generation
+    
+    def update(self, alias: str, generation: str, **fields: Any):
+        with self._lock:
+            aliases = self._read()
+            aliases[alias]["generations"][generation].update(fields)
+            self._write(aliases)
+    
+    def promote(self, alias: str, generation: str):
+        with self._lock:
+            aliases = self._read()
+            entry = aliases[alias]
+            if generation not in entry["generations"]:
+                raise KeyError(f"Unknown generation {generation} for {alias}")
+            if entry["active"] == generation:
+                return
+            if entry["active"]:
+                entry["generations"][entry["active"]]["status"] = "standby"
+            entry["previous"] = entry["active"]
+            entry["active"] = generation
+            entry["generations"][generation].update({"status": "active", "promoted_at": time.time()})
+            self._write(aliases)
+    
+    def rollback(self, alias: str) -> str:
+        """Swap the active and previous generations; returns the now-active generation."""
+        with self._lock:
+            aliases = self._read()
+            entry = aliases[alias]
+            if not entry.get("previous"):
+                raise ValueError(f"{alias} has no previous generation to roll back to")
+            entry["active"], entry["previous"] = entry["previous"], entry["active"]
+            entry["generations"][entry["active"]]["status"] = "active"
+            entry["generations"][entry["previous"]]["status"] = "standby"
+            self._write(aliases)
+            return entry["active"]
+    
+    def remove(self, alias: str, generation: str):
+        with self._lock:
+            aliases = self._read()
+            entry = aliases[alias]
+            if generation in (entry["active"], entry["previous"]):
+                raise ValueError(f"{generation} is {alias}'s active or rollback generation")
+            entry["generations"].pop(generation, None)
+            self._write(aliases)
+    
+    def _read(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            self._loaded_mtime = None
+            return {}
+        mtime = self.path.stat().st_mtime_ns
+        with open(self.path, 'r') as f:
+            aliases = json.load(f)
+        self._loaded_mtime = mtime
+        return aliases
+    
+    def _write(self, aliases: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(aliases, f, indent=2)
+        # os.replace is atomic, so readers see either the old or the new mapping
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,254 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.models.schemas import ProcessingStatus
+from app.services.file_lock import FileLock, ingest_lock
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{12}')
+
+class IngestBusy(Exception):
+    """Another job, in this or another process, or an ingest script holds the ingest lock."""
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class IngestJob:
+    def __init__(self, job_id: str, files: List[str]):
+        self.job_id = job_id
+        self.files = files
+        self.cancel_event = threading.Event()
+        self.lock: Optional[FileLock] = None
+        self.status = ProcessingStatus(
+            job_id=job_id,
+            total_papers=len(files),
+            processed_papers=0,
+            failed_papers=[],
+            status="queued"
+        )
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs on a background thread pool inside the server process.
+    
+    Each job appends a checkpoint line per finished PDF to jobs/{job_id}.jsonl, so a
+    cancelled or interrupted job resumes where it stopped, and writes its live
+    ProcessingStatus to jobs/{job_id}.json so every server worker can report it.
+    Cancelling a job another worker owns leaves a jobs/{job_id}.cancel marker that
+    the owner checks between files. A job holds the host-wide ingest lock from submit
+    until it finishes, since the manifest, duplicate index and chunk store it writes are
+    shared with every other ingesting process; submitting while it is held raises IngestBusy.
+    The PDF pipeline is imported when the first job runs, keeping PyMuPDF out of
+    workers that never ingest.
+    """
+    def __init__(self, pdf_directory: str = "data/pdfs", jobs_directory: str = "data/processed/jobs", workers: int = 1):
+        self.pdf_directory = Path(pdf_directory)
+        self.jobs_directory = Path(jobs_directory)
+        self.jobs_directory.mkdir(parents=True, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self.jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+        # One pipeline per process: PDFProcessor's duplicate index and caches are not shared between jobs
+        self._pipeline = None
+        self._pipeline_lock = threading.Lock()
+    
+    def submit(self, files: Optional[List[str]] = None) -> ProcessingStatus:
+        available = sorted(p.name for p in self.pdf_directory.glob("*.pdf"))
+        if files:
+            unknown = sorted(set(files) - set(available))
+            if unknown:
+                raise ValueError(f"Not found in {self.pdf_directory}: {', '.join(unknown)}")
+            selected = sorted(set(files))
+        else:
+            selected = available
+        
+        job = IngestJob(uuid.uuid4().hex[:12], selected)
+        self._journal(job.job_id, {"event": "created", "files": selected})
+        return self._start(job)
+    
+    def resume(self, job_id: str) -> ProcessingStatus:
+        with self._lock:
+            running = self.jobs.get(job_id)
+            if running and running.status.status not in FINISHED_STATES:
+                return running.status
+        
+        status = self.status(job_id)
+        events = self._read_journal(job_id)
+        if not events:
+            raise KeyError(job_id)
+        if status.status == "running":
+            raise ValueError(f"Job {job_id} is still running in another server worker")
+        
+        job = IngestJob(job_id, events[0]["files"])
+        return self._start(job)
+    
+    def cancel(self, job_id: str) -> ProcessingStatus:
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            # Owned by another worker process (or already over): leave a marker its runner checks between files
+            status = self.status(job_id)
+            if status.status not in FINISHED_STATES and status.status != "interrupted":
+                self._cancel_marker(job_id).touch()
+                status.status = "cancelling"
+            return status
+        if job.status.status not in FINISHED_STATES:
+            job.cancel_event.set()
+            job.status.status = "cancelling"
+            self._save_status(job)
+        return job.status
+    
+    def status(self, job_id: str) -> ProcessingStatus:
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            raise KeyError(job_id)
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            return job.status
+        
+        path = self.jobs_directory / f"{job_id}.json"
+        if not path.exists():
+            raise KeyError(job_id)
+        with open(path, 'r') as f:
+            saved = json.load(f)
+        pid = saved.pop("pid", None)
+        status = ProcessingStatus(**saved)
+        if status.status not in FINISHED_STATES and pid is not None and not _pid_alive(pid):
+            # The process running it died; POST /api/ingest/{job_id}/resume picks it up
+            status.status = "interrupted"
+        elif status.status not in FINISHED_STATES and self._cancel_marker(job_id).exists():
+            status.status = "cancelling"
+        return status
+    
+    def list_jobs(self) -> List[ProcessingStatus]:
+        job_ids = [p.stem for p in sorted(self.jobs_directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)]
+        return [self.status(job_id) for job_id in job_ids]
+    
+    def _start(self, job: IngestJob) -> ProcessingStatus:
+        lock = ingest_lock()
+        if not lock.acquire(blocking=False):
+            raise IngestBusy("Another ingest (a job, watch_pdfs.py or ingest_pdfs.py) is running")
+        job.lock = lock
+        # A resumed job starts fresh; a cancel left for an earlier run no longer applies
+        self._cancel_marker(job.job_id).unlink(missing_ok=True)
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self._save_status(job)
+        try:
+            self.executor.submit(self._run, job)
+        except RuntimeError:
+            # Executor shut down; the job never runs, so it must not keep the lock
+            lock.release()
+            raise
+        return job.status
+    
+    def _get_pipeline(self):
+        with self._pipeline_lock:
+            if self._pipeline is None:
+                from app.services.ingestion import IngestionPipeline
+                self._pipeline = IngestionPipeline()
+            return self._pipeline
+    
+    def _run(self, job: IngestJob):
+        try:
+            self._run_locked(job)
+        finally:
+            job.lock.release()
+    
+    def _run_locked(self, job: IngestJob):
+        status = job.status
+        done = {}
+        for event in self._read_journal(job.job_id):
+            if event["event"] in ("done", "skipped"):
+                done[event["file"]] = event
+            elif event["event"] == "failed":
+                done.pop(event["file"], None)
+        
+        status.processed_papers = len(done)
+        status.skipped_papers = sum(1 for e in done.values() if e["event"] == "skipped")
+        status.chunks_upserted = sum(e.get("chunks", 0) for e in done.values())
+        status.failed_papers = []
+        status.status = "running"
+        status.started_at = status.started_at or datetime.now()
+        status.finished_at = None
+        self._save_status(job)
+        
+        try:
+            pipeline = self._get_pipeline()
+            remaining = [f for f in job.files if f not in done]
+            start = time.time()
+            for i, filename in enumerate(remaining):
+                if self._cancel_marker(job.job_id).exists():
+                    job.cancel_event.set()
+                    status.status = "cancelling"
+                if job.cancel_event.is_set():
+                    break
+                try:
+                    chunks = pipeline.ingest_file(str(self.pdf_directory / filename))
+                    if chunks is None:
+                        status.skipped_papers += 1
+                        self._journal(job.job_id, {"event": "skipped", "file": filename})
+                    else:
+                        status.chunks_upserted += chunks
+                        self._journal(job.job_id, {"event": "done", "file": filename, "chunks": chunks})
+                    status.processed_papers += 1
+                except Exception as e:
+                    print(f"✗ Ingest job {job.job_id} failed on {filename}: {str(e)}")
+                    status.failed_papers.append(filename)
+                    self._journal(job.job_id, {"event": "failed", "file": filename, "error": str(e)})
+                
+                # Rate over this run only, so a resumed job does not count checkpointed papers
+                elapsed = time.time() - start
+                attempted = i + 1
+                status.papers_per_minute = round(attempted / elapsed * 60, 2) if elapsed > 0 else None
+                left = len(remaining) - attempted
+                status.eta_seconds = round(left * elapsed / attempted, 1) if left else 0.0
+                self._save_status(job)
+            
+            pipeline.finish()
+            status.status = "cancelled" if job.cancel_event.is_set() else "completed"
+        except Exception as e:
+            print(f"✗ Ingest job {job.job_id} failed: {str(e)}")
+            status.status = "failed"
+            status.error = str(e)
+        
+        status.finished_at = datetime.now()
+        status.eta_seconds = None
+        self._journal(job.job_id, {"event": "finished", "status": status.status})
+        self._save_status(job)
+        self._cancel_marker(job.job_id).unlink(missing_ok=True)
+    
+    def _cancel_marker(self, job_id: str) -> Path:
+        # Sidecar rather than a field in {job_id}.json, which the owning worker rewrites after every file
+        return self.jobs_directory / f"{job_id}.cancel"
+    
+    def _journal(self, job_id: str, event: Dict[str, Any]):
+        with open(self.jobs_directory / f"{job_id}.jsonl", 'a') as f:
+            f.write(json.dumps({"time": time.time(), **event}) + "\n")
+    
+    def _read_journal(self, job_id: str) -> List[Dict[str, Any]]:
+        path = self.jobs_directory / f"{job_id}.jsonl"
+        if not path.exists():
+            return []
+        with open(path, 'r') as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
+    
+    def _save_status(self, job: IngestJob):
+        path = self.jobs_directory / f"{job.job_id}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"pid": os.getpid(), **json.loads(job.status.model_dump_json())}, f)
+        os.replace(tmp_path, path)
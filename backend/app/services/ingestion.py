@@ -0,0 +1,59 @@
+from pathlib import Path
+from typing import Optional
+from app.services.artifact_cache import EmbeddingCache
+from app.services.pdf_processor import PDFProcessor
+from app.services.shared_cache import get_shared_cache
+from app.services.vector_store import VectorStore
+
+class IngestionPipeline:
+    """
+    Process one PDF at a time through PDFProcessor and upsert it straight away, so
+    long-running callers (ingest jobs, the folder watcher) make each paper searchable
+    as soon as it is done instead of after the whole batch.
+    """
+    def __init__(self, vector_store: Optional[VectorStore] = None):
+        self.processor = PDFProcessor()
+        self.vector_store = vector_store or VectorStore(
+            embedding_cache=EmbeddingCache("data/processed/embeddings.sqlite")
+        )
+    
+    def ingest_file(self, pdf_path: str) -> Optional[int]:
+        """Returns the number of chunks upserted, or None if the PDF was skipped as a near-duplicate."""
+        paper_id = Path(pdf_path).stem
+        previous_count = self.processor.cache.load_manifest().get(paper_id, {}).get("chunk_count") or 0
+        
+        processed = self.processor.process_pdf(pdf_path)
+        if processed is None:
+            if previous_count:
+                # The paper became a duplicate of another one; stop serving its old vectors
+                self.vector_store.delete_vectors([f"{paper_id}_chunk_{i}" for i in range(previous_count)])
+            return None
+        
+        _, chunks = processed
+        self.vector_store.upsert_chunks(chunks)
+        
+        # A re-chunked paper can come out shorter; drop the chunks it no longer has
+        if previous_count > len(chunks):
+            self.vector_store.delete_vectors([f"{paper_id}_chunk_{i}" for i in range(len(chunks), previous_count)])
+        return len(chunks)
+    
+    def remove_paper(self, paper_id: str) -> int:
+        """Delete a paper's vectors and manifest entry, e.g. after its PDF was deleted."""
+        chunk_count = self.processor.cache.load_manifest().get(paper_id, {}).get("chunk_count") or 0
+        if chunk_count:
+            self.vector_store.delete_vectors([f"{paper_id}_chunk_{i}" for i in range(chunk_count)])
+        self.processor.cache.forget([paper_id])
+        if self.processor.dedup is not None:
+            self.processor.dedup.remove(paper_id)
+        return chunk_count
+    
+    def finish(self):
+        """Persist state shared across papers once a batch is done."""
+        self.processor.write_duplicate_report()
+        if self.vector_store.chunk_store:
+            self.vector_store.chunk_store.flush()
+        # Cached searches predate this batch; without this, new papers only show up once
+        # CACHE_TTL_SEARCH runs out
+        shared_cache = get_shared_cache()
+        if shared_cache:
+            shared_cache.clear("search")
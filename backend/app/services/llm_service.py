@@ -1,31 +1,19 @@
-from openai import OpenAI
 from app.config import get_settings
+from app.services.metrics import record_tokens, timed
+from app.services.openai_client import get_openai_client
+from app.services.resilience import UpstreamUnavailable, call_upstream, mark_degraded
+from app.services.shared_cache import SharedCache, get_shared_cache
 import json
+import re
+from typing import Optional
 
 settings = get_settings()
 
-class LLMService:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
-    
-    def extract_structured_data(self, prompt: str) -> str:
-        response = self.client.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": "You are a precise scientific data extraction assistant specializing in space biology research. Return only valid JSON with no markdown formatting or additional text. Focus on accuracy and completeness."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1
-        )
-        return response.choices[0].message.content
-    
-    def generate_summary(self, texts: list[str], context: str = "") -> dict:
-        """Generate persona-specific summaries with high technical quality."""
-        combined_text = "\n\n---\n\n".join(texts[:8])  # Use top 8 for quality
-        
-        # Enhanced persona-specific prompts
-        persona_prompts = {
-            "scientist": """You are summarizing space biology research for a scientific researcher.
+SUMMARY_SYSTEM_PROMPT = "You are an expert space biology analyst. Return only valid JSON with no markdown formatting."
+
+# Enhanced persona-specific prompts
+PERSONA_PROMPTS = {
+    "scientist": """You are summarizing space biology research for a scientific researcher.
 
 CRITICAL REQUIREMENTS:
 - Use precise technical terminology and scientific language
@@ -50,8 +38,8 @@ Provide a structured summary that a scientist would find valuable for their rese
         "Gap or opportunity for future research"
     ]
 }}""",
-            
-            "investor": """You are analyzing space biology research for an investment manager evaluating commercial opportunities.
+    
+    "investor": """You are analyzing space biology research for an investment manager evaluating commercial opportunities.
 
 CRITICAL REQUIREMENTS:
 - Focus on commercial potential and market applications
@@ -76,8 +64,8 @@ Provide an investment-focused analysis. Return ONLY valid JSON:
         "Competitive advantage or IP protection opportunity"
     ]
 }}""",
-            
-            "architect": """You are analyzing space biology research for a mission architect planning human spaceflight missions.
+    
+    "architect": """You are analyzing space biology research for a mission architect planning human spaceflight missions.
 
 CRITICAL REQUIREMENTS:
 - Focus on mission-critical constraints and requirements
@@ -102,31 +90,96 @@ Provide a mission architecture analysis. Return ONLY valid JSON:
         "Critical gap that could jeopardize mission safety"
     ]
 }}"""
-        }
+}
+
+class LLMService:
+    def __init__(self):
+        self.client = get_openai_client()
+        self.shared_cache = get_shared_cache()
+    
+    def _complete(self, operation: str, system_prompt: str, prompt: str, temperature: float) -> str:
+        """
+        One chat completion, timed as llm_{operation} with its token usage counted.
+        Identical requests from any server worker are answered from the shared cache,
+        which also supplies an expired answer if OpenAI is unavailable.
+        """
+        key = None
+        if self.shared_cache and settings.cache_ttl_llm:
+            key = SharedCache.key(settings.llm_model, system_prompt, prompt, temperature)
+            cached = self.shared_cache.get_json("llm", key)
+            if cached is not None:
+                return cached
         
-        # Select appropriate prompt based on context
-        if "scientist" in context.lower():
-            prompt_template = persona_prompts["scientist"]
-        elif "investor" in context.lower():
-            prompt_template = persona_prompts["investor"]
-        elif "architect" in context.lower():
-            prompt_template = persona_prompts["architect"]
-        else:
-            prompt_template = persona_prompts["scientist"]
+        try:
+            with timed(f"llm_{operation}"):
+                response = call_upstream(
+                    "openai_chat",
+                    lambda timeout: self.client.chat.completions.create(
+                        model=settings.llm_model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=temperature,
+                        timeout=timeout
+                    ),
+                    settings.llm_timeout
+                )
+        except UpstreamUnavailable:
+            if key:
+                cached = self.shared_cache.get_json("llm", key, stale=True)
+                if cached is not None:
+                    mark_degraded(f"{operation}:stale")
+                    return cached
+            raise
+        record_tokens(operation, getattr(response, "usage", None))
+        content = response.choices[0].message.content
+        if key:
+            self.shared_cache.set_json("llm", key, content, settings.cache_ttl_llm)
+        return content
+    
+    def extract_structured_data(self, prompt: str) -> str:
+        return self._complete(
+            "extract",
+            "You are a precise scientific data extraction assistant specializing in space biology research. Return only valid JSON with no markdown formatting or additional text. Focus on accuracy and completeness.",
+            prompt,
+            temperature=0.1
+        )
+    
+    def generate_summary(self, texts: list[str], context: str = "", persona: Optional[str] = None) -> dict:
+        """
+        Generate persona-specific summaries with high technical quality. The persona
+        picks the prompt; without one it is guessed from the context text.
+        """
+        # Select appropriate prompt based on persona, or failing that the context
+        if persona not in PERSONA_PROMPTS:
+            if "scientist" in context.lower():
+                persona = "scientist"
+            elif "investor" in context.lower():
+                persona = "investor"
+            elif "architect" in context.lower():
+                persona = "architect"
+            else:
+                persona = "scientist"
         
-        prompt = prompt_template.format(text=combined_text)
+        return self.summarize_packed(self.pack_summary_texts(texts), persona)
+    
+    @staticmethod
+    def pack_summary_texts(texts: list[str]) -> str:
+        """The excerpts as they go into a summary prompt; the same for every persona."""
+        return "\n\n---\n\n".join(texts[:8])  # Use top 8 for quality
+    
+    def summarize_packed(self, combined_text: str, persona: str) -> dict:
+        """One persona's summary of excerpts already joined by pack_summary_texts."""
+        prompt = PERSONA_PROMPTS[persona].format(text=combined_text)
         
-        response = self.client.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": "You are an expert space biology analyst. Return only valid JSON with no markdown formatting."},
-                {"role": "user", "content": prompt}
-            ],
+        result = self._complete(
+            "summary",
+            SUMMARY_SYSTEM_PROMPT,
+            prompt,
             temperature=0.3
         )
         
-        result = response.choices[0].message.content
-        
         # Parse JSON response
         try:
             return json.loads(result)
@@ -142,6 +195,17 @@ Provide a mission architecture analysis. Return ONLY valid JSON:
             result_clean = result_clean.strip()
             return json.loads(result_clean)
     
+    def fallback_summary(self, texts: list[str]) -> dict:
+        """Extractive stand-in for generate_summary while the LLM is unavailable: the lead sentence of each excerpt."""
+        key_points = []
+        for text in texts[:5]:
+            sentence = re.split(r'(?<=[.!?])\s+', text.strip(), maxsplit=1)[0]
+            key_points.append(sentence[:300])
+        return {
+            "summary": "The AI summary is temporarily unavailable. These are the leading statements of the top results.",
+            "key_points": key_points
+        }
+    
     def analyze_consensus(self, texts: list[str], topic: str) -> str:
         """Analyze consensus and disagreements across studies."""
         combined_text = "\n\n---\n\n".join(texts[:10])
@@ -175,15 +239,12 @@ Provide a thorough consensus analysis. Return ONLY valid JSON:
 Include at least 3-5 consensus points and 2-3 disagreements if present.
 """
         
-        response = self.client.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": "You are a research analysis expert specializing in systematic reviews. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+        return self._complete(
+            "consensus",
+            "You are a research analysis expert specializing in systematic reviews. Return only valid JSON.",
+            prompt,
             temperature=0.2
         )
-        return response.choices[0].message.content
     
     def identify_gaps(self, texts: list[str], metadata_list: list[dict]) -> str:
         """Identify research gaps and opportunities."""
@@ -256,12 +317,9 @@ Return ONLY valid JSON:
 Provide at least 4-5 items in each category with specific, actionable details.
 """
         
-        response = self.client.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": "You are a research gap analysis expert for space biology. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+        return self._complete(
+            "gaps",
+            "You are a research gap analysis expert for space biology. Return only valid JSON.",
+            prompt,
             temperature=0.3
         )
-        return response.choices[0].message.content
@@ -0,0 +1,350 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+
+# Indexes are shared by every client in the process so writers and readers see one copy
+_open_indexes: Dict[Path, "LocalIndex"] = {}
+
+class _Response:
+    """Attribute and item access to response fields, like the Pinecone client's response models."""
+    def __init__(self, **fields: Any):
+        self.__dict__.update(fields)
+    
+    def __getitem__(self, key: str) -> Any:
+        return self.__dict__[key]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.__dict__.get(key, default)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v.to_dict() if isinstance(v, _Response) else v for k, v in self.__dict__.items()}
+    
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+def _matches_filter(metadata: Dict[str, Any], filter_dict: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone metadata filter; list-valued fields match if any element matches."""
+    if not filter_dict:
+        return True
+    
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(_matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(key)
+        values = value if isinstance(value, list) else [value]
+        
+        for op, operand in condition.items():
+            if op == "$exists":
+                if (key in metadata) != bool(operand):
+                    return False
+            elif op == "$eq":
+                if operand not in values:
+                    return False
+            elif op == "$ne":
+                if operand in values:
+                    return False
+            elif op == "$in":
+                if not any(v in operand for v in values):
+                    return False
+            elif op == "$nin":
+                if any(v in operand for v in values):
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    return True
+
+class _Namespace:
+    """
+    One namespace of a local index, persisted as two append-only logs:
+    vectors.f32 (raw float32 rows) and records.jsonl (upserts pointing at rows, and deletes).
+    Other processes pick up new records by reading the tail of the log.
+    """
+    def __init__(self, path: Path, dimension: int):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.vectors_path = self.path / "vectors.f32"
+        self.records_path = self.path / "records.jsonl"
+        self.vectors_path.touch(exist_ok=True)
+        self.records_path.touch(exist_ok=True)
+        
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+        self.rows: Dict[str, int] = {}
+        self._records_offset = 0
+        self._log_rows = 0
+        self._free: List[int] = []
+    
+    def refresh(self):
+        size = self.records_path.stat().st_size
+        if size == self._records_offset:
+            return
+        if size < self._records_offset:
+            # Namespace was deleted and recreated by another process
+            self.__init__(self.path, self.dimension)
+        
+        with open(self.records_path, 'r') as f:
+            f.seek(self._records_offset)
+            records = []
+            for line in f:
+                if not line.endswith("\n"):
+                    # Partially written record; read it next time
+                    break
+                records.append(json.loads(line))
+                self._records_offset += len(line.encode("utf-8"))
+        
+        upserts = [r for r in records if r["op"] == "upsert"]
+        if upserts:
+            log_rows = np.fromfile(
+                self.vectors_path, dtype=np.float32,
+                count=(max(r["row"] for r in upserts) + 1 - self._log_rows) * self.dimension,
+                offset=self._log_rows * self.dimension * 4
+            ).reshape(-1, self.dimension)
+        
+        for record in records:
+            if record["op"] == "upsert":
+                self._set(record["id"], log_rows[record["row"] - self._log_rows], record["metadata"])
+            elif record["op"] == "delete":
+                for vector_id in record["ids"]:
+                    self._remove(vector_id)
+            elif record["op"] == "delete_all":
+                self._clear()
+        if upserts:
+            self._log_rows += len(log_rows)
+    
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        self.refresh()
+        values = np.asarray([v["values"] for v in vectors], dtype=np.float32).reshape(-1, self.dimension)
+        with open(self.vectors_path, 'ab') as f:
+            values.tofile(f)
+        records = []
+        for i, vector in enumerate(vectors):
+            metadata = vector.get("metadata") or {}
+            self._set(vector["id"], values[i], metadata)
+            records.append({"op": "upsert", "id": vector["id"], "row": self._log_rows + i, "metadata": metadata})
+        self._log_rows += len(vectors)
+        self._append(records)
+    
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False):
+        self.refresh()
+        if delete_all:
+            self._clear()
+            self._append([{"op": "delete_all"}])
+        elif ids:
+            for vector_id in ids:
+                self._remove(vector_id)
+            self._append([{"op": "delete", "ids": list(ids)}])
+    
+    def count(self) -> int:
+        return len(self.rows)
+    
+    def _append(self, records: List[Dict[str, Any]]):
+        data = "".join(json.dumps(r) + "\n" for r in records)
+        with open(self.records_path, 'a') as f:
+            f.write(data)
+        self._records_offset += len(data.encode("utf-8"))
+    
+    def _set(self, vector_id: str, values: np.ndarray, metadata: Dict[str, Any]):
+        norm = np.linalg.norm(values)
+        unit = values / norm if norm > 0 else values
+        row = self.rows.get(vector_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self.ids)
+                if row == self.matrix.shape[0]:
+                    grown = np.zeros((max(64, row * 2), self.dimension), dtype=np.float32)
+                    grown[:row] = self.matrix
+                    self.matrix = grown
+                self.ids.append(None)
+                self.metadata.append(None)
+            self.rows[vector_id] = row
+        self.matrix[row] = unit
+        self.ids[row] = vector_id
+        self.metadata[row] = metadata
+    
+    def _remove(self, vector_id: str):
+        row = self.rows.pop(vector_id, None)
+        if row is not None:
+            self.matrix[row] = 0.0
+            self.ids[row] = None
+            self.metadata[row] = None
+            self._free.append(row)
+    
+    def _clear(self):
+        self.ids, self.metadata, self.rows, self._free = [], [], {}, []
+        self.matrix = np.zeros((0, self.dimension), dtype=np.float32)
+
+class LocalIndex:
+    """
+    Exact cosine search over in-memory vectors with the subset of the Pinecone Index API we use.
+    Vectors are stored unit-normalized, so fetch() returns normalized values.
+    """
+    def __init__(self, path: Path, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+    
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = ""):
+        if not vectors:
+            return _Response(upserted_count=0)
+        with self._lock:
+            self._namespace(namespace).upsert(vectors)
+        return _Response(upserted_count=len(vectors))
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: str = ""
+    ):
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        with self._lock:
+            ns = self._namespace(namespace)
+            ns.refresh()
+            live = len(ns.ids)
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            scores = ns.matrix[:live] @ (query / norm if norm > 0 else query)
+            
+            mask = np.array([vector_id is not None for vector_id in ns.ids], dtype=bool)
+            if filter:
+                mask &= np.array([m is not None and _matches_filter(m, filter) for m in ns.metadata], dtype=bool)
+            candidates = np.flatnonzero(mask)
+            
+            if len(candidates) > top_k:
+                top = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            else:
+                top = candidates
+            top = top[np.argsort(-scores[top], kind="stable")]
+            
+            matches = [
+                _Response(
+                    id=ns.ids[row],
+                    score=float(scores[row]),
+                    metadata=dict(ns.metadata[row]) if include_metadata else None,
+                    values=ns.matrix[row].tolist() if include_values else []
+                )
+                for row in top
+            ]
+        return _Response(matches=matches, namespace=namespace)
+    
+    def fetch(self, ids: List[str], namespace: str = ""):
+        with self._lock:
+            ns = self._namespace(namespace)
+            ns.refresh()
+            vectors = {}
+            for vector_id in ids:
+                row = ns.rows.get(vector_id)
+                if row is not None:
+                    vectors[vector_id] = _Response(
+                        id=vector_id,
+                        values=ns.matrix[row].tolist(),
+                        metadata=dict(ns.metadata[row])
+                    )
+        return _Response(vectors=vectors, namespace=namespace)
+    
+    def list(self, prefix: Optional[str] = None, limit: int = 100, namespace: str = "") -> Iterator[List[str]]:
+        with self._lock:
+            ns = self._namespace(namespace)
+            ns.refresh()
+            ids = sorted(vector_id for vector_id in ns.rows if not prefix or vector_id.startswith(prefix))
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+    
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = ""):
+        with self._lock:
+            self._namespace(namespace).delete(ids, delete_all)
+        return _Response()
+    
+    def describe_index_stats(self):
+        with self._lock:
+            namespaces = {}
+            for ns_path in sorted(p for p in self.path.iterdir() if p.is_dir()):
+                name = self._namespace_name(ns_path.name)
+                ns = self._namespace(name)
+                ns.refresh()
+                if ns.count():
+                    namespaces[name] = _Response(vector_count=ns.count())
+        return _Response(
+            dimension=self.dimension,
+            total_vector_count=sum(ns.vector_count for ns in namespaces.values()),
+            namespaces=namespaces
+        )
+    
+    def _namespace(self, name: str) -> _Namespace:
+        if name not in self._namespaces:
+            # The default namespace "" is stored as "__default__"
+            self._namespaces[name] = _Namespace(self.path / (name or "__default__"), self.dimension)
+        return self._namespaces[name]
+    
+    @staticmethod
+    def _namespace_name(directory: str) -> str:
+        return "" if directory == "__default__" else directory
+
+class LocalVectorClient:
+    """
+    Offline stand-in for the Pinecone client, selected with VECTOR_BACKEND=local.
+    Each index is a directory under `path`; writes are append-only so a single ingest
+    process can write while server processes read.
+    """
+    def __init__(self, path: str = "data/local_index"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+    
+    def list_indexes(self) -> List[_Response]:
+        return [self.describe_index(p.name) for p in sorted(self.path.iterdir()) if (p / "index.json").exists()]
+    
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", spec: Any = None):
+        if metric != "cosine":
+            raise ValueError("The local index only supports cosine similarity")
+        index_path = self.path / name
+        index_path.mkdir(parents=True, exist_ok=True)
+        with open(index_path / "index.json", 'w') as f:
+            json.dump({"name": name, "dimension": dimension, "metric": metric}, f)
+    
+    def describe_index(self, name: str) -> _Response:
+        with open(self.path / name / "index.json", 'r') as f:
+            info = json.load(f)
+        return _Response(status={"ready": True}, **info)
+    
+    def delete_index(self, name: str):
+        _open_indexes.pop((self.path / name).resolve(), None)
+        shutil.rmtree(self.path / name, ignore_errors=True)
+    
+    def Index(self, name: str) -> LocalIndex:
+        index_path = (self.path / name).resolve()
+        if index_path not in _open_indexes:
+            info = self.describe_index(name)
+            _open_indexes[index_path] = LocalIndex(index_path, info.dimension)
+        return _open_indexes[index_path]
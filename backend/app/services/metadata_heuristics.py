@@ -0,0 +1,139 @@
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.models.schemas import PaperText, TextLine
+
+DOI_PATTERN = re.compile(r'\b(10\.\d{4,9}/[^\s"<>,;]+)', re.IGNORECASE)
+YEAR = r'((?:19|20)\d{2})'
+PUBLISHED_YEAR_PATTERNS = [
+    re.compile(r'published(?: online)?[:\s]+[^\n]{0,40}?' + YEAR, re.IGNORECASE),
+    re.compile(r'(?:©|\(c\)|copyright)\s*' + YEAR, re.IGNORECASE),
+    re.compile(r'accepted[:\s]+[^\n]{0,40}?' + YEAR, re.IGNORECASE),
+]
+PDF_DATE_PATTERN = re.compile(r'^D?:?' + YEAR)
+KEYWORDS_PATTERN = re.compile(r'\bkey\s?words?\s*[:.\-—]\s*(.+?)(?:\n\s*\n|\n(?=[A-Z][a-z]+\s*\n)|$)', re.IGNORECASE | re.DOTALL)
+ABSTRACT_END_PATTERN = re.compile(r'\n\s*(?:key\s?words?|introduction|background|1\.?\s+introduction)\b', re.IGNORECASE)
+AFFILIATION_WORDS = re.compile(r'universit|department|institut|laborator|center|centre|school|college|@|abstract|received', re.IGNORECASE)
+PLACEHOLDER_TITLES = re.compile(r'^(microsoft word|untitled|document\d*|\S+\.(pdf|docx?|tex))', re.IGNORECASE)
+
+MIN_YEAR = 1950
+
+def extract_local_metadata(paper_text: PaperText, abstract_text: str) -> Dict[str, Any]:
+    """
+    Cheap first pass over PDF document info, first-page layout and regexes.
+    Returns only the fields it is reasonably confident about; the LLM fills the rest.
+    """
+    first_pages = "\n".join(paper_text.pages[:2])
+    found = {}
+    
+    title_lines = _title_lines(paper_text.first_page_lines)
+    title = _document_title(paper_text.pdf_metadata) or " ".join(line.text for line in title_lines)
+    if len(title) >= 15:
+        found["title"] = _normalize_space(title)
+    
+    authors = _document_authors(paper_text.pdf_metadata) or _author_line(paper_text.first_page_lines, title_lines)
+    if authors:
+        found["authors"] = authors
+    
+    year = _publication_year(first_pages, paper_text.pdf_metadata)
+    if year:
+        found["year"] = year
+    
+    doi = extract_doi(paper_text)
+    if doi:
+        found["doi"] = doi
+    
+    abstract = _clean_abstract(abstract_text)
+    if abstract:
+        found["abstract"] = abstract
+    
+    keywords_match = KEYWORDS_PATTERN.search(first_pages)
+    if keywords_match:
+        keywords = [_normalize_space(k) for k in re.split(r'[;,·•]', keywords_match.group(1))]
+        keywords = [k for k in keywords if 2 < len(k) < 60]
+        if len(keywords) >= 2:
+            found["keywords"] = keywords[:15]
+    
+    return found
+
+def extract_doi(paper_text: PaperText) -> Optional[str]:
+    first_pages = "\n".join(paper_text.pages[:2])
+    doi_match = DOI_PATTERN.search(first_pages) or DOI_PATTERN.search(" ".join(str(v) for v in paper_text.pdf_metadata.values()))
+    return doi_match.group(1).rstrip(".)") if doi_match else None
+
+def _normalize_space(text: str) -> str:
+    return " ".join(text.split())
+
+def _document_title(pdf_metadata: Dict[str, Any]) -> Optional[str]:
+    title = _normalize_space(pdf_metadata.get("title") or "")
+    if len(title) < 15 or " " not in title or PLACEHOLDER_TITLES.match(title):
+        return None
+    return title
+
+def _title_lines(lines: List[TextLine]) -> List[TextLine]:
+    """Consecutive lines set in the largest font among the top of the first page."""
+    candidates = [line for line in lines[:40] if len(line.text.strip()) > 3]
+    if not candidates:
+        return []
+    largest = max(line.size for line in candidates)
+    body_size = Counter(round(line.size) for line in lines).most_common(1)[0][0]
+    if largest < body_size * 1.15:
+        return []
+    
+    title_lines = []
+    for line in candidates:
+        if abs(line.size - largest) < 0.5:
+            title_lines.append(line)
+        elif title_lines:
+            break
+    return title_lines
+
+def _document_authors(pdf_metadata: Dict[str, Any]) -> List[str]:
+    author = pdf_metadata.get("author") or ""
+    names = [_normalize_space(n) for n in re.split(r';|,|\band\b|&', author)]
+    names = [n for n in names if len(n.split()) >= 2 and not AFFILIATION_WORDS.search(n)]
+    return names
+
+def _author_line(lines: List[TextLine], title_lines: List[TextLine]) -> List[str]:
+    """The first line after the title that reads like a list of personal names."""
+    if not title_lines:
+        return []
+    start = lines.index(title_lines[-1]) + 1
+    for line in lines[start:start + 4]:
+        text = re.sub(r'[\d*†‡§¶,]+(?=\s|,|$)', ',', line.text)
+        if AFFILIATION_WORDS.search(text):
+            break
+        names = [_normalize_space(n) for n in re.split(r',|\band\b|&', text)]
+        names = [n for n in names if n]
+        if names and all(2 <= len(n.split()) <= 5 and n[0].isupper() for n in names):
+            return names
+    return []
+
+def _publication_year(text: str, pdf_metadata: Dict[str, Any]) -> Optional[int]:
+    """
+    Only a dated header (published/accepted), a copyright line or the PDF's creation
+    date count; bare years on the opening pages are mostly citations, so without
+    these the year is left to the LLM.
+    """
+    latest = datetime.now().year + 1
+    for pattern in PUBLISHED_YEAR_PATTERNS:
+        match = pattern.search(text)
+        if match and MIN_YEAR <= int(match.group(1)) <= latest:
+            return int(match.group(1))
+    
+    date_match = PDF_DATE_PATTERN.match(pdf_metadata.get("creationDate") or "")
+    if date_match and MIN_YEAR <= int(date_match.group(1)) <= latest:
+        return int(date_match.group(1))
+    return None
+
+def _clean_abstract(abstract_text: str) -> Optional[str]:
+    match = re.search(r'\babstract\b[\s:.\-—]*', abstract_text, re.IGNORECASE)
+    if not match:
+        return None
+    body = abstract_text[match.end():match.end() + 4000]
+    end = ABSTRACT_END_PATTERN.search(body)
+    if end:
+        body = body[:end.start()]
+    body = _normalize_space(body)
+    return body if len(body) >= 200 else None
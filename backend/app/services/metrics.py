@@ -0,0 +1,139 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds; spans cache hits (~1 ms) through slow GPT-4o completions (~1 min)
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: List[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: per-bucket (non-cumulative) counts with a final +Inf slot, sum, count
+        self.series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, *label_values: str, value: float):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self.series.setdefault(label_values, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[slot] += 1
+            totals[0] += value
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, totals) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + [float("inf")], counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    le_label = f'le="{le}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le_label)} {cumulative}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {totals[0]:.6f}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+STAGE_LATENCY = Histogram("stage_latency_seconds", "Latency of instrumented pipeline stages", ("stage",))
+STAGE_ERRORS = Counter("stage_errors_total", "Exceptions raised by instrumented stages", ("stage",))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+LLM_TOKENS = Counter("llm_tokens_total", "OpenAI tokens used, by operation and kind", ("operation", "kind"))
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+SUMMARY_PREFETCH = Counter("summary_prefetch_total", "Speculative summaries by outcome", ("result",))
+UPSTREAM_CALLS = Counter("upstream_calls_total", "OpenAI and index calls by outcome, including hedges and breaker rejections", ("upstream", "result"))
+
+REGISTRY = [STAGE_LATENCY, STAGE_ERRORS, HTTP_LATENCY, HTTP_REQUESTS, LLM_TOKENS, CACHE_REQUESTS, SUMMARY_PREFETCH, UPSTREAM_CALLS]
+
+# Stage timings of the current request, for the Server-Timing header; None outside a request
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record a stage's latency (and any exception) and add it to the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(stage, value=elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def record_tokens(operation: str, usage) -> None:
+    """Count prompt/completion tokens from an OpenAI response's usage block, if present."""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        LLM_TOKENS.inc(operation, "prompt", amount=prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.inc(operation, "completion", amount=completion_tokens)
+
+def record_cache(cache: str, hits: int, misses: int) -> None:
+    if hits:
+        CACHE_REQUESTS.inc(cache, "hit", amount=hits)
+    if misses:
+        CACHE_REQUESTS.inc(cache, "miss", amount=misses)
+
+def start_request() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing value; repeated stages (e.g. several index queries) are summed."""
+    totals: Dict[str, Tuple[float, int]] = {}
+    for stage, elapsed in timings:
+        duration, count = totals.get(stage, (0.0, 0))
+        totals[stage] = (duration + elapsed, count + 1)
+    parts = [
+        f'{stage};dur={duration * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+        for stage, (duration, count) in totals.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,13 @@
+from functools import lru_cache
+from app.config import get_settings
+
+settings = get_settings()
+
+@lru_cache()
+def get_openai_client():
+    """
+    One OpenAI client per process, so embeddings and chat share its connection pool.
+    The SDK is imported on first use rather than whenever a service module is imported.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=settings.openai_api_key)
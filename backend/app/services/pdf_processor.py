@@ -1,99 +1,214 @@
+import bisect
 import fitz
 import json
 import os
 import re
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
-from app.models.schemas import PaperMetadata, ChunkMetadata
+from app.models.schemas import PaperMetadata, ChunkMetadata, PaperText, SectionSpan, TextLine
+from app.services.artifact_cache import ArtifactCache
+from app.services.chunker import split_text
+from app.services.dedup import NearDuplicateIndex
 from app.services.llm_service import LLMService
+from app.services.metadata_heuristics import extract_doi, extract_local_metadata
+from app.services.metrics import record_cache, timed
 from app.config import get_settings
 
 settings = get_settings()
 
+# Checked in order; the first match on a page decides its section
+SECTION_PATTERNS = [
+    ("abstract", re.compile(r'\babstract\b', re.IGNORECASE)),
+    ("introduction", re.compile(r'\bintroduction\b', re.IGNORECASE)),
+    ("methods", re.compile(r'\b(method|material|procedure|experimental)\b', re.IGNORECASE)),
+    ("results", re.compile(r'\bresult', re.IGNORECASE)),
+    ("discussion", re.compile(r'\bdiscussion\b', re.IGNORECASE)),
+    ("conclusion", re.compile(r'\b(conclusion|summary)\b', re.IGNORECASE)),
+]
+
+CHUNK_SECTIONS = ["introduction", "methods", "results", "discussion", "conclusion"]
+
+# Bump when the metadata prompt or chunking logic changes to invalidate cached artifacts
+METADATA_PROMPT_VERSION = "2"
+# Extractions under this version are reused as they are (see _load_legacy_metadata)
+LEGACY_PROMPT_VERSION = "1"
+# 2: chunk text is joined with single spaces again, as before span-based chunking
+CHUNKER_VERSION = "2"
+
+# Fields the local heuristics may supply; whatever they miss is requested from the LLM
+LOCAL_FIELDS = ["title", "authors", "year", "abstract"]
+BIBLIOGRAPHIC_FIELDS = ["title", "authors", "year"]
+# Fields that need reading comprehension and always come from the LLM. Author keywords
+# found locally are added to the LLM's technical keywords, never used instead of them.
+SEMANTIC_FIELDS = ["keywords", "organisms", "space_conditions", "experiment_type", "findings_summary"]
+
+METADATA_FIELD_SPECS = {
+    "title": '"exact full paper title"',
+    "authors": '["full author names in order"]',
+    "year": "publication_year_as_integer_or_null",
+    "abstract": '"complete abstract text, or first substantial paragraph if abstract not labeled"',
+    "keywords": '["specific technical terms, phenomena studied, biological processes, experimental conditions"]',
+    "organisms": '["specific organisms studied - mice, rats, C. elegans, Arabidopsis, bacteria species, etc."]',
+    "space_conditions": '["specific conditions - microgravity, simulated microgravity, radiation exposure type, spaceflight duration, etc."]',
+    "experiment_type": '"detailed description of experimental approach and methodology"',
+    "findings_summary": '"3-4 sentence summary of major findings and their implications"'
+}
+
+METADATA_FIELD_DEFAULTS = {
+    "title": "", "authors": [], "year": None, "abstract": "", "keywords": [],
+    "organisms": [], "space_conditions": [], "experiment_type": "", "findings_summary": ""
+}
+
+METADATA_HEAD_CHARS = 4000
+METADATA_SECTION_CHARS = 2000
+
+def merge_keywords(llm_keywords: List[str], author_keywords: List[str]) -> List[str]:
+    """The LLM's keywords, then author keywords it did not already give (ignoring case)."""
+    seen = {keyword.lower() for keyword in llm_keywords}
+    merged = list(llm_keywords)
+    for keyword in author_keywords:
+        if keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            merged.append(keyword)
+    return merged
+
 class PDFProcessor:
     def __init__(self):
         self.llm_service = LLMService()
-        self.processed_dir = Path("data/processed")
-        self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = ArtifactCache("data/processed")
+        self.dedup = None
+        if settings.dedup_mode != "off":
+            self.dedup = NearDuplicateIndex("data/processed/minhash", threshold=settings.dedup_threshold)
+    
+    def extract_text_from_pdf(self, pdf_path: str) -> PaperText:
+        """
+        Extract page text once and record which character ranges of each page
+        belong to which section, instead of copying text into section strings.
+        """
+        return self.build_paper_text(self.read_pdf(pdf_path))
     
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict[str, str]:
+    def read_pdf(self, pdf_path: str) -> PaperText:
+        """Page text plus the document info and first-page font sizes used by the metadata heuristics."""
         doc = fitz.open(pdf_path)
+        pages = [page.get_text() for page in doc]
         
-        full_text = []
-        sections = {
-            "abstract": "",
-            "introduction": "",
-            "methods": "",
-            "results": "",
-            "discussion": "",
-            "conclusion": ""
-        }
+        first_page_lines = []
+        if len(doc) > 0:
+            for block in doc[0].get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    line_spans = [span for span in line["spans"] if span["text"].strip()]
+                    if line_spans:
+                        first_page_lines.append(TextLine(
+                            text="".join(span["text"] for span in line_spans).strip(),
+                            size=max(span["size"] for span in line_spans)
+                        ))
         
+        pdf_metadata = {k: v for k, v in (doc.metadata or {}).items() if v}
+        doc.close()
+        return PaperText(pages=pages, pdf_metadata=pdf_metadata, first_page_lines=first_page_lines)
+    
+    def build_paper_text(self, paper_text: PaperText) -> PaperText:
+        pages = paper_text.pages
+        spans = []
         current_section = None
+        seen_abstract = False
         
-        for page in doc:
-            text = page.get_text()
-            full_text.append(text)
+        for page_num, text in enumerate(pages):
+            start = 0
+            section, offset = self._detect_section(text, seen_abstract)
+            if section and section != current_section:
+                # Text above the heading still belongs to the previous section
+                if current_section and offset > 0:
+                    spans.append(SectionSpan(section=current_section, page=page_num, start=0, end=offset))
+                    start = offset
+                current_section = section
+                seen_abstract = seen_abstract or section == "abstract"
             
-            text_lower = text.lower()
-            
-            # Better section detection with word boundaries
-            if re.search(r'\babstract\b', text_lower) and not sections["abstract"]:
-                current_section = "abstract"
-            elif re.search(r'\bintroduction\b', text_lower):
-                current_section = "introduction"
-            elif re.search(r'\b(method|material|procedure|experimental)\b', text_lower):
-                current_section = "methods"
-            elif re.search(r'\bresult', text_lower):
-                current_section = "results"
-            elif re.search(r'\bdiscussion\b', text_lower):
-                current_section = "discussion"
-            elif re.search(r'\b(conclusion|summary)\b', text_lower):
-                current_section = "conclusion"
-            
-            if current_section and current_section in sections:
-                sections[current_section] += text + "\n"
+            if current_section and start < len(text):
+                spans.append(SectionSpan(section=current_section, page=page_num, start=start, end=len(text)))
         
-        doc.close()
+        return paper_text.model_copy(update={"spans": spans})
+    
+    def _detect_section(self, text: str, seen_abstract: bool) -> Tuple[Optional[str], int]:
+        """Return the first matching section for a page and the offset of its keyword."""
+        for section, pattern in SECTION_PATTERNS:
+            if section == "abstract" and seen_abstract:
+                continue
+            match = pattern.search(text)
+            if match:
+                return section, match.start()
+        return None, 0
+    
+    def _text_head(self, paper_text: PaperText, limit: int) -> str:
+        """First `limit` characters of the newline-joined page text."""
+        parts = []
+        size = 0
+        for page in paper_text.pages:
+            if size >= limit:
+                break
+            parts.append(page)
+            size += len(page) + 1
+        return "\n".join(parts)[:limit]
+    
+    def _section_spans(self, paper_text: PaperText, section: str) -> List[SectionSpan]:
+        return [span for span in paper_text.spans if span.section == section]
+    
+    def _section_text(self, paper_text: PaperText, spans: List[SectionSpan]) -> str:
+        return "".join(paper_text.pages[span.page][span.start:span.end] + "\n" for span in spans)
+    
+    def extract_metadata(self, paper_text: PaperText, filename: str) -> PaperMetadata:
+        """
+        Tiered extraction: title, authors, year, DOI, abstract and keywords come from a
+        local pass when possible, and the LLM only sees a short window for the rest.
+        """
+        abstract_text = self._section_text(paper_text, self._section_spans(paper_text, "abstract"))
+        local_fields = extract_local_metadata(paper_text, abstract_text)
+        author_keywords = local_fields.pop("keywords", [])
+        llm_fields = self.extract_metadata_with_llm(paper_text, filename, local_fields)
         
-        return {
-            "full_text": "\n".join(full_text),
-            **sections
-        }
+        fields = {**llm_fields, **local_fields}
+        fields["keywords"] = merge_keywords(llm_fields.get("keywords") or [], author_keywords)
+        
+        paper_id = Path(filename).stem
+        
+        return PaperMetadata(
+            paper_id=paper_id,
+            file_path=filename,
+            **fields
+        )
     
-    def extract_metadata_with_llm(self, text_content: Dict[str, str], filename: str) -> PaperMetadata:
-        # Use more content for better extraction
-        full_text_sample = text_content['full_text'][:12000]
+    def extract_metadata_with_llm(self, paper_text: PaperText, filename: str, known: Dict[str, Any]) -> Dict[str, Any]:
+        missing = [field for field in LOCAL_FIELDS if field not in known]
+        requested = {field: METADATA_FIELD_SPECS[field] for field in missing + SEMANTIC_FIELDS}
         
-        # Include abstract separately if available for better context
-        abstract_context = ""
-        if text_content.get('abstract'):
-            abstract_context = f"\n\nAbstract section:\n{text_content['abstract'][:2000]}"
+        # The abstract and conclusion carry the semantic fields; the opening text is only
+        # needed when the local pass could not find the bibliographic fields
+        context_parts = []
+        if any(field in missing for field in BIBLIOGRAPHIC_FIELDS) or not known.get("abstract"):
+            context_parts.append(f"Opening text:\n{self._text_head(paper_text, METADATA_HEAD_CHARS)}")
+        else:
+            context_parts.append(f"Abstract:\n{known['abstract'][:METADATA_SECTION_CHARS]}")
+        conclusion = self._section_text(paper_text, self._section_spans(paper_text, "conclusion"))
+        if conclusion:
+            context_parts.append(f"Conclusion:\n{conclusion[:METADATA_SECTION_CHARS]}")
+        context = "\n\n".join(context_parts)
+        
+        fields_spec = ",\n".join(f'    "{field}": {spec}' for field, spec in requested.items())
+        title_hint = f"Title: {known['title']}\n\n" if known.get("title") else ""
         
         prompt = f"""
-Extract comprehensive metadata from this space biology research paper. Be thorough and specific.
+Extract metadata from this space biology research paper. Be thorough and specific.
 
-Paper text (first 12000 chars):
-{full_text_sample}
-{abstract_context}
+{title_hint}{context}
 
 Extract with high precision:
 {{
-    "title": "exact full paper title",
-    "authors": ["full author names in order"],
-    "year": publication_year_as_integer_or_null,
-    "abstract": "complete abstract text, or first substantial paragraph if abstract not labeled",
-    "organisms": ["specific organisms studied - mice, rats, C. elegans, Arabidopsis, bacteria species, etc."],
-    "keywords": ["specific technical terms, phenomena studied, biological processes, experimental conditions"],
-    "experiment_type": "detailed description of experimental approach and methodology",
-    "space_conditions": ["specific conditions - microgravity, simulated microgravity, radiation exposure type, spaceflight duration, etc."],
-    "findings_summary": "3-4 sentence summary of major findings and their implications"
+{fields_spec}
 }}
 
 Focus on space biology terms: microgravity, spaceflight, radiation, bone loss, muscle atrophy, gene expression, adaptation, countermeasures, ISS, etc.
 Return ONLY valid JSON with no markdown formatting.
 """
-        
         response = self.llm_service.extract_structured_data(prompt)
         
         try:
@@ -109,15 +224,9 @@ Return ONLY valid JSON with no markdown formatting.
             response_clean = response_clean.strip()
             metadata_dict = json.loads(response_clean)
         
-        paper_id = Path(filename).stem
-        
-        return PaperMetadata(
-            paper_id=paper_id,
-            file_path=filename,
-            **metadata_dict
-        )
+        return {field: metadata_dict.get(field, METADATA_FIELD_DEFAULTS[field]) for field in requested}
     
-    def chunk_paper(self, text_content: Dict[str, str], metadata: PaperMetadata) -> List[ChunkMetadata]:
+    def chunk_paper(self, paper_text: PaperText, metadata: PaperMetadata) -> List[ChunkMetadata]:
         chunks = []
         chunk_idx = 0
         
@@ -128,6 +237,8 @@ Return ONLY valid JSON with no markdown formatting.
             if metadata.findings_summary:
                 abstract_chunk += f"\n\nKey Findings: {metadata.findings_summary}"
             
+            abstract_spans = self._section_spans(paper_text, "abstract")
+            
             chunks.append(ChunkMetadata(
                 paper_id=metadata.paper_id,
                 chunk_index=chunk_idx,
@@ -140,6 +251,7 @@ Return ONLY valid JSON with no markdown formatting.
                     "organisms": metadata.organisms,
                     "keywords": metadata.keywords,
                     "section": "abstract",
+                    "page": abstract_spans[0].page + 1 if abstract_spans else 1,
                     "experiment_type": metadata.experiment_type,
                     "space_conditions": metadata.space_conditions
                 }
@@ -147,21 +259,31 @@ Return ONLY valid JSON with no markdown formatting.
             chunk_idx += 1
         
         # Process each section with sentence-aware chunking
-        for section_name in ["introduction", "methods", "results", "discussion", "conclusion"]:
-            section_text = text_content.get(section_name, "")
+        for section_name in CHUNK_SECTIONS:
+            spans = self._section_spans(paper_text, section_name)
+            # Section text only lives for the duration of this loop iteration
+            section_text = self._section_text(paper_text, spans)
             if section_text and len(section_text) > 100:
                 # Add section header context to each chunk
                 section_header = f"[{section_name.upper()} SECTION from: {metadata.title}]\n\n"
                 
+                # Offset of each span within section_text, for page lookup
+                span_offsets = []
+                offset = 0
+                for span in spans:
+                    span_offsets.append(offset)
+                    offset += span.end - span.start + 1
+                
                 section_chunks = self._split_text_semantically(
                     section_text, 
-                    target_size=800,  # Slightly smaller for more focused chunks
-                    overlap=150
+                    target_size=settings.chunk_size,
+                    overlap=settings.chunk_overlap
                 )
                 
-                for i, chunk_text in enumerate(section_chunks):
+                for i, (chunk_start, chunk_text) in enumerate(section_chunks):
                     # Add context to each chunk
                     contextual_chunk = section_header + chunk_text
+                    page = spans[bisect.bisect_right(span_offsets, chunk_start) - 1].page + 1
                     
                     chunks.append(ChunkMetadata(
                         paper_id=metadata.paper_id,
@@ -176,6 +298,7 @@ Return ONLY valid JSON with no markdown formatting.
                             "keywords": metadata.keywords,
                             "section": section_name,
                             "section_chunk": i,
+                            "page": page,
                             "experiment_type": metadata.experiment_type,
                             "space_conditions": metadata.space_conditions
                         }
@@ -184,101 +307,139 @@ Return ONLY valid JSON with no markdown formatting.
         
         return chunks
     
-    def _split_text_semantically(self, text: str, target_size: int, overlap: int) -> List[str]:
+    def _split_text_semantically(self, text: str, target_size: int, overlap: int) -> List[Tuple[int, str]]:
         """
         Split text at sentence boundaries for better semantic coherence.
         This preserves complete thoughts and improves embedding quality.
+        Returns (start offset in text, chunk text) pairs.
         """
-        # Split into sentences using multiple delimiters
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        for sentence in sentences:
-            sentence_words = len(sentence.split())
-            
-            # If single sentence is too long, split it by words
-            if sentence_words > target_size:
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
-                    current_chunk = []
-                    current_size = 0
-                
-                # Split long sentence by words
-                words = sentence.split()
-                for i in range(0, len(words), target_size - overlap):
-                    chunk = " ".join(words[i:i + target_size])
-                    if chunk:
-                        chunks.append(chunk)
-                continue
-            
-            # Add sentence to current chunk
-            if current_size + sentence_words <= target_size:
-                current_chunk.append(sentence)
-                current_size += sentence_words
-            else:
-                # Start new chunk
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
-                
-                # Keep last few sentences for overlap (semantic continuity)
-                overlap_sentences = []
-                overlap_size = 0
-                for s in reversed(current_chunk):
-                    s_words = len(s.split())
-                    if overlap_size + s_words <= overlap:
-                        overlap_sentences.insert(0, s)
-                        overlap_size += s_words
-                    else:
-                        break
-                
-                current_chunk = overlap_sentences + [sentence]
-                current_size = overlap_size + sentence_words
-        
-        # Add remaining chunk
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-        
-        return chunks
+        return split_text(text, target_size, overlap)
     
-    def process_pdf(self, pdf_path: str) -> tuple[PaperMetadata, List[ChunkMetadata]]:
+    def process_pdf(self, pdf_path: str) -> Optional[tuple[PaperMetadata, List[ChunkMetadata]]]:
+        """Returns None when the PDF is skipped as a near-duplicate of an indexed paper."""
         filename = os.path.basename(pdf_path)
         paper_id = Path(filename).stem
         
-        cache_file = self.processed_dir / f"{paper_id}.json"
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                cached = json.load(f)
-                metadata = PaperMetadata(**cached['metadata'])
-                chunks = [ChunkMetadata(**c) for c in cached['chunks']]
-                return metadata, chunks
+        # Stage 1: page text, reused until the PDF's bytes change
+        source_hash = self.cache.file_hash(pdf_path)
+        raw_text = self.cache.load_pages(paper_id, source_hash)
+        record_cache("pdf_pages", raw_text is not None, raw_text is None)
+        if raw_text is None:
+            with timed("pdf_extract"):
+                raw_text = self.read_pdf(pdf_path)
+            self.cache.save_pages(paper_id, source_hash, raw_text)
+        paper_text = self.build_paper_text(raw_text)
+        text_hash = self.cache.text_hash(raw_text.pages)
         
-        text_content = self.extract_text_from_pdf(pdf_path)
-        metadata = self.extract_metadata_with_llm(text_content, filename)
-        chunks = self.chunk_paper(text_content, metadata)
+        # Near-duplicate check runs before any LLM or embedding spend
+        duplicate_of = None
+        if self.dedup is not None:
+            duplicate = self.dedup.check(paper_id, "\n".join(raw_text.pages))
+            if duplicate:
+                duplicate_of, similarity = duplicate
+                print(f"≈ {filename} is a near-duplicate of {duplicate_of} (similarity {similarity:.2f})")
+                if settings.dedup_mode == "skip":
+                    self.cache.record(paper_id, {
+                        "file": filename,
+                        "source_sha256": source_hash,
+                        "duplicate_of": duplicate_of
+                    })
+                    return None
         
-        with open(cache_file, 'w') as f:
-            json.dump({
-                'metadata': metadata.model_dump(),
-                'chunks': [c.model_dump() for c in chunks]
-            }, f, indent=2)
+        # Stage 2: LLM metadata, reused until the text, prompt or model change
+        metadata_key = self.cache.metadata_key(text_hash, METADATA_PROMPT_VERSION, settings.llm_model)
+        metadata = self.cache.load_metadata(metadata_key, paper_id, filename)
+        if metadata is None:
+            metadata = self._load_legacy_metadata(paper_id, filename, paper_text, text_hash, metadata_key)
+        record_cache("pdf_metadata", metadata is not None, metadata is None)
+        if metadata is None:
+            with timed("metadata_extract"):
+                metadata = self.extract_metadata(paper_text, filename)
+            self.cache.save_metadata(metadata_key, metadata)
+        
+        # Stage 3: chunks, reused until metadata, sections or chunker parameters change
+        chunks_key = self.cache.chunks_key(
+            metadata_key, paper_text.spans, settings.chunk_size, settings.chunk_overlap, CHUNKER_VERSION
+        )
+        chunks = self.cache.load_chunks(paper_id, chunks_key)
+        record_cache("pdf_chunks", chunks is not None, chunks is None)
+        if chunks is None:
+            with timed("chunk"):
+                chunks = self.chunk_paper(paper_text, metadata)
+            self.cache.save_chunks(paper_id, chunks_key, chunks)
+        
+        if duplicate_of:
+            # "link" mode: index the paper but let search group it with its canonical version
+            for chunk in chunks:
+                chunk.metadata["duplicate_of"] = duplicate_of
+        
+        entry = {
+            "file": filename,
+            "source_sha256": source_hash,
+            "metadata_key": metadata_key,
+            "chunks_key": chunks_key,
+            "chunk_count": len(chunks)
+        }
+        if duplicate_of:
+            entry["duplicate_of"] = duplicate_of
+        self.cache.record(paper_id, entry)
         
         return metadata, chunks
     
+    def _load_legacy_metadata(
+        self, paper_id: str, filename: str, paper_text: PaperText, text_hash: str, metadata_key: str
+    ) -> Optional[PaperMetadata]:
+        """
+        Seed the metadata stage from a v1 extraction, staged or in a pre-staging cache
+        file, so upgrading costs no LLM calls. v1 fields stay as extracted; only the DOI,
+        which v1 did not have, is filled in locally.
+        """
+        legacy_key = self.cache.metadata_key(text_hash, LEGACY_PROMPT_VERSION, settings.llm_model)
+        metadata = self.cache.load_metadata(legacy_key, paper_id, filename)
+        if metadata is None:
+            legacy = self.cache.load_legacy(paper_id)
+            if not legacy or "metadata" not in legacy:
+                return None
+            metadata = PaperMetadata(**legacy["metadata"])
+        if not metadata.doi:
+            metadata.doi = extract_doi(paper_text)
+        self.cache.save_metadata(metadata_key, metadata)
+        return metadata
+    
     def process_all_pdfs(self, pdf_directory: str) -> List[tuple[PaperMetadata, List[ChunkMetadata]]]:
         pdf_dir = Path(pdf_directory)
-        pdf_files = list(pdf_dir.glob("*.pdf"))
+        pdf_files = sorted(pdf_dir.glob("*.pdf"))
         
         results = []
         for pdf_file in pdf_files:
             try:
                 print(f"Processing {pdf_file.name}...")
-                metadata, chunks = self.process_pdf(str(pdf_file))
+                processed = self.process_pdf(str(pdf_file))
+                if processed is None:
+                    continue
+                metadata, chunks = processed
                 results.append((metadata, chunks))
                 print(f"✓ Processed {pdf_file.name}: {len(chunks)} chunks")
             except Exception as e:
                 print(f"✗ Failed to process {pdf_file.name}: {str(e)}")
         
+        self.write_duplicate_report()
+        
         return results
+    
+    def write_duplicate_report(self):
+        if self.dedup is None:
+            return
+        self.dedup.save()
+        clusters = self.dedup.clusters()
+        with open(self.cache.root / "duplicates_report.json", 'w') as f:
+            json.dump({
+                "mode": settings.dedup_mode,
+                "threshold": settings.dedup_threshold,
+                "clusters": clusters
+            }, f, indent=2)
+        
+        if clusters:
+            print(f"Near-duplicate clusters: {len(clusters)} ({sum(len(m) for m in clusters.values())} duplicates)")
+            for canonical, members in clusters.items():
+                print(f"  {canonical}: {', '.join(m['paper_id'] for m in members)}")
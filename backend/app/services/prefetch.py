@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from app.services.metrics import SUMMARY_PREFETCH
+from app.services.resilience import deadline
+from app.services.shared_cache import SharedCache
+
+class SummaryPrefetcher:
+    """
+    Speculative summaries. /search starts generate_summary of its top result for the
+    searching persona while the results are still on their way to the browser, and
+    the /summarize the detail drawer sends for that paper attaches to that work
+    instead of starting over.
+    
+    At most max_inflight summaries run at once; past that, searches simply do not
+    prefetch. A summary nobody claims within ttl seconds is dropped and, if it is
+    still running, stops waiting on OpenAI at that point. Prefetches live in the
+    worker that served the search; one finished elsewhere is still found through
+    the shared LLM cache.
+    """
+    def __init__(self, max_inflight: int = 4, ttl: float = 60.0):
+        self.max_inflight = max_inflight
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="prefetch")
+        self.entries: Dict[str, Tuple[Future, float]] = {}
+        self._running = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(texts: List[str], persona: str) -> str:
+        return SharedCache.key("summary", persona, texts)
+    
+    def start(self, texts: List[str], persona: str, summarize: Callable[[], dict]) -> bool:
+        """Run summarize() in the background unless it is already running or the budget is spent."""
+        self._expire()
+        key = self.key(texts, persona)
+        with self._lock:
+            if key in self.entries:
+                return False
+            if self._running >= self.max_inflight:
+                SUMMARY_PREFETCH.inc("skipped")
+                return False
+            self._running += 1
+            self.entries[key] = (self.executor.submit(self._run, summarize), time.monotonic())
+        SUMMARY_PREFETCH.inc("started")
+        return True
+    
+    def _run(self, summarize: Callable[[], dict]) -> dict:
+        try:
+            with deadline(self.ttl):
+                return summarize()
+        finally:
+            with self._lock:
+                self._running -= 1
+    
+    async def claim(self, texts: List[str], persona: str) -> Optional[dict]:
+        """The prefetched summary for these texts, waiting for it if still running; None if there is none or it failed."""
+        self._expire()
+        with self._lock:
+            entry = self.entries.pop(self.key(texts, persona), None)
+        if entry is None:
+            return None
+        future = entry[0]
+        SUMMARY_PREFETCH.inc("claimed_done" if future.done() else "claimed_running")
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            print(f"Prefetched summary failed, generating it again: {e}")
+            SUMMARY_PREFETCH.inc("failed")
+            return None
+    
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, started) in self.entries.items() if now - started > self.ttl]
+            # Never queued (the pool has max_inflight threads), so these are running or
+            # done; a running one gives up at its own ttl deadline
+            for key in expired:
+                del self.entries[key]
+        if expired:
+            SUMMARY_PREFETCH.inc("expired", amount=len(expired))
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
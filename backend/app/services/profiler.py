@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Stacks that never enter this package (idle pool threads, the event loop waiting on I/O) are dropped
+APP_ROOT = str(Path(__file__).resolve().parents[1])
+
+# One profile at a time, so a burst of sampled requests cannot stack up sampler threads
+PROFILE_SLOT = threading.Lock()
+
+class StackSampler:
+    """
+    Sampling profiler: a background thread snapshots every thread's stack each
+    `interval` seconds and counts them in collapsed form ("outer;inner;leaf"), the
+    input format of flamegraph.pl, speedscope and inferno.
+    
+    Work from other requests running at the same time lands in the same profile;
+    frames are not attributed to a single request.
+    """
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def __enter__(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(APP_ROOT)
+                    frames.append(f"{Path(code.co_filename).stem}:{getattr(code, 'co_qualname', code.co_name)}")
+                    frame = frame.f_back
+                if not in_app:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+    
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfileRing:
+    """Keeps the newest `keep` profiles as {id}.folded plus a {id}.json with the request and its timings."""
+    def __init__(self, directory: str = "data/profiles", keep: int = 50):
+        self.directory = Path(directory)
+        # At least the profile just saved survives pruning
+        self.keep = max(keep, 1)
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def save(self, sampler: StackSampler, info: Dict[str, Any]) -> str:
+        # Time-ordered names, so pruning is a sort
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+        with open(self.directory / f"{profile_id}.folded", 'w') as f:
+            f.write(sampler.collapsed())
+        
+        info = {
+            "id": profile_id,
+            **info,
+            "samples": sampler.samples,
+            "interval_ms": sampler.interval * 1000
+        }
+        tmp_path = self.directory / f"{profile_id}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(info, f, indent=2)
+        os.replace(tmp_path, self.directory / f"{profile_id}.json")
+        
+        self._prune()
+        return profile_id
+    
+    def _prune(self):
+        profile_ids = sorted(p.stem for p in self.directory.glob("*.json"))
+        for profile_id in profile_ids[:max(len(profile_ids) - self.keep, 0)]:
+            for suffix in (".json", ".folded"):
+                (self.directory / f"{profile_id}{suffix}").unlink(missing_ok=True)
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+FILE_PREFIX = "queries-"
+
+class QueryLog:
+    """
+    Append-only log of search, summarize and consensus requests: one short JSON line
+    per request in a file per UTC day, e.g. queries-20250101.jsonl.
+    
+    Each line is written with a single O_APPEND write, so every server worker can
+    append to the same file without locking. Files older than retention_days are
+    deleted whenever a new day's file is opened. precompute_summaries.py reads it back.
+    """
+    def __init__(self, directory: str = "data/logs/queries", retention_days: int = 30):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._day = None
+        self._pid = None
+    
+    def record(
+        self,
+        event: str,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        persona: Optional[str] = None,
+        results: Optional[int] = None
+    ):
+        entry = {"t": int(time.time()), "e": event, "q": query}
+        if filters:
+            entry["f"] = filters
+        if top_k is not None:
+            entry["k"] = top_k
+        if persona:
+            entry["p"] = persona
+        if results is not None:
+            entry["n"] = results
+        line = (json.dumps(entry, separators=(",", ":"), sort_keys=True) + "\n").encode("utf-8")
+        with self._lock:
+            os.write(self._file(), line)
+    
+    def _file(self) -> int:
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        if self._fd is None or self._day != day or self._pid != os.getpid():
+            if self._fd is not None and self._pid == os.getpid():
+                os.close(self._fd)
+            path = self.directory / f"{FILE_PREFIX}{day}.jsonl"
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if self._day != day:
+                self.prune()
+            self._day = day
+            self._pid = os.getpid()
+        return self._fd
+    
+    def prune(self):
+        oldest = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        for path in self.directory.glob(f"{FILE_PREFIX}*.jsonl"):
+            if path.stem[len(FILE_PREFIX):] < oldest:
+                path.unlink(missing_ok=True)
+    
+    def entries(self, days: int = 7) -> Iterator[Dict[str, Any]]:
+        """Entries from the last `days` UTC days, oldest first; torn or partial lines are skipped."""
+        first = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y%m%d")
+        for path in sorted(self.directory.glob(f"{FILE_PREFIX}*.jsonl")):
+            if path.stem[len(FILE_PREFIX):] < first:
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+    
+    def popular(self, days: int = 7, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        The most searched queries. Summarize and consensus requests are not counted:
+        their query is whatever the client sent (the detail drawer sends a paper title),
+        not a search. Each comes with its most common search filters and top_k, which
+        decide the result set a summary is computed from, and the personas searched under.
+        """
+        requests = Counter()
+        searches: Dict[str, Counter] = {}
+        personas: Dict[str, Counter] = {}
+        for entry in self.entries(days):
+            query = entry.get("q")
+            if not query or entry.get("e") != "search":
+                continue
+            requests[query] += 1
+            params = json.dumps([entry.get("f"), entry.get("k")], sort_keys=True)
+            searches.setdefault(query, Counter())[params] += 1
+            if entry.get("p"):
+                personas.setdefault(query, Counter())[entry["p"]] += 1
+        
+        popular = []
+        for query, count in requests.most_common(limit):
+            filters, top_k = json.loads(searches[query].most_common(1)[0][0])
+            popular.append({
+                "query": query,
+                "requests": count,
+                "filters": filters,
+                "top_k": top_k,
+                "personas": dict(personas.get(query, {}))
+            })
+        return popular
+
+@lru_cache()
+def get_query_log() -> Optional[QueryLog]:
+    """The process-wide query log, or None when QUERY_LOG_DIRECTORY is empty."""
+    if not settings.query_log_directory:
+        return None
+    return QueryLog(settings.query_log_directory, settings.query_log_retention_days)
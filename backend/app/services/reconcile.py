@@ -0,0 +1,132 @@
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.models.schemas import ChunkMetadata
+from app.services.artifact_cache import ArtifactCache
+from app.services.vector_store import VectorStore
+
+def paper_id_from_vector_id(vector_id: str) -> str:
+    return vector_id.rsplit("_chunk_", 1)[0]
+
+class IndexReconciler:
+    """
+    Diff the vector index against the processed manifest, which records each paper's current
+    chunk count: vector IDs are {paper_id}_chunk_{i}, so the expected ID set is known without
+    reading any chunks. Orphans are deleted, and missing (or, with verify_content, stale) chunks
+    are re-upserted from the cached chunk artifacts through the embedding cache.
+    """
+    def __init__(self, vector_store: VectorStore, cache: ArtifactCache, pdf_directory: str = "data/pdfs"):
+        self.vector_store = vector_store
+        self.cache = cache
+        self.pdf_directory = Path(pdf_directory)
+    
+    def plan(self, verify_content: bool = False, page_size: int = 100) -> Dict[str, Any]:
+        manifest = self.cache.load_manifest()
+        present_files = {p.name for p in self.pdf_directory.glob("*.pdf")}
+        removed_papers = sorted(pid for pid, entry in manifest.items() if entry.get("file") not in present_files)
+        
+        expected = {}
+        for paper_id, entry in manifest.items():
+            if paper_id in removed_papers or not entry.get("chunk_count"):
+                continue
+            for chunk_index in range(entry["chunk_count"]):
+                expected[f"{paper_id}_chunk_{chunk_index}"] = paper_id
+        
+        index_ids = set()
+        for page in self.vector_store.list_vector_ids(batch_size=page_size):
+            index_ids.update(page)
+        
+        orphans = sorted(index_ids - expected.keys())
+        missing = sorted(expected.keys() - index_ids)
+        stale = self._stale_ids(sorted(index_ids & expected.keys()), manifest) if verify_content else []
+        
+        return {
+            "index_vectors": len(index_ids),
+            "expected_vectors": len(expected),
+            "removed_papers": removed_papers,
+            "orphans": orphans,
+            "orphans_by_paper": dict(Counter(paper_id_from_vector_id(i) for i in orphans).most_common()),
+            "missing": missing,
+            "stale": stale
+        }
+    
+    def apply(self, plan: Dict[str, Any], workers: int = 4) -> Dict[str, int]:
+        if plan["orphans"]:
+            self.vector_store.delete_vectors(plan["orphans"], workers=workers)
+        
+        to_upsert = set(plan["missing"]) | set(plan["stale"])
+        chunks = self._load_chunks(to_upsert, self.cache.load_manifest())
+        if chunks:
+            # Upserted together so unchanged texts come straight from the embedding cache
+            self.vector_store.upsert_chunks(chunks)
+        
+        if plan["removed_papers"]:
+            self.cache.forget(plan["removed_papers"])
+        
+        return {
+            "deleted": len(plan["orphans"]),
+            "upserted": len(chunks),
+            "forgotten": len(plan["removed_papers"]),
+            "unhydrated": self._unhydrated_papers(chunks)
+        }
+    
+    def _unhydrated_papers(self, chunks: List[ChunkMetadata]) -> List[str]:
+        """In slim mode, papers whose re-upserted chunks no longer hydrate with their paper fields."""
+        if not self.vector_store.chunk_store or not chunks:
+            return []
+        first_chunks = {}
+        for chunk in chunks:
+            first_chunks.setdefault(chunk.paper_id, chunk)
+        results = self.vector_store.chunk_store.hydrate(
+            [{"id": f"{c.paper_id}_chunk_{c.chunk_index}", "metadata": {}} for c in first_chunks.values()],
+            include_text=False
+        )
+        return sorted(
+            paper_id for paper_id, result in zip(first_chunks, results)
+            if result["metadata"].get("title") != first_chunks[paper_id].metadata.get("title")
+        )
+    
+    def _load_chunks(self, vector_ids: set, manifest: Dict[str, Any]) -> List[ChunkMetadata]:
+        wanted_by_paper: Dict[str, set] = {}
+        for vector_id in vector_ids:
+            wanted_by_paper.setdefault(paper_id_from_vector_id(vector_id), set()).add(vector_id)
+        
+        chunks = []
+        for paper_id, wanted in sorted(wanted_by_paper.items()):
+            paper_chunks = self._paper_chunks(paper_id, manifest)
+            if paper_chunks is None:
+                print(f"  ! No cached chunks for {paper_id}; re-run ingestion for it")
+                continue
+            chunks.extend(c for c in paper_chunks if f"{c.paper_id}_chunk_{c.chunk_index}" in wanted)
+        return chunks
+    
+    def _paper_chunks(self, paper_id: str, manifest: Dict[str, Any]) -> Optional[List[ChunkMetadata]]:
+        entry = manifest.get(paper_id, {})
+        if not entry.get("chunks_key"):
+            return None
+        chunks = self.cache.load_chunks(paper_id, entry["chunks_key"])
+        if chunks is not None and entry.get("duplicate_of"):
+            for chunk in chunks:
+                chunk.metadata["duplicate_of"] = entry["duplicate_of"]
+        return chunks
+    
+    def _stale_ids(self, vector_ids: List[str], manifest: Dict[str, Any], batch_size: int = 100) -> List[str]:
+        """IDs whose stored text no longer matches the cached chunk, e.g. after re-chunking."""
+        if self.vector_store.chunk_store:
+            # Slim vectors carry no text to compare; the chunk store is rewritten on every upsert
+            print("  Content check skipped: slim vector metadata has no text to compare")
+            return []
+        
+        current = {
+            f"{c.paper_id}_chunk_{c.chunk_index}": c.text[:2000]
+            for paper_id in {paper_id_from_vector_id(i) for i in vector_ids}
+            for c in (self._paper_chunks(paper_id, manifest) or [])
+        }
+        
+        stale = []
+        for i in range(0, len(vector_ids), batch_size):
+            for vector in self.vector_store.fetch_vectors(vector_ids[i:i + batch_size]):
+                text = current.get(vector["id"])
+                if text is not None and vector["metadata"].get("text") != text:
+                    stale.append(vector["id"])
+        return sorted(stale)
@@ -0,0 +1,214 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+import numpy as np
+from app.config import get_settings
+from app.services.metrics import UPSTREAM_CALLS
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Successful latencies kept per upstream for choosing the hedge delay; no hedging below MIN_SAMPLES
+LATENCY_WINDOW = 256
+MIN_SAMPLES = 20
+
+class UpstreamUnavailable(Exception):
+    """An OpenAI or index call was refused (breaker open), ran out of time, or failed."""
+    def __init__(self, upstream: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{upstream} unavailable: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+# Monotonic time by which the current request must finish; None outside a request
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+# What the current request served from a fallback, for the X-Degraded header
+_degraded: ContextVar[Optional[List[str]]] = ContextVar("degraded", default=None)
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Give the enclosed work `seconds` in total; a nested deadline can only shorten it."""
+    end = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(end, current) if current is not None else end)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def time_left() -> Optional[float]:
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+def start_degraded() -> List[str]:
+    degraded: List[str] = []
+    _degraded.set(degraded)
+    return degraded
+
+def mark_degraded(what: str) -> None:
+    degraded = _degraded.get()
+    if degraded is not None and what not in degraded:
+        degraded.append(what)
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After failure_threshold consecutive failures it opens
+    and rejects calls at once for reset_timeout seconds, then lets a single probe
+    through (half-open); the probe's outcome closes or re-opens it. A probe with no
+    outcome after reset_timeout counts as failed, so a lost probe cannot leave the
+    breaker half-open.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "half_open" and now - self.probe_started >= self.reset_timeout:
+                print(f"Circuit breaker {self.name} re-opened: half-open probe timed out")
+                self.state = "open"
+                self.opened_at = now
+            if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.probe_started = now
+                return True
+            return False
+    
+    def retry_after(self) -> float:
+        return max(1.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+    
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"Circuit breaker {self.name} opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+class LatencyWindow:
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=size)
+    
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        return float(np.quantile(list(self.samples), q))
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyWindow] = {}
+_registry_lock = threading.Lock()
+# Upstream calls run here so the caller can stop waiting at its deadline. A call that
+# hangs past it still holds a thread, which bounds how much stuck work can pile up.
+_executor = ThreadPoolExecutor(max_workers=settings.upstream_threads, thread_name_prefix="upstream")
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    with _registry_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream, settings.breaker_failure_threshold, settings.breaker_reset_timeout)
+            _latencies[upstream] = LatencyWindow()
+        return _breakers[upstream]
+
+def breaker_states() -> Dict[str, str]:
+    with _registry_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
+
+def call_upstream(upstream: str, call: Callable[[float], T], timeout: float, hedge: bool = False) -> T:
+    """
+    Run call(seconds_allowed) against an upstream under its circuit breaker, within
+    both `timeout` and the request deadline. Failures raise UpstreamUnavailable.
+    
+    With hedge=True (idempotent calls only) a second, identical attempt starts when
+    the first is slower than the upstream's recent hedge_quantile latency, or right
+    away if the first fails; whichever succeeds first is used.
+    """
+    breaker = get_breaker(upstream)
+    # Checked before allow(): a half-open breaker hands out one probe, which must not be
+    # spent on a call that never runs
+    budget = timeout
+    left = time_left()
+    if left is not None:
+        budget = min(budget, left)
+    if budget <= 0:
+        UPSTREAM_CALLS.inc(upstream, "timeout")
+        raise UpstreamUnavailable(upstream, "request deadline passed")
+    
+    if not breaker.allow():
+        UPSTREAM_CALLS.inc(upstream, "rejected")
+        raise UpstreamUnavailable(upstream, "circuit open", breaker.retry_after())
+    
+    try:
+        return _attempt(upstream, breaker, call, budget, hedge)
+    except UpstreamUnavailable:
+        raise
+    except BaseException:
+        # Anything else (executor shut down, interrupted wait) still settles the breaker
+        breaker.record_failure()
+        raise
+
+def _attempt(upstream: str, breaker: CircuitBreaker, call: Callable[[float], T], budget: float, hedge: bool) -> T:
+    start = time.monotonic()
+    end = start + budget
+    hedge_delay = _latencies[upstream].quantile(settings.hedge_quantile) if hedge else None
+    if hedge_delay is not None:
+        hedge_delay = max(hedge_delay, settings.hedge_min_delay_ms / 1000)
+    
+    # Each attempt runs in a copy of the caller's context, keeping its deadline and timings
+    attempts = [_executor.submit(contextvars.copy_context().run, call, budget)]
+    pending = set(attempts)
+    error = None
+    while True:
+        now = time.monotonic()
+        if now >= end:
+            break
+        can_hedge = hedge and len(attempts) == 1
+        if can_hedge and (error is not None or (hedge_delay is not None and now - start >= hedge_delay)):
+            UPSTREAM_CALLS.inc(upstream, "hedged")
+            attempt = _executor.submit(contextvars.copy_context().run, call, end - now)
+            attempts.append(attempt)
+            pending.add(attempt)
+            continue
+        if not pending:
+            break
+        wait_for = end - now
+        if can_hedge and hedge_delay is not None:
+            wait_for = min(wait_for, start + hedge_delay - now)
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for attempt in done:
+            if attempt.exception() is None:
+                elapsed = time.monotonic() - start
+                _latencies[upstream].observe(elapsed)
+                breaker.record_success()
+                UPSTREAM_CALLS.inc(upstream, "ok" if attempt is attempts[0] else "hedge_won")
+                return attempt.result()
+            error = attempt.exception()
+    
+    breaker.record_failure()
+    if pending:
+        UPSTREAM_CALLS.inc(upstream, "timeout")
+        raise UpstreamUnavailable(upstream, f"no response within {budget:.2f}s")
+    UPSTREAM_CALLS.inc(upstream, "error")
+    raise UpstreamUnavailable(upstream, str(error)) from error
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+from app.config import get_settings
+from app.services.metrics import record_cache
+
+settings = get_settings()
+
+# Expired rows are swept, and the table trimmed to max_entries, every this many writes
+PRUNE_EVERY = 500
+
+class SharedCache:
+    """
+    TTL cache shared by every server worker on the host, stored in one SQLite file in
+    WAL mode: readers never block each other or the writer, and a value computed by
+    one worker (an embedding, a search, an LLM answer) is a hit for all the others.
+    
+    Entries live in namespaces with their own TTL. Expired entries are kept for another
+    stale_grace seconds, so callers can fall back to them while an upstream is down.
+    Connections are opened lazily per process, so the cache is safe to create before
+    gunicorn forks its workers.
+    """
+    def __init__(self, path: str = "data/cache/shared.sqlite", max_entries: int = 200000, stale_grace: float = 0.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.stale_grace = stale_grace
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._writes = 0
+    
+    @staticmethod
+    def key(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the file consistent after a crash; a lost last commit only costs a recompute
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+    
+    def get(self, namespace: str, key: str, stale: bool = False) -> Optional[bytes]:
+        """stale=True also returns entries past their TTL that are not yet pruned, as a fallback."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, 0.0 if stale else time.time())
+            ).fetchone()
+        record_cache(f"shared_{namespace}" + ("_stale" if stale else ""), row is not None, row is None)
+        return row[0] if row else None
+    
+    def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        if ttl <= 0:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time() + ttl)
+            )
+            conn.commit()
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune(conn)
+    
+    def get_json(self, namespace: str, key: str, stale: bool = False) -> Optional[Any]:
+        value = self.get(namespace, key, stale)
+        return json.loads(value) if value is not None else None
+    
+    def set_json(self, namespace: str, key: str, value: Any, ttl: float):
+        self.set(namespace, key, json.dumps(value).encode("utf-8"), ttl)
+    
+    def _prune(self, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time() - self.stale_grace,))
+        # Over the size bound, drop the entries closest to expiry
+        conn.execute(
+            "DELETE FROM cache WHERE rowid IN ("
+            "SELECT rowid FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+    
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            conn = self._connection()
+            if namespace:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+            else:
+                conn.execute("DELETE FROM cache")
+            conn.commit()
+
+@lru_cache()
+def get_shared_cache() -> Optional[SharedCache]:
+    """The process-wide cache, or None when SHARED_CACHE_PATH is empty."""
+    if not settings.shared_cache_path:
+        return None
+    return SharedCache(settings.shared_cache_path, settings.shared_cache_max_entries, settings.cache_stale_grace)
@@ -0,0 +1,178 @@
+import io
+import json
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from app.services.vector_store import VectorStore
+from app.config import get_settings
+
+settings = get_settings()
+
+SNAPSHOT_FORMAT = 1
+# Same order ChunkStore.flush() writes them, so a reader never sees an index ahead of its data
+CHUNK_STORE_FILES = ["texts.dat", "papers.json", "index.json"]
+
+def _to_columns(metadata: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Row dicts to one list per field; a missing field is stored as null."""
+    fields = sorted({key for row in metadata for key in row})
+    return {field: [row.get(field) for row in metadata] for field in fields}
+
+def _from_columns(columns: Dict[str, List[Any]], count: int) -> List[Dict[str, Any]]:
+    rows = [{} for _ in range(count)]
+    for field, values in columns.items():
+        for row, value in zip(rows, values):
+            if value is not None:
+                row[field] = value
+    return rows
+
+class SnapshotWriter:
+    """
+    Streams vectors into a zip of row groups, each group holding values.npy (float32 matrix),
+    ids.json and metadata.json with one column per metadata field. Memory stays bounded
+    by the group size however large the index is.
+    """
+    def __init__(self, path: str, group_size: int = 10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.zip = zipfile.ZipFile(self.path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.group_size = group_size
+        self.groups: List[Dict[str, Any]] = []
+        self.dimension: Optional[int] = None
+        self._pending: List[Dict[str, Any]] = []
+    
+    def add(self, vectors: List[Dict[str, Any]]):
+        self._pending.extend(vectors)
+        while len(self._pending) >= self.group_size:
+            self._write_group(self._pending[:self.group_size])
+            self._pending = self._pending[self.group_size:]
+    
+    def add_file(self, name: str, path: Path):
+        self.zip.write(path, name)
+    
+    def close(self, info: Dict[str, Any]):
+        if self._pending:
+            self._write_group(self._pending)
+            self._pending = []
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "dimension": self.dimension,
+            "vector_count": sum(group["count"] for group in self.groups),
+            "groups": self.groups,
+            "created_at": time.time(),
+            **info
+        }
+        self.zip.writestr("manifest.json", json.dumps(manifest, indent=2))
+        self.zip.close()
+        return manifest
+    
+    def _write_group(self, vectors: List[Dict[str, Any]]):
+        name = f"group-{len(self.groups):05d}"
+        values = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+        self.dimension = values.shape[1]
+        
+        buffer = io.BytesIO()
+        np.save(buffer, values)
+        self.zip.writestr(f"{name}/values.npy", buffer.getvalue())
+        self.zip.writestr(f"{name}/ids.json", json.dumps([v["id"] for v in vectors]))
+        self.zip.writestr(f"{name}/metadata.json", json.dumps(_to_columns([v["metadata"] for v in vectors])))
+        self.groups.append({"name": name, "count": len(vectors)})
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.zip = zipfile.ZipFile(path, 'r')
+        self.manifest = json.loads(self.zip.read("manifest.json"))
+        if self.manifest["format"] != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.manifest['format']}")
+    
+    def groups(self) -> Iterator[List[Dict[str, Any]]]:
+        for group in self.manifest["groups"]:
+            name = group["name"]
+            values = np.load(io.BytesIO(self.zip.read(f"{name}/values.npy")))
+            ids = json.loads(self.zip.read(f"{name}/ids.json"))
+            metadata = _from_columns(json.loads(self.zip.read(f"{name}/metadata.json")), len(ids))
+            yield [
+                {"id": vector_id, "values": row.tolist(), "metadata": meta}
+                for vector_id, row, meta in zip(ids, values, metadata)
+            ]
+    
+    def extract_files(self, prefix: str, destination: Path) -> List[str]:
+        destination.mkdir(parents=True, exist_ok=True)
+        extracted = []
+        for name in self.zip.namelist():
+            if name.startswith(prefix + "/"):
+                target = destination / name[len(prefix) + 1:]
+                tmp_path = target.with_suffix(target.suffix + ".tmp")
+                tmp_path.write_bytes(self.zip.read(name))
+                os.replace(tmp_path, target)
+                extracted.append(target.name)
+        return extracted
+    
+    def close(self):
+        self.zip.close()
+
+def export_snapshot(store: VectorStore, path: str, group_size: int = 10000, fetch_size: int = 100) -> Dict[str, Any]:
+    """Page every vector out of the store's index (or active generation) into a snapshot file."""
+    writer = SnapshotWriter(path, group_size)
+    start = time.time()
+    exported = 0
+    
+    for ids in store.list_vector_ids(batch_size=fetch_size):
+        vectors = store.fetch_vectors(ids)
+        writer.add(vectors)
+        exported += len(vectors)
+        if exported % 10000 < len(vectors):
+            print(f"  {exported} vectors exported ({exported / (time.time() - start):.0f}/s)")
+    
+    # In slim mode the vectors only carry filter fields; the text lives in the chunk store
+    if store.chunk_store:
+        store.chunk_store.flush()
+        for name in CHUNK_STORE_FILES:
+            if (store.chunk_store.path / name).exists():
+                writer.add_file(f"chunk_store/{name}", store.chunk_store.path / name)
+    
+    return writer.close({
+        "source_index": store.index_name,
+        "source_namespace": store.namespace,
+        "embedding_model": settings.embedding_model,
+        "slim_vector_metadata": store.chunk_store is not None
+    })
+
+def restore_snapshot(store: VectorStore, path: str, batch_size: int = 100, workers: int = 8, force: bool = False) -> Dict[str, Any]:
+    """
+    Bulk-load a snapshot with parallel batched upserts; no embedding or LLM calls are made.
+    A slim-metadata snapshot is refused unless SLIM_VECTOR_METADATA is on here too, since its
+    vectors carry no text or titles; force=True loads it anyway.
+    """
+    reader = SnapshotReader(path)
+    manifest = reader.manifest
+    store._ensure_index()
+    index_dimension = store.pc.describe_index(store.index_name).dimension
+    if manifest["dimension"] and manifest["dimension"] != index_dimension:
+        reader.close()
+        raise ValueError(f"Snapshot has {manifest['dimension']} dimensions but {store.index_name} has {index_dimension}")
+    
+    if manifest.get("slim_vector_metadata"):
+        if not store.chunk_store:
+            if not force:
+                reader.close()
+                raise ValueError(
+                    "Snapshot vectors carry slim metadata (no text or titles) but SLIM_VECTOR_METADATA is off, "
+                    "so searches would return empty text; enable it, or pass --force to load the vectors anyway"
+                )
+            print("Warning: loading slim-metadata vectors without a chunk store; searches return no text until SLIM_VECTOR_METADATA is enabled")
+        else:
+            restored = reader.extract_files("chunk_store", store.chunk_store.path)
+            print(f"Restored chunk store files: {', '.join(restored)}")
+    
+    start = time.time()
+    restored_count = 0
+    for vectors in reader.groups():
+        store.upsert_vectors(vectors, batch_size=batch_size, workers=workers)
+        restored_count += len(vectors)
+        print(f"  {restored_count}/{manifest['vector_count']} vectors restored ({restored_count / (time.time() - start):.0f}/s)")
+    
+    reader.close()
+    return {"restored": restored_count, "seconds": round(time.time() - start, 1)}
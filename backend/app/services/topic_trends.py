@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.config import get_settings
+from app.services.analytics import Incidence
+
+settings = get_settings()
+
+ARTIFACT_VERSION = 1
+# Years counted as "recent" for velocity and momentum, against the same span before them
+RECENT_YEARS = 3
+
+def paper_embeddings(vector_batches: Iterable[List[Dict[str, Any]]]) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+    """
+    Average each paper's unit-length chunk vectors into one unit-length paper vector,
+    a batch at a time so only papers × dims stays in memory. Paper metadata is taken
+    from its chunks: the first year seen and the union of organisms and keywords.
+    """
+    index: Dict[str, int] = {}
+    sums: List[np.ndarray] = []
+    metadata: List[Dict[str, Any]] = []
+    for vectors in vector_batches:
+        for vector in vectors:
+            meta = vector.get("metadata") or {}
+            paper_id = meta.get("paper_id") or vector["id"]
+            values = np.asarray(vector["values"], dtype=np.float32)
+            norm = np.linalg.norm(values)
+            if norm == 0:
+                continue
+            if paper_id not in index:
+                index[paper_id] = len(sums)
+                sums.append(np.zeros_like(values))
+                metadata.append({"year": None, "organisms": {}, "keywords": {}})
+            i = index[paper_id]
+            sums[i] += values / norm
+            paper = metadata[i]
+            if paper["year"] is None and meta.get("year"):
+                paper["year"] = meta["year"]
+            # dicts as ordered sets
+            paper["organisms"].update(dict.fromkeys(meta.get("organisms") or []))
+            paper["keywords"].update(dict.fromkeys(meta.get("keywords") or []))
+    
+    if not sums:
+        return [], np.zeros((0, 0), dtype=np.float32), []
+    embeddings = np.vstack(sums)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    for paper in metadata:
+        paper["organisms"] = list(paper["organisms"])
+        paper["keywords"] = list(paper["keywords"])
+    return list(index), embeddings, metadata
+
+def _kmeans_plus_plus(X: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centers = [X[rng.integers(len(X))]]
+    # Cosine distance to the nearest center so far
+    closest = 1.0 - X @ centers[0]
+    for _ in range(1, k):
+        weights = np.maximum(closest, 0).astype(np.float64) ** 2
+        total = weights.sum()
+        choice = rng.choice(len(X), p=weights / total) if total > 0 else rng.integers(len(X))
+        centers.append(X[choice])
+        closest = np.minimum(closest, 1.0 - X @ X[choice])
+    return np.vstack(centers)
+
+def assign_clusters(X: np.ndarray, centers: np.ndarray, block: int = 8192) -> np.ndarray:
+    """Nearest center by cosine similarity, in blocks to bound the similarity matrix."""
+    return np.concatenate([
+        np.argmax(X[start:start + block] @ centers.T, axis=1)
+        for start in range(0, len(X), block)
+    ]) if len(X) else np.zeros(0, dtype=np.int64)
+
+def minibatch_kmeans(
+    X: np.ndarray,
+    k: int,
+    batch_size: int = 1024,
+    iterations: int = 100,
+    tol: float = 1e-4,
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical mini-batch k-means (Sculley, 2010) on unit-length rows: each batch moves
+    a center to the running mean of every point ever assigned to it, so later batches
+    move it less; centers are renormalized to keep cosine assignment. Stops early once
+    no center moves more than tol. Returns (centers, labels for every row).
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(X))
+    init_sample = X[rng.choice(len(X), min(len(X), max(10 * k, batch_size)), replace=False)]
+    centers = _kmeans_plus_plus(init_sample, k, rng)
+    counts = np.zeros(k, dtype=np.float64)
+    
+    for _ in range(iterations):
+        batch = X[rng.choice(len(X), min(batch_size, len(X)), replace=False)]
+        labels = assign_clusters(batch, centers)
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float64)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        
+        hit = batch_counts > 0
+        updated = centers.copy()
+        updated[hit] = (centers[hit] * counts[hit, None] + sums[hit]) / (counts[hit] + batch_counts[hit])[:, None]
+        updated /= np.maximum(np.linalg.norm(updated, axis=1, keepdims=True), 1e-12)
+        counts += batch_counts
+        
+        shift = float(np.max(np.linalg.norm(updated - centers, axis=1)))
+        centers = updated
+        if shift < tol:
+            break
+    
+    return centers, assign_clusters(X, centers)
+
+def label_clusters(keywords: List[List[str]], labels: np.ndarray, k: int, top_n: int = 5) -> List[List[str]]:
+    """
+    Each cluster's most distinctive keywords: papers in the cluster using the keyword,
+    weighted by log(papers / papers using it anywhere) so corpus-wide terms like
+    "microgravity" do not name every cluster. A cluster where no keyword scores (all
+    of its keywords are used by every paper) is named by its most used keywords.
+    """
+    incidence = Incidence(keywords, len(keywords))
+    if not len(incidence):
+        return [[] for _ in range(k)]
+    # Keywords × clusters; paper keywords are already deduplicated, so these count papers
+    counts = incidence.by_group(labels, k)
+    document_frequency = counts.sum(axis=1)
+    scores = counts * np.log(len(keywords) / np.maximum(document_frequency, 1))[:, None]
+    
+    top = []
+    for cluster in range(k):
+        order = np.lexsort((-counts[:, cluster], -scores[:, cluster]))
+        distinctive = [i for i in order if scores[i, cluster] > 0][:top_n]
+        if not distinctive:
+            distinctive = [i for i in np.argsort(-counts[:, cluster], kind="stable") if counts[i, cluster] > 0][:top_n]
+        top.append([incidence.labels[i] for i in distinctive])
+    return top
+
+def _year(value: Any) -> Optional[int]:
+    try:
+        return int(float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _change(series: np.ndarray) -> float:
+    """Percent change of the last RECENT_YEARS over the RECENT_YEARS before them."""
+    recent = series[-RECENT_YEARS:].sum()
+    earlier = series[-2 * RECENT_YEARS:-RECENT_YEARS].sum()
+    if earlier == 0:
+        return 100.0 if recent > 0 else 0.0
+    return round(float((recent - earlier) / earlier * 100), 1)
+
+def build_trends_artifact(
+    paper_ids: List[str],
+    embeddings: np.ndarray,
+    metadata: List[Dict[str, Any]],
+    k: int,
+    batch_size: int = 1024,
+    iterations: int = 100,
+    seed: int = 0,
+    top_organisms: int = 20
+) -> Dict[str, Any]:
+    """
+    Cluster the papers and precompute everything /api/trends serves from them:
+    topic clusters with their labels, cluster × year and organism × year paper counts,
+    and the organism_trends_by_year, topic_evolution and top_topics sections.
+    """
+    centers, labels = minibatch_kmeans(embeddings, k, batch_size=batch_size, iterations=iterations, seed=seed)
+    k = len(centers)
+    keywords = label_clusters([paper["keywords"] for paper in metadata], labels, k)
+    sizes = np.bincount(labels, minlength=k)
+    
+    years = np.array([_year(paper["year"]) or 0 for paper in metadata], dtype=np.int64)
+    dated = years != 0
+    span = list(range(int(years[dated].min()), int(years[dated].max()) + 1)) if dated.any() else []
+    year_ids = years - (span[0] if span else 0)
+    
+    cluster_years = np.zeros((k, len(span)), dtype=np.int64)
+    np.add.at(cluster_years, (labels[dated], year_ids[dated]), 1)
+    organisms = Incidence([paper["organisms"] for paper in metadata], len(metadata))
+    organism_years = organisms.by_group(year_ids, len(span), dated) if span else np.zeros((len(organisms), 0), dtype=np.int64)
+    organism_totals = organisms.totals()
+    
+    # Two keywords tell neighbouring clusters apart better than one; labels key top_topics,
+    # so a label already taken by a larger cluster gets more keywords, or a number
+    names = {}
+    for cluster in np.argsort(-sizes, kind="stable"):
+        words = keywords[cluster]
+        candidates = [" / ".join(words[:n]) for n in range(2, len(words) + 1)] or words[:1]
+        label = next((c for c in candidates if c not in names.values()), None)
+        if label is None:
+            base = candidates[-1] if candidates else "Topic"
+            label = next(f"{base} ({n})" for n in range(1, k + 2) if f"{base} ({n})" not in names.values())
+        names[int(cluster)] = label
+    clusters = [
+        {"id": cluster, "label": names[cluster], "keywords": keywords[cluster], "papers": int(sizes[cluster])}
+        for cluster in range(k)
+    ]
+    
+    year_totals = cluster_years.sum(axis=0)
+    recent_total = year_totals[-RECENT_YEARS:].sum()
+    topic_evolution = []
+    for cluster in range(k):
+        series = cluster_years[cluster]
+        if not series.any():
+            continue
+        seen = np.flatnonzero(series)
+        # Share of recent papers over share of all dated papers: above 1 means gaining ground
+        overall_share = series.sum() / year_totals.sum()
+        recent_share = series[-RECENT_YEARS:].sum() / recent_total if recent_total else 0
+        topic_evolution.append({
+            "topic": clusters[cluster]["label"],
+            "timeline": {str(year): int(count) for year, count in zip(span, series)},
+            "recent_momentum": round(float(recent_share / overall_share), 2),
+            "first_seen": str(span[seen[0]]),
+            "last_seen": str(span[seen[-1]])
+        })
+    topic_evolution.sort(key=lambda t: t["recent_momentum"], reverse=True)
+    
+    organism_trends = []
+    for organism in np.argsort(-organism_totals, kind="stable")[:top_organisms]:
+        series = organism_years[organism]
+        velocity = _change(series)
+        organism_trends.append({
+            "organism": organisms.labels[organism],
+            "total_papers": int(organism_totals[organism]),
+            "trend_data": {str(year): int(count) for year, count in zip(span, series)},
+            "velocity": velocity,
+            "status": "rising" if velocity > 30 else "declining" if velocity < -30 else "stable"
+        })
+    
+    top_clusters = sorted(clusters, key=lambda c: c["papers"], reverse=True)[:10]
+    return {
+        "version": ARTIFACT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "papers": len(paper_ids),
+        "clusters": clusters,
+        "years": span,
+        "cluster_year_counts": cluster_years.tolist(),
+        "organism_year_counts": {organisms.labels[i]: organism_years[i].tolist() for i in range(len(organisms))},
+        "top_topics": {c["label"]: c["papers"] for c in top_clusters},
+        "topic_evolution": topic_evolution,
+        "organism_trends_by_year": organism_trends
+    }
+
+def save_trends_artifact(artifact: Dict[str, Any], path: str):
+    """Write atomically, so the API never reads a half-written artifact."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(artifact, f)
+    os.replace(tmp_path, path)
+
+class TrendsArtifact:
+    """
+    The artifact build_topic_trends.py writes, read on first use and again whenever
+    the file's mtime changes, so a scheduled rebuild is picked up without a restart.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._loaded: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+    
+    def get(self) -> Optional[Dict[str, Any]]:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != mtime:
+                try:
+                    with open(self.path, 'r') as f:
+                        artifact = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Could not load trends artifact {self.path}: {e}")
+                    return self._loaded[1] if self._loaded else None
+                if artifact.get("version") != ARTIFACT_VERSION:
+                    print(f"Ignoring trends artifact {self.path}: version {artifact.get('version')}, expected {ARTIFACT_VERSION}")
+                    return None
+                self._loaded = (mtime, artifact)
+            return self._loaded[1]
+
+@lru_cache()
+def get_trends_artifact() -> Optional[TrendsArtifact]:
+    """The process-wide trends artifact, or None when TRENDS_ARTIFACT_PATH is empty."""
+    if not settings.trends_artifact_path:
+        return None
+    return TrendsArtifact(settings.trends_artifact_path)
@@ -1,31 +1,124 @@
-from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional
 from app.models.schemas import ChunkMetadata, PaperMetadata
+from app.services.artifact_cache import EmbeddingCache
+from app.services.chunk_store import ChunkStore
 from app.services.embeddings import EmbeddingService
+from app.services.index_aliases import IndexAliasRegistry
+from app.services.local_index import LocalVectorClient
+from app.services.metrics import timed
+from app.services.resilience import UpstreamUnavailable, call_upstream, mark_degraded
+from app.services.shared_cache import SharedCache, get_shared_cache
 from app.config import get_settings
 import time
 
 settings = get_settings()
 
+# Metadata kept on vectors in slim mode: what search filters and reranking need
+SLIM_METADATA_FIELDS = ["year", "section", "organisms", "paper_id"]
+
+def rerank_matches(
+    matches,
+    boost_sections: Optional[List[str]] = None,
+    min_score: float = 0.30,
+    section_boost: float = 1.15,
+    recency_boost: float = 1.05,
+    recency_year: int = 2020
+) -> List[Dict[str, Any]]:
+    """Boost index matches from preferred sections and recent papers, drop low scores, best first."""
+    reranked_results = []
+    for match in matches:
+        score = match.score
+        metadata = match.metadata
+        
+        if boost_sections and metadata.get("section") in boost_sections:
+            score *= section_boost
+        
+        year = metadata.get("year")
+        if year:
+            try:
+                year_int = int(float(str(year)))
+                if year_int >= recency_year:
+                    score *= recency_boost
+            except (ValueError, TypeError):
+                pass
+        
+        reranked_results.append({
+            "id": match.id,
+            "score": score,
+            "metadata": metadata
+        })
+    
+    filtered_results = [
+        r for r in reranked_results 
+        if r["score"] >= min_score
+    ]
+    
+    filtered_results.sort(key=lambda x: x["score"], reverse=True)
+    return filtered_results
+
+def create_vector_client():
+    """Pinecone, or the on-disk stand-in with VECTOR_BACKEND=local for offline work."""
+    if settings.vector_backend == "local":
+        return LocalVectorClient(settings.local_index_path)
+    # Imported here so processes that never touch Pinecone do not load its SDK
+    from pinecone import Pinecone
+    return Pinecone(api_key=settings.pinecone_api_key)
+
 class VectorStore:
-    def __init__(self):
-        self.pc = Pinecone(api_key=settings.pinecone_api_key)
-        self.embedding_service = EmbeddingService()
-        self.index_name = settings.pinecone_index_name
+    def __init__(
+        self,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        index_name: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        generation: Optional[Dict[str, Any]] = None
+    ):
+        """
+        index_name is either a physical index or an alias in the index alias registry;
+        an alias is re-resolved whenever the registry changes. Passing a generation
+        target pins the store to that generation, e.g. while it is being built.
+        """
+        self.pc = create_vector_client()
+        self.embedding_service = EmbeddingService(cache=embedding_cache, dimensions=dimensions)
+        self.dimensions = self.embedding_service.dimensions
+        self.alias = index_name or settings.pinecone_index_name
+        self.aliases = IndexAliasRegistry(settings.index_alias_path)
+        self.generation = generation
+        self.index_name = self.alias
+        self.namespace = ""
         self.index = None
+        self.chunk_store = ChunkStore(settings.chunk_store_path) if settings.slim_vector_metadata else None
+        self.shared_cache = get_shared_cache()
+        # (index, namespace, limit), time loaded, results of get_all_papers_metadata
+        self._corpus_metadata = None
+        # Last vector_count per namespace, reported while the index is unreachable
+        self._vector_counts: Dict[str, int] = {}
         
     def initialize_index(self):
+        target = self.generation or self.aliases.resolve(self.alias)
+        if target:
+            self.index_name = target["index"]
+            self.namespace = target["namespace"]
+            self.dimensions = target["dimensions"]
+            self.embedding_service.dimensions = target["dimensions"]
+            if settings.slim_vector_metadata:
+                self.chunk_store = ChunkStore(target.get("chunk_store") or settings.chunk_store_path)
+        
         existing_indexes = [index.name for index in self.pc.list_indexes()]
         
         if self.index_name not in existing_indexes:
-            self.pc.create_index(
-                name=self.index_name,
-                dimension=settings.embedding_dimensions,
-                metric="cosine",
-                spec=ServerlessSpec(
+            spec = None
+            if settings.vector_backend != "local":
+                from pinecone import ServerlessSpec
+                spec = ServerlessSpec(
                     cloud="aws",
                     region=settings.pinecone_environment
                 )
+            self.pc.create_index(
+                name=self.index_name,
+                dimension=self.dimensions,
+                metric="cosine",
+                spec=spec
             )
             
             while not self.pc.describe_index(self.index_name).status['ready']:
@@ -33,17 +126,22 @@ class VectorStore:
         
         self.index = self.pc.Index(self.index_name)
     
-    def upsert_chunks(self, chunks: List[ChunkMetadata], batch_size: int = 100):
-        if not self.index:
+    def _ensure_index(self):
+        if not self.index or (not self.generation and self.aliases.changed()):
             self.initialize_index()
+    
+    def upsert_chunks(self, chunks: List[ChunkMetadata], batch_size: int = 100, flush_store: bool = True):
+        self._ensure_index()
         
         texts = [chunk.text for chunk in chunks]
         embeddings = self.embedding_service.generate_embeddings_batch(texts, batch_size)
         
+        vector_ids = [f"{chunk.paper_id}_chunk_{chunk.chunk_index}" for chunk in chunks]
+        if self.chunk_store:
+            self.chunk_store.put_chunks(chunks, vector_ids, flush=flush_store)
+        
         vectors = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            vector_id = f"{chunk.paper_id}_chunk_{chunk.chunk_index}"
-            
+        for vector_id, chunk, embedding in zip(vector_ids, chunks, embeddings):
             metadata = chunk.metadata.copy()
             metadata.update({
                 "paper_id": chunk.paper_id,
@@ -52,6 +150,10 @@ class VectorStore:
                 "text": chunk.text[:2000]
             })
             
+            if self.chunk_store:
+                # Pinecone rejects null metadata values
+                metadata = {k: metadata[k] for k in SLIM_METADATA_FIELDS if metadata.get(k) is not None}
+            
             vectors.append({
                 "id": vector_id,
                 "values": embedding,
@@ -60,17 +162,62 @@ class VectorStore:
         
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
-            self.index.upsert(vectors=batch)
+            self.index.upsert(vectors=batch, namespace=self.namespace)
         
         print(f"Upserted {len(vectors)} vectors to Pinecone")
     
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], batch_size: int = 100, workers: int = 1):
+        """Upsert precomputed {id, values, metadata} vectors, e.g. when copying between indexes."""
+        self._ensure_index()
+        
+        batches = [vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size)]
+        if workers <= 1:
+            for batch in batches:
+                self.index.upsert(vectors=batch, namespace=self.namespace)
+            return
+        
+        # Upserts are network-bound, so parallel requests make bulk loads several times faster
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda batch: self.index.upsert(vectors=batch, namespace=self.namespace), batches))
+    
+    def delete_vectors(self, ids: List[str], batch_size: int = 1000, workers: int = 4):
+        self._ensure_index()
+        
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            list(executor.map(lambda batch: self.index.delete(ids=batch, namespace=self.namespace), batches))
+        
+        if self.chunk_store:
+            self.chunk_store.remove(ids)
+    
+    def list_vector_ids(self, batch_size: int = 100) -> Iterator[List[str]]:
+        """Page through every vector ID in the index."""
+        self._ensure_index()
+        
+        yield from self.index.list(limit=batch_size, namespace=self.namespace)
+    
+    def fetch_vectors(self, ids: List[str]) -> List[Dict[str, Any]]:
+        self._ensure_index()
+        
+        response = self.index.fetch(ids=ids, namespace=self.namespace)
+        return [
+            {
+                "id": vector_id,
+                "values": list(vector.values),
+                "metadata": dict(vector.metadata or {})
+            }
+            for vector_id, vector in response.vectors.items()
+        ]
+    
     def upsert_papers(self, papers_data: List[tuple[PaperMetadata, List[ChunkMetadata]]]):
-        if not self.index:
-            self.initialize_index()
+        self._ensure_index()
         
         for metadata, chunks in papers_data:
             print(f"Uploading {metadata.file_path}...")
-            self.upsert_chunks(chunks)
+            self.upsert_chunks(chunks, flush_store=False)
+        
+        if self.chunk_store:
+            self.chunk_store.flush()
     
     def search(
         self, 
@@ -78,21 +225,18 @@ class VectorStore:
         top_k: int = 10,
         filter_dict: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        if not self.index:
-            self.initialize_index()
+        self._ensure_index()
         
         query_embedding = self.embedding_service.generate_embedding(query)
         fetch_k = min(top_k * 2, 100)
         
-        results = self.index.query(
+        results = self._query(
             vector=query_embedding,
             top_k=fetch_k,
             include_metadata=True,
             filter=filter_dict
         )
         
-        MIN_SCORE_THRESHOLD = 0.30
-        
         filtered_results = [
             {
                 "id": match.id,
@@ -100,10 +244,10 @@ class VectorStore:
                 "metadata": match.metadata
             }
             for match in results.matches
-            if match.score >= MIN_SCORE_THRESHOLD
+            if match.score >= settings.min_score_threshold
         ]
         
-        return filtered_results[:top_k]
+        return self._hydrate(filtered_results[:top_k])
     
     def search_with_reranking(
         self,
@@ -112,63 +256,108 @@ class VectorStore:
         filter_dict: Optional[Dict[str, Any]] = None,
         boost_sections: List[str] = None
     ) -> List[Dict[str, Any]]:
-        if not self.index:
-            self.initialize_index()
-        
-        query_embedding = self.embedding_service.generate_embedding(query)
-        fetch_k = min(top_k * 3, 150)
-        
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=fetch_k,
-            include_metadata=True,
-            filter=filter_dict
-        )
+        self._ensure_index()
         
-        reranked_results = []
-        for match in results.matches:
-            score = match.score
-            metadata = match.metadata
-            
-            if boost_sections and metadata.get("section") in boost_sections:
-                score *= 1.15
-            
-            year = metadata.get("year")
-            if year:
-                try:
-                    year_int = int(float(str(year)))
-                    if year_int >= 2020:
-                        score *= 1.05
-                except (ValueError, TypeError):
-                    pass
-            
-            reranked_results.append({
-                "id": match.id,
-                "score": score,
-                "metadata": metadata
-            })
+        key = None
+        if self.shared_cache and settings.cache_ttl_search:
+            # The resolved index and namespace are part of the key, so promoting a new
+            # generation never serves results from the old one
+            key = SharedCache.key(
+                self.index_name, self.namespace, query, top_k, filter_dict, boost_sections,
+                settings.rerank_fetch_multiplier, settings.rerank_max_fetch, settings.min_score_threshold,
+                settings.section_boost, settings.recency_boost, settings.recency_year
+            )
+            cached = self.shared_cache.get_json("search", key)
+            if cached is not None:
+                return cached
         
-        MIN_SCORE_THRESHOLD = 0.30
-        filtered_results = [
-            r for r in reranked_results 
-            if r["score"] >= MIN_SCORE_THRESHOLD
-        ]
+        fetch_k = min(top_k * settings.rerank_fetch_multiplier, settings.rerank_max_fetch)
+        try:
+            query_embedding = self.embedding_service.generate_embedding(query)
+            results = self._query(
+                vector=query_embedding,
+                top_k=fetch_k,
+                include_metadata=True,
+                filter=filter_dict
+            )
+        except UpstreamUnavailable:
+            if key:
+                cached = self.shared_cache.get_json("search", key, stale=True)
+                if cached is not None:
+                    mark_degraded("search:stale")
+                    return cached
+            raise
         
-        filtered_results.sort(key=lambda x: x["score"], reverse=True)
+        with timed("rerank"):
+            filtered_results = rerank_matches(
+                results.matches,
+                boost_sections,
+                min_score=settings.min_score_threshold,
+                section_boost=settings.section_boost,
+                recency_boost=settings.recency_boost,
+                recency_year=settings.recency_year
+            )
         
-        return filtered_results[:top_k]
+        # Text and paper fields are only loaded for the results actually returned
+        results = self._hydrate(filtered_results[:top_k])
+        if key:
+            self.shared_cache.set_json("search", key, results, settings.cache_ttl_search)
+        return results
+    
+    def _query(self, hedge: bool = True, **kwargs):
+        """
+        Index queries are read-only, so slow ones are hedged. Bulk queries pass
+        hedge=False: the hedge delay is learned from ordinary searches and would
+        duplicate every one of them.
+        """
+        with timed("index_query"):
+            return call_upstream(
+                "vector_index",
+                lambda timeout: self.index.query(namespace=self.namespace, **kwargs),
+                settings.index_query_timeout,
+                hedge=hedge
+            )
+    
+    def _hydrate(self, results: List[Dict[str, Any]], include_text: bool = True) -> List[Dict[str, Any]]:
+        if not self.chunk_store:
+            return results
+        with timed("hydrate"):
+            return self.chunk_store.hydrate(results, include_text=include_text)
     
     def get_all_metadata(self) -> Dict[str, Any]:
-        if not self.index:
-            self.initialize_index()
+        self._ensure_index()
     
         stats = self.index.describe_index_stats()
         return stats
     
+    def vector_count(self) -> int:
+        """Vectors in the namespace this store reads, not the whole physical index."""
+        self._ensure_index()
+        
+        try:
+            stats = call_upstream("vector_index", lambda timeout: self.index.describe_index_stats(), settings.index_query_timeout)
+        except UpstreamUnavailable:
+            if self.namespace in self._vector_counts:
+                mark_degraded("vector_count:stale")
+                return self._vector_counts[self.namespace]
+            raise
+        summary = stats.namespaces.get(self.namespace)
+        self._vector_counts[self.namespace] = summary.vector_count if summary else 0
+        return self._vector_counts[self.namespace]
+    
     def get_all_papers_metadata(self, limit: int = 10000) -> List[Dict[str, Any]]:
-        """Fetch ALL papers metadata by querying with multiple diverse terms"""
-        if not self.index:
-            self.initialize_index()
+        """
+        Fetch ALL papers metadata by querying with multiple diverse terms.
+        Kept in memory for corpus_metadata_ttl seconds, and past that while the index
+        or OpenAI is unavailable; stats, filters, trends and gaps all start from it.
+        Callers must not modify the returned results.
+        """
+        self._ensure_index()
+        
+        cache_key = (self.index_name, self.namespace, limit)
+        if self._corpus_metadata and self._corpus_metadata[0] == cache_key:
+            if time.monotonic() - self._corpus_metadata[1] < settings.corpus_metadata_ttl:
+                return self._corpus_metadata[2]
         
         diverse_queries = [
             "space biology research",
@@ -187,13 +376,20 @@ class VectorStore:
         seen_ids = set()
         
         for query_text in diverse_queries:
-            query_embedding = self.embedding_service.generate_embedding(query_text)
-            
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=10000,
-                include_metadata=True
-            )
+            try:
+                query_embedding = self.embedding_service.generate_embedding(query_text)
+                
+                results = self._query(
+                    vector=query_embedding,
+                    top_k=10000,
+                    include_metadata=True,
+                    hedge=False
+                )
+            except UpstreamUnavailable:
+                if self._corpus_metadata and self._corpus_metadata[0] == cache_key:
+                    mark_degraded("corpus_metadata:stale")
+                    return self._corpus_metadata[2]
+                raise
             
             for match in results.matches:
                 if match.id not in seen_ids:
@@ -208,4 +404,6 @@ class VectorStore:
                 break
         
         print(f"Fetched {len(all_results)} unique vectors using multiple queries")
-        return all_results
+        results = self._hydrate(all_results, include_text=False)
+        self._corpus_metadata = (cache_key, time.monotonic(), results)
+        return results
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark for the span-based chunker against the original string chunker.
+
+Run from the backend directory:
+    python -m benchmarks.bench_chunker --words 200000
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+
+from app.services.chunker import split_text
+
+VOCABULARY = (
+    "microgravity spaceflight radiation bone muscle atrophy gene expression "
+    "mice rats arabidopsis cells tissue osteoblast countermeasure astronaut "
+    "significant increase decrease observed samples exposure analysis"
+).split()
+
+def legacy_split_text_semantically(text: str, target_size: int, overlap: int) -> List[str]:
+    """The chunker as it was before span-based chunking, kept as the reference."""
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    
+    for sentence in sentences:
+        sentence_words = len(sentence.split())
+        
+        if sentence_words > target_size:
+            if current_chunk:
+                chunks.append(" ".join(current_chunk))
+                current_chunk = []
+                current_size = 0
+            
+            words = sentence.split()
+            for i in range(0, len(words), target_size - overlap):
+                chunk = " ".join(words[i:i + target_size])
+                if chunk:
+                    chunks.append(chunk)
+            continue
+        
+        if current_size + sentence_words <= target_size:
+            current_chunk.append(sentence)
+            current_size += sentence_words
+        else:
+            if current_chunk:
+                chunks.append(" ".join(current_chunk))
+            
+            overlap_sentences = []
+            overlap_size = 0
+            for s in reversed(current_chunk):
+                s_words = len(s.split())
+                if overlap_size + s_words <= overlap:
+                    overlap_sentences.insert(0, s)
+                    overlap_size += s_words
+                else:
+                    break
+            
+            current_chunk = overlap_sentences + [sentence]
+            current_size = overlap_size + sentence_words
+    
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    
+    return chunks
+
+def make_section(words: int, seed: int = 42) -> str:
+    """Synthetic section text with realistic sentence lengths, PDF line breaks and the odd run-on table row."""
+    rng = random.Random(seed)
+    sentences = []
+    total = 0
+    while total < words:
+        length = rng.randint(900, 1500) if rng.random() < 0.002 else rng.randint(4, 40)
+        tokens = [rng.choice(VOCABULARY) for _ in range(length)]
+        for i in range(12, length, 13):
+            tokens[i] += "\n"
+        sentences.append(" ".join(tokens).capitalize() + rng.choice(".!?"))
+        total += length
+    return "  ".join(sentences) + "\n"
+
+def time_call(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    text = make_section(args.words)
+    
+    legacy = legacy_split_text_semantically(text, args.chunk_size, args.chunk_overlap)
+    chunks = split_text(text, args.chunk_size, args.chunk_overlap)
+    
+    if legacy != [chunk for _, chunk in chunks]:
+        raise SystemExit("Span chunker output differs from the legacy chunker")
+    
+    legacy_time = time_call(lambda: legacy_split_text_semantically(text, args.chunk_size, args.chunk_overlap), args.repeat)
+    span_time = time_call(lambda: split_text(text, args.chunk_size, args.chunk_overlap), args.repeat)
+    
+    print(f"Section: {args.words:,} words, {len(text):,} chars, {len(chunks)} chunks (identical)")
+    print(f"Legacy chunker: {legacy_time * 1000:8.1f} ms  ({args.words / legacy_time:,.0f} words/s)")
+    print(f"Span chunker:   {span_time * 1000:8.1f} ms  ({args.words / span_time:,.0f} words/s)")
+    print(f"Speedup: {legacy_time / span_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Deterministic local stand-in for the OpenAI client, used by the benchmark suite.
+
+Embeddings are hashed bag-of-words vectors, so texts sharing words come out
+similar and search results are meaningful. Chat completions return fixed JSON
+shaped for whichever prompt LLMService sent. Both can sleep for a configurable
+latency to model the network round-trip.
+"""
+import json
+import re
+import time
+import zlib
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+
+ORGANISMS = ["Mus musculus", "Rattus norvegicus", "Arabidopsis thaliana", "Homo sapiens", "Drosophila melanogaster", "Caenorhabditis elegans"]
+KEYWORDS = ["microgravity", "radiation", "bone loss", "muscle atrophy", "gene expression", "immune response", "plant growth", "countermeasures"]
+CONDITIONS = ["microgravity", "space radiation", "hypergravity", "simulated microgravity"]
+EXPERIMENT_TYPES = ["spaceflight", "ground-based simulation", "in vitro", "review"]
+
+WORD_PATTERN = re.compile(r'[a-z]{4,}')
+
+# Weight of a direction shared by every text. Real embeddings of same-domain text
+# are never orthogonal; this puts unrelated texts at a similarity of about 0.33,
+# so the 0.30 score floor in search behaves much as it does in production.
+DOMAIN_WEIGHT = 0.7
+
+def hashed_embedding(text: str, dimensions: int) -> List[float]:
+    words = np.zeros(dimensions)
+    for word in WORD_PATTERN.findall(text.lower()):
+        words[zlib.crc32(word.encode()) % dimensions] += 1.0
+    norm = np.linalg.norm(words)
+    vector = np.full(dimensions, DOMAIN_WEIGHT / np.sqrt(dimensions))
+    if norm:
+        vector += words / norm
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def _pick(options: List[str], seed: int, count: int) -> List[str]:
+    return [options[(seed + i * 7) % len(options)] for i in range(count)]
+
+def chat_reply(system_prompt: str, prompt: str) -> str:
+    seed = zlib.crc32(prompt.encode())
+    if "extraction" in system_prompt:
+        reply = {
+            "title": f"Space biology study {seed % 10000}",
+            "authors": ["A. Researcher", "B. Scientist"],
+            "year": 2005 + seed % 20,
+            "doi": None,
+            "abstract": prompt[:300],
+            "organisms": _pick(ORGANISMS, seed, 1 + seed % 2),
+            "keywords": _pick(KEYWORDS, seed, 3),
+            "experiment_type": EXPERIMENT_TYPES[seed % len(EXPERIMENT_TYPES)],
+            "space_conditions": _pick(CONDITIONS, seed, 1),
+            "findings_summary": "Exposure changed the measured outcome relative to ground controls."
+        }
+    elif "systematic reviews" in system_prompt:
+        reply = {
+            "consensus_points": ["Microgravity reduces bone density across rodent studies"],
+            "disagreements": ["Magnitude of muscle loss varies with mission length"],
+            "confidence": "medium",
+            "summary": "Studies broadly agree on direction but not on magnitude."
+        }
+    elif "gap analysis" in system_prompt:
+        reply = {
+            "under_researched_areas": ["Reproductive biology in long-duration flight"],
+            "missing_approaches": ["Multi-omics time series"],
+            "critical_questions": ["What is the minimum effective artificial gravity dose?"],
+            "recommendations": ["Fly paired rodent and plant experiments"]
+        }
+    else:
+        reply = {
+            "summary": "The excerpts describe physiological adaptation to spaceflight.",
+            "key_points": ["Bone loss is consistent", "Countermeasures are partially effective"]
+        }
+    return json.dumps(reply)
+
+class FakeOpenAI:
+    # Seconds per call; set through install()
+    embedding_latency = 0.0
+    chat_latency = 0.0
+    
+    def __init__(self, *args, **kwargs):
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+    
+    def _create_embeddings(self, input, model: str, dimensions: int = 1536, **kwargs):
+        if self.embedding_latency:
+            time.sleep(self.embedding_latency)
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=hashed_embedding(text, dimensions)) for text in texts],
+            usage=SimpleNamespace(prompt_tokens=sum(len(text.split()) for text in texts), completion_tokens=0)
+        )
+    
+    def _create_completion(self, model: str, messages: list, **kwargs):
+        if self.chat_latency:
+            time.sleep(self.chat_latency)
+        content = chat_reply(messages[0]["content"], messages[-1]["content"])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(messages[-1]["content"].split()), completion_tokens=len(content.split()))
+        )
+    
+    def close(self):
+        pass
+
+def install(embedding_latency_ms: float = 0.0, chat_latency_ms: float = 0.0):
+    """Swap the OpenAI client the services share; call before any service is constructed."""
+    import openai
+    from app.services.openai_client import get_openai_client
+    
+    FakeOpenAI.embedding_latency = embedding_latency_ms / 1000
+    FakeOpenAI.chat_latency = chat_latency_ms / 1000
+    openai.OpenAI = FakeOpenAI
+    get_openai_client.cache_clear()
@@ -0,0 +1,296 @@
+"""
+Load test: replays search -> summarize -> consensus sessions built from the
+persona queries in test_personas.py, with open-loop (Poisson) arrivals, and steps
+the arrival rate up until the server saturates.
+
+OpenAI is stubbed with benchmarks.fakes (with realistic latency by default) and
+Pinecone with the local index, in a workspace seeded with generated papers.
+
+In-process (one app instance sharing the client's event loop):
+    python -m benchmarks.load_test --rates 0.5,1,2,4
+Over localhost, starting uvicorn with each worker count in turn:
+    python -m benchmarks.load_test --mode http --workers 1,2,4 --rates 1,2,4,8,16
+Against a server that is already running (stub it yourself):
+    python -m benchmarks.load_test --mode http --url http://localhost:8000 --rates 1,2,4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks import fakes
+from benchmarks.run_suite import BACKEND_DIR, enter_workspace, generate_pdfs, git_revision, latency_stats
+
+ENDPOINTS = ["search", "summarize", "consensus"]
+
+# A step is saturated when sessions complete (including the drain after the last
+# arrival) at less than this fraction of the rate they arrived at, any are dropped,
+# more than MAX_ERROR_RATE of requests fail, or search p99 exceeds --slo-p99-ms
+MIN_THROUGHPUT_RATIO = 0.9
+MAX_ERROR_RATE = 0.01
+
+class LoadStep:
+    """Latencies and outcomes of one arrival-rate step."""
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = 0
+        self.completed = 0
+        self.dropped = 0
+    
+    async def request(self, client: httpx.AsyncClient, endpoint: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"/api/{endpoint}", json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        persona, _, weight = part.partition("=")
+        weights[persona.strip()] = float(weight or 1)
+    return weights
+
+async def run_session(client: httpx.AsyncClient, step: LoadStep, persona: str, query: str, think_time: float):
+    search = await step.request(client, "search", {"query": query, "top_k": 5})
+    if not search or not search.get("results"):
+        return
+    await asyncio.sleep(think_time)
+    summary = await step.request(client, "summarize", {"query": query, "results": search["results"], "persona": persona})
+    if summary is None:
+        return
+    await asyncio.sleep(think_time)
+    if await step.request(client, "consensus", {"topic": query, "results": search["results"]}) is not None:
+        step.completed += 1
+
+async def run_step(
+    client: httpx.AsyncClient,
+    rate: float,
+    duration: float,
+    concurrency: int,
+    sessions: Dict[str, List[str]],
+    weights: Dict[str, float],
+    think_time: float,
+    seed: int
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    personas = list(weights)
+    step = LoadStep()
+    in_flight = set()
+    
+    start = time.perf_counter()
+    next_arrival = start
+    while True:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        if len(in_flight) >= concurrency:
+            # The client-side queue is full: the server is not keeping up
+            step.dropped += 1
+            continue
+        persona = rng.choices(personas, weights=[weights[p] for p in personas])[0]
+        task = asyncio.create_task(run_session(client, step, persona, rng.choice(sessions[persona]), think_time))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        step.started += 1
+    if in_flight:
+        await asyncio.wait(in_flight)
+    elapsed = time.perf_counter() - start
+    
+    requests = sum(len(samples) for samples in step.latencies.values())
+    errors = sum(step.errors.values())
+    result = {
+        "offered_rate": rate,
+        # Poisson arrivals only approximate the nominal rate over a short step
+        "arrivals_per_s": round((step.started + step.dropped) / duration, 3),
+        "started": step.started,
+        "completed": step.completed,
+        "dropped": step.dropped,
+        "seconds": round(elapsed, 2),
+        "sessions_per_s": round(step.completed / elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 3),
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "endpoints": {
+            endpoint: {**latency_stats(step.latencies[endpoint]), "errors": step.errors[endpoint]}
+            for endpoint in ENDPOINTS if step.latencies[endpoint]
+        }
+    }
+    return result
+
+def is_saturated(result: Dict[str, Any], slo_p99_ms: Optional[float]) -> bool:
+    if result["sessions_per_s"] < MIN_THROUGHPUT_RATIO * result["arrivals_per_s"] or result["dropped"]:
+        return True
+    if result["error_rate"] > MAX_ERROR_RATE:
+        return True
+    search = result["endpoints"].get("search")
+    return bool(slo_p99_ms and search and search["p99_ms"] > slo_p99_ms)
+
+async def sweep_rates(client: httpx.AsyncClient, args, sessions: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Run each rate in turn, stopping after the first saturated step."""
+    steps = []
+    saturation_point = None
+    for i, rate in enumerate(args.rates):
+        result = await run_step(client, rate, args.duration, args.concurrency, sessions, args.mix, args.think_ms / 1000, seed=i)
+        result["saturated"] = is_saturated(result, args.slo_p99_ms)
+        steps.append(result)
+        print_step(result)
+        if result["saturated"]:
+            break
+        saturation_point = rate
+    return {"steps": steps, "max_sustained_rate": saturation_point}
+
+def print_step(result: Dict[str, Any]):
+    latencies = "  ".join(
+        f"{endpoint} p50 {stats['p50_ms']:7.0f} p99 {stats['p99_ms']:7.0f} ms"
+        for endpoint, stats in result["endpoints"].items()
+    )
+    print(f"  {result['offered_rate']:6.2f}/s offered -> {result['sessions_per_s']:6.2f}/s completed, "
+          f"{result['dropped']} dropped, {result['error_rate']:.1%} errors{'  SATURATED' if result['saturated'] else ''}")
+    if latencies:
+        print(f"          {latencies}")
+
+def seed_index(papers: int, pages: int):
+    """Ingest the generated papers; cached artifacts make this nearly free on a reused workspace."""
+    from app.services.ingestion import IngestionPipeline
+    
+    pipeline = IngestionPipeline()
+    pdf_paths = generate_pdfs(Path("data/pdfs").resolve(), papers, pages)
+    for path in pdf_paths:
+        pipeline.ingest_file(str(path))
+    pipeline.finish()
+
+async def wait_until_healthy(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout:.0f}s")
+
+async def run_against_url(url: str, args, sessions: Dict[str, List[str]]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await sweep_rates(client, args, sessions)
+
+def start_server(workers: int, port: int, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")])),
+        "BENCH_EMBEDDING_LATENCY_MS": str(args.embedding_latency_ms),
+        "BENCH_CHAT_LATENCY_MS": str(args.chat_latency_ms)
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.stub_app:app",
+         "--workers", str(workers), "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+
+async def main_async(args) -> Dict[str, Any]:
+    from test_personas import ARCHITECT_QUERIES, INVESTOR_QUERIES, SCIENTIST_QUERIES
+    
+    sessions = {"scientist": SCIENTIST_QUERIES, "investor": INVESTOR_QUERIES, "architect": ARCHITECT_QUERIES}
+    unknown = set(args.mix) - set(sessions)
+    if unknown:
+        raise SystemExit(f"Unknown personas in --mix: {', '.join(sorted(unknown))}")
+    
+    runs = {}
+    if args.mode == "inprocess":
+        from app.main import app
+        
+        print("In-process:")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            runs["in-process"] = await sweep_rates(client, args, sessions)
+    elif args.url:
+        print(f"{args.url}:")
+        runs[args.url] = await run_against_url(args.url, args, sessions)
+    else:
+        for workers in args.workers:
+            url = f"http://127.0.0.1:{args.port}"
+            print(f"{workers} worker(s):")
+            server = start_server(workers, args.port, args)
+            try:
+                await wait_until_healthy(url)
+                runs[f"workers={workers}"] = await run_against_url(url, args, sessions)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    return runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", help="http mode: test this running server instead of starting one")
+    parser.add_argument("--workers", default="1,2,4", help="http mode: uvicorn worker counts to compare")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rates", default="0.5,1,2,4,8", help="Session arrival rates (per second) to step through")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals per rate step")
+    parser.add_argument("--concurrency", type=int, default=64, help="Most sessions in flight; arrivals beyond it are dropped")
+    parser.add_argument("--mix", default="scientist=1,investor=1,architect=1", help="Persona weights")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between the requests of a session")
+    parser.add_argument("--slo-p99-ms", type=float, help="Also treat a step as saturated when search p99 exceeds this")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--shared-cache", action="store_true", help="Serve with the cross-worker cache enabled")
+    parser.add_argument("--workdir", help="Workspace with the seeded index (default: a fresh temporary directory)")
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args()
+    
+    args.rates = [float(r) for r in args.rates.split(",")]
+    args.workers = [int(w) for w in args.workers.split(",")]
+    args.mix = parse_mix(args.mix)
+    output_path = Path(args.output).resolve()
+    
+    workdir = enter_workspace(args.workdir, shared_cache=args.shared_cache)
+    print(f"Workspace: {workdir}")
+    if not args.url:
+        # Seed without upstream latency, then serve with it
+        fakes.install()
+        seed_index(args.papers, args.pages)
+        fakes.install(args.embedding_latency_ms, args.chat_latency_ms)
+    print("-" * 60)
+    
+    runs = asyncio.run(main_async(args))
+    
+    print("-" * 60)
+    for name, run in runs.items():
+        sustained = run["max_sustained_rate"]
+        print(f"{name}: {'saturated at the lowest rate' if sustained is None else f'sustains {sustained}/s sessions'}")
+    
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "config": {**vars(args), "mix": args.mix},
+        "runs": runs
+    }
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+if __name__ == "__main__":
+    main()
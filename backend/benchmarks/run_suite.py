@@ -0,0 +1,289 @@
+"""
+Offline performance suite: PDF extraction, chunking, ingestion and API latency.
+
+OpenAI is replaced by benchmarks.fakes and Pinecone by the on-disk local index
+(VECTOR_BACKEND=local), so no keys or network are needed and runs are repeatable.
+Everything runs in a scratch workspace with generated PDFs; results are written
+as JSON so two commits can be compared.
+
+Run from the backend directory:
+    python -m benchmarks.run_suite --output bench.json
+    python -m benchmarks.run_suite --output bench.json --baseline bench_main.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import fakes
+from benchmarks.bench_chunker import VOCABULARY, make_section
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SECTION_HEADINGS = ["Introduction", "Materials and Methods", "Results", "Discussion", "Conclusion"]
+
+def make_paper_pdf(path: Path, seed: int, pages: int):
+    """A synthetic paper with a title block, abstract and the usual section headings."""
+    import fitz
+    
+    rng = random.Random(seed)
+    
+    def paragraph(sentences: int) -> str:
+        return " ".join(
+            " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(6, 28))).capitalize() + "."
+            for _ in range(sentences)
+        )
+    
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        if page_num == 0:
+            text = f"Effects of Spaceflight on {rng.choice(VOCABULARY).title()} Study {seed}\nA. Researcher, B. Scientist\n\nAbstract\n"
+        else:
+            text = SECTION_HEADINGS[(page_num - 1) * len(SECTION_HEADINGS) // max(pages - 1, 1)] + "\n"
+        text += paragraph(22)
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), text, fontsize=8)
+    doc.save(str(path))
+    doc.close()
+
+def generate_pdfs(pdf_directory: Path, papers: int, pages: int) -> List[Path]:
+    """Papers already generated in a reused workspace are kept."""
+    pdf_directory.mkdir(parents=True, exist_ok=True)
+    pdf_paths = []
+    for i in range(papers):
+        path = pdf_directory / f"bench_{i:04d}.pdf"
+        if not path.exists():
+            make_paper_pdf(path, seed=i, pages=pages)
+        pdf_paths.append(path)
+    return pdf_paths
+
+def enter_workspace(workdir: Optional[str] = None, shared_cache: bool = False) -> Path:
+    """
+    Point the app at an offline workspace: local index, dummy keys, and the
+    workspace as the working directory for its relative data/ paths. Settings are
+    read on first use, so this must run before the app is imported.
+    
+    The shared cache is off unless asked for, so repeated requests measure the
+    work rather than cache hits.
+    """
+    workspace = Path(workdir or tempfile.mkdtemp(prefix="bench_")).resolve()
+    workspace.mkdir(parents=True, exist_ok=True)
+    os.environ.update({
+        "OPENAI_API_KEY": "offline",
+        "PINECONE_API_KEY": "offline",
+        "PINECONE_ENVIRONMENT": "local",
+        "PINECONE_INDEX_NAME": "bench",
+        "VECTOR_BACKEND": "local",
+        "SHARED_CACHE_PATH": "data/cache/shared.sqlite" if shared_cache else ""
+    })
+    os.chdir(workspace)
+    sys.path.insert(0, str(BACKEND_DIR))
+    return workspace
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    ms = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3)
+    }
+
+def time_calls(fn: Callable[[int], Any], count: int, warmup: int = 1) -> List[float]:
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def bench_pdf_extraction(pdf_paths: List[Path], repeat: int) -> Dict[str, Any]:
+    from app.services.pdf_processor import PDFProcessor
+    
+    processor = PDFProcessor()
+    pages = sum(len(processor.read_pdf(str(p)).pages) for p in pdf_paths)
+    size_mb = sum(p.stat().st_size for p in pdf_paths) / 1e6
+    
+    best = min(time_calls(lambda _: [processor.read_pdf(str(p)) for p in pdf_paths], repeat, warmup=0))
+    return {
+        "papers": len(pdf_paths),
+        "pages": pages,
+        "seconds": round(best, 4),
+        "pages_per_s": round(pages / best, 1),
+        "mb_per_s": round(size_mb / best, 2)
+    }
+
+def bench_chunker(words: int, repeat: int) -> Dict[str, Any]:
+    from app.config import get_settings
+    from app.services.pdf_processor import PDFProcessor
+    
+    settings = get_settings()
+    processor = PDFProcessor()
+    text = make_section(words)
+    chunks = len(processor._split_text_semantically(text, settings.chunk_size, settings.chunk_overlap))
+    
+    best = min(time_calls(
+        lambda _: processor._split_text_semantically(text, settings.chunk_size, settings.chunk_overlap),
+        repeat,
+        warmup=0
+    ))
+    return {
+        "words": words,
+        "chunks": chunks,
+        "seconds": round(best, 4),
+        "words_per_s": round(words / best)
+    }
+
+def bench_ingest(pdf_paths: List[Path]) -> Dict[str, Any]:
+    """Cold ingest into an empty workspace, then a warm re-run served by the artifact and embedding caches."""
+    from app.services.ingestion import IngestionPipeline
+    
+    pipeline = IngestionPipeline()
+    results = {}
+    for run in ("cold", "warm"):
+        start = time.perf_counter()
+        chunks = 0
+        for path in pdf_paths:
+            chunks += pipeline.ingest_file(str(path)) or 0
+        pipeline.finish()
+        elapsed = time.perf_counter() - start
+        results[run] = {
+            "papers": len(pdf_paths),
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "chunks_per_s": round(chunks / elapsed, 1),
+            "papers_per_s": round(len(pdf_paths) / elapsed, 2)
+        }
+    return results
+
+def bench_api(requests: int) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from test_personas import ARCHITECT_QUERIES, INVESTOR_QUERIES, SCIENTIST_QUERIES
+    
+    queries = SCIENTIST_QUERIES + INVESTOR_QUERIES + ARCHITECT_QUERIES
+    client = TestClient(app)
+    
+    def call(method: str, path: str, **kwargs):
+        response = client.request(method, path, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text[:200]}")
+    
+    return {
+        "search": latency_stats(time_calls(
+            lambda i: call("POST", "/api/search", json={"query": queries[i % len(queries)], "top_k": 10}),
+            requests
+        )),
+        "trends": latency_stats(time_calls(lambda _: call("GET", "/api/trends"), requests)),
+        "gaps": latency_stats(time_calls(lambda _: call("POST", "/api/gaps", json={}), requests))
+    }
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def print_comparison(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Throughput (_per_s) should go up and timings (_ms, seconds) down; counts are not compared."""
+    current = flatten(results)
+    previous = flatten(baseline["results"])
+    print(f"\nCompared with {(baseline.get('git') or {}).get('commit') or 'baseline'}:")
+    for name, value in current.items():
+        if name not in previous or not previous[name]:
+            continue
+        if not (name.endswith("_per_s") or name.endswith("_ms") or name.endswith("seconds")):
+            continue
+        change = (value - previous[name]) / previous[name] * 100
+        better = change > 0 if name.endswith("_per_s") else change < 0
+        flag = "" if abs(change) < 5 else ("  better" if better else "  WORSE")
+        print(f"  {name:40s} {previous[name]:>12,.3f} -> {value:>12,.3f}  ({change:+6.1f}%){flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--workdir", help="Workspace for generated PDFs and indexes (default: a fresh temporary directory; "
+                        "a reused one keeps its caches, so the cold ingest is no longer cold)")
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=8, help="Pages per generated paper")
+    parser.add_argument("--chunker-words", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per API endpoint")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats for the extraction and chunker timings (best is kept)")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    output_path = Path(args.output).resolve()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    
+    workdir = enter_workspace(args.workdir)
+    fakes.install(args.embedding_latency_ms, args.chat_latency_ms)
+    
+    print(f"Workspace: {workdir}")
+    pdf_paths = generate_pdfs(workdir / "data" / "pdfs", args.papers, args.pages)
+    
+    results = {}
+    print("-" * 60)
+    print("PDF extraction...")
+    results["pdf_extraction"] = bench_pdf_extraction(pdf_paths, args.repeat)
+    print("Chunker...")
+    results["chunker"] = bench_chunker(args.chunker_words, args.repeat)
+    print("Ingest...")
+    results["ingest"] = bench_ingest(pdf_paths)
+    print("API...")
+    results["api"] = bench_api(args.requests)
+    print("-" * 60)
+    
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "results": results
+    }
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    extraction = results["pdf_extraction"]
+    print(f"PDF extraction: {extraction['pages_per_s']:,.1f} pages/s ({extraction['mb_per_s']} MB/s)")
+    print(f"Chunker:        {results['chunker']['words_per_s']:,} words/s")
+    print(f"Ingest:         {results['ingest']['cold']['chunks_per_s']:,.1f} chunks/s cold, "
+          f"{results['ingest']['warm']['chunks_per_s']:,.1f} chunks/s warm")
+    for endpoint, stats in results["api"].items():
+        print(f"/api/{endpoint:8s} p50 {stats['p50_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms")
+    print(f"\nResults written to {output_path}")
+    
+    if baseline:
+        print_comparison(results, baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+The API with benchmarks.fakes in place of OpenAI, for serving it offline:
+    
+    uvicorn benchmarks.stub_app:app --workers 4
+
+Run it in a workspace prepared by benchmarks.run_suite.enter_workspace (the load
+test does this). BENCH_EMBEDDING_LATENCY_MS and BENCH_CHAT_LATENCY_MS set the
+simulated upstream latency.
+"""
+import os
+
+from benchmarks import fakes
+
+fakes.install(
+    float(os.environ.get("BENCH_EMBEDDING_LATENCY_MS", "0")),
+    float(os.environ.get("BENCH_CHAT_LATENCY_MS", "0"))
+)
+
+# Imported after install() so the services are built with the fake client
+from app.main import app
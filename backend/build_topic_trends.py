@@ -0,0 +1,74 @@
+import argparse
+import math
+import sys
+import time
+from typing import Any, Dict, Iterator, List
+from app.config import get_settings
+from app.services.topic_trends import build_trends_artifact, paper_embeddings, save_trends_artifact
+from app.services.vector_store import VectorStore
+
+settings = get_settings()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cluster paper embeddings into topics and precompute the topic and organism yearly trends "
+                    "/api/trends serves (run after ingesting, or on a schedule)"
+    )
+    parser.add_argument("--index", default=settings.pinecone_index_name, help="Index or alias to read vectors from")
+    parser.add_argument("--output", default=settings.trends_artifact_path, help="Artifact path (default: TRENDS_ARTIFACT_PATH)")
+    parser.add_argument("--clusters", type=int, help="Number of topics (default: sqrt(papers / 2), between 2 and 40)")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Papers per mini-batch k-means step")
+    parser.add_argument("--iterations", type=int, default=100, help="Maximum mini-batch steps")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fetch-size", type=int, default=100, help="Vectors fetched per request")
+    args = parser.parse_args()
+    
+    if not args.output:
+        print("Error: no --output given and TRENDS_ARTIFACT_PATH is empty")
+        sys.exit(1)
+    
+    store = VectorStore(index_name=args.index)
+    start = time.time()
+    
+    def vector_batches() -> Iterator[List[Dict[str, Any]]]:
+        fetched = 0
+        for ids in store.list_vector_ids(batch_size=args.fetch_size):
+            vectors = store.fetch_vectors(ids)
+            # In slim mode keywords live in the chunk store, not on the vectors
+            if store.chunk_store:
+                vectors = store.chunk_store.hydrate(vectors, include_text=False)
+            fetched += len(vectors)
+            if fetched % 10000 < len(vectors):
+                print(f"  {fetched} vectors read ({fetched / (time.time() - start):.0f}/s)")
+            yield vectors
+    
+    paper_ids, embeddings, metadata = paper_embeddings(vector_batches())
+    if len(paper_ids) < 2:
+        print(f"Error: {args.index} has {len(paper_ids)} papers; at least 2 are needed to cluster")
+        sys.exit(1)
+    print(f"✓ {len(paper_ids)} paper embeddings ({embeddings.shape[1]} dims) in {time.time() - start:.1f}s")
+    
+    clusters = args.clusters or min(40, max(2, round(math.sqrt(len(paper_ids) / 2))))
+    cluster_start = time.time()
+    artifact = build_trends_artifact(
+        paper_ids,
+        embeddings,
+        metadata,
+        clusters,
+        batch_size=args.batch_size,
+        iterations=args.iterations,
+        seed=args.seed
+    )
+    artifact["source_index"] = store.index_name
+    artifact["source_namespace"] = store.namespace
+    save_trends_artifact(artifact, args.output)
+    
+    print(f"✓ {len(artifact['clusters'])} topics in {time.time() - cluster_start:.1f}s")
+    print("-" * 60)
+    for cluster in sorted(artifact["clusters"], key=lambda c: c["papers"], reverse=True):
+        print(f"  {cluster['papers']:>5}  {cluster['label']}")
+    print("-" * 60)
+    print(f"Artifact: {args.output}")
+
+if __name__ == "__main__":
+    main()
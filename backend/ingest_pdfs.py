@@ -1,5 +1,7 @@
 import sys
 from pathlib import Path
+from app.services.artifact_cache import EmbeddingCache
+from app.services.file_lock import ingest_lock
 from app.services.pdf_processor import PDFProcessor
 from app.services.vector_store import VectorStore
 
@@ -16,22 +18,26 @@ def main():
         print(f"Error: No PDF files found in {pdf_directory}")
         sys.exit(1)
     
+    # Held until exit; ingest jobs and watch_pdfs.py write the same manifest and stores
+    lock = ingest_lock()
+    if not lock.acquire(blocking=False):
+        print("Error: another ingest (an /api/ingest job, watch_pdfs.py or ingest_pdfs.py) is running")
+        sys.exit(1)
+    
     print(f"Found {len(pdf_files)} PDF files to process")
     print("-" * 60)
     
-    # Check if user wants to reprocess (clear cache)
+    processor = PDFProcessor()
+    
+    # Cached stages are keyed by their inputs, so clearing is only needed to force LLM re-extraction
     reprocess = input("Clear cache and reprocess all PDFs? (y/N): ").lower() == 'y'
     if reprocess:
-        cache_dir = Path("data/processed")
-        if cache_dir.exists():
-            for cache_file in cache_dir.glob("*.json"):
-                cache_file.unlink()
-            print("✓ Cache cleared")
+        processor.cache.clear()
+        print("✓ Cache cleared")
     
-    processor = PDFProcessor()
     print("\nProcessing PDFs with improved chunking strategy...")
     print("- Using sentence-aware chunking for semantic coherence")
-    print("- Storing 2x more text in metadata for context")
+    print("- Reusing cached page text, metadata and chunks when their inputs are unchanged")
     print("- Enhanced metadata extraction with more details")
     print("-" * 60)
     
@@ -48,7 +54,7 @@ def main():
     print(f"Average chunks per paper: {avg_chunks:.1f}")
     
     print("\nUploading to Pinecone...")
-    vector_store = VectorStore()
+    vector_store = VectorStore(embedding_cache=EmbeddingCache("data/processed/embeddings.sqlite"))
     vector_store.upsert_papers(papers_data)
     
     print("-" * 60)
@@ -0,0 +1,155 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from app.config import get_settings
+from app.services.embeddings import EmbeddingService, reproject_embeddings
+from app.services.vector_store import VectorStore
+
+settings = get_settings()
+
+RECALL_KS = [1, 5, 10, 50]
+
+def exact_top_k(queries: np.ndarray, corpus: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    """Brute-force cosine top-k over unit vectors; `exclude` masks each query's own row."""
+    scores = queries @ corpus.T
+    if exclude is not None:
+        scores[np.arange(len(queries)), exclude] = -np.inf
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def recall_at_k(baseline: np.ndarray, candidate: np.ndarray, ks: List[int]) -> Dict[str, float]:
+    recalls = {}
+    for k in ks:
+        if k > baseline.shape[1]:
+            continue
+        hits = [len(set(b[:k]) & set(c[:k])) / k for b, c in zip(baseline, candidate)]
+        recalls[f"recall@{k}"] = round(float(np.mean(hits)), 4)
+    return recalls
+
+def compare_recall(corpus: np.ndarray, queries: np.ndarray, dimensions: int, exclude: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """Recall of the reduced-dimension top-k against the full-dimension top-k for the same queries."""
+    k = max(RECALL_KS)
+    baseline = exact_top_k(queries, corpus, k, exclude)
+    
+    reduced_corpus = np.asarray(reproject_embeddings(corpus, dimensions), dtype=np.float32)
+    reduced_queries = np.asarray(reproject_embeddings(queries, dimensions), dtype=np.float32)
+    candidate = exact_top_k(reduced_queries, reduced_corpus, k, exclude)
+    return recall_at_k(baseline, candidate, RECALL_KS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the index into a new index with shortened embeddings")
+    parser.add_argument("--dimensions", type=int, required=True, help="Target dimensions, e.g. 512 or 768")
+    parser.add_argument("--target-index", help="Defaults to <source index>-<dimensions>")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--eval-sample", type=int, default=5000, help="Vectors kept for the recall comparison")
+    parser.add_argument("--eval-queries", type=int, default=200)
+    parser.add_argument("--persona-queries", action="store_true", help="Also evaluate the test_personas.py queries (calls the embeddings API)")
+    parser.add_argument("--report-only", action="store_true", help="Write the recall report without creating the new index")
+    args = parser.parse_args()
+    
+    source = VectorStore()
+    target_index = args.target_index or f"{source.index_name}-{args.dimensions}"
+    if target_index == source.index_name:
+        print("Error: target index must differ from the source index")
+        sys.exit(1)
+    target = None if args.report_only else VectorStore(index_name=target_index, dimensions=args.dimensions)
+    
+    rng = np.random.default_rng(0)
+    sample_vectors: List[List[float]] = []
+    copied = 0
+    source_dimensions = None
+    start = time.time()
+    
+    for ids in source.list_vector_ids(batch_size=args.batch_size):
+        vectors = source.fetch_vectors(ids)
+        if not vectors:
+            continue
+        
+        if source_dimensions is None:
+            source_dimensions = len(vectors[0]["values"])
+            if args.dimensions >= source_dimensions:
+                print(f"Error: source index has {source_dimensions} dimensions; target must be smaller")
+                sys.exit(1)
+        
+        # Reservoir sample so the recall comparison covers the whole index in bounded memory
+        for vector in vectors:
+            seen = copied + 1
+            if len(sample_vectors) < args.eval_sample:
+                sample_vectors.append(vector["values"])
+            else:
+                slot = rng.integers(0, seen)
+                if slot < args.eval_sample:
+                    sample_vectors[slot] = vector["values"]
+            copied += 1
+        
+        if target:
+            reduced = reproject_embeddings([v["values"] for v in vectors], args.dimensions)
+            target.upsert_vectors([
+                {"id": v["id"], "values": values, "metadata": v["metadata"]}
+                for v, values in zip(vectors, reduced)
+            ], batch_size=args.batch_size)
+        
+        if copied % 1000 < len(vectors):
+            print(f"  {copied} vectors processed ({copied / (time.time() - start):.0f}/s)")
+    
+    if not copied:
+        print("Error: source index is empty")
+        sys.exit(1)
+    
+    print(f"\nComparing recall on {len(sample_vectors)} sampled vectors...")
+    corpus = np.asarray(sample_vectors, dtype=np.float32)
+    corpus /= np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+    query_rows = rng.choice(len(corpus), size=min(args.eval_queries, len(corpus)), replace=False)
+    
+    report = {
+        "source_index": source.index_name,
+        "target_index": None if args.report_only else target_index,
+        "embedding_model": settings.embedding_model,
+        "source_dimensions": source_dimensions,
+        "target_dimensions": args.dimensions,
+        "vectors": copied,
+        "eval_corpus": len(corpus),
+        "storage_ratio": round(args.dimensions / source_dimensions, 3),
+        # Chunk-to-chunk neighbours: each sampled chunk queries the rest of the sample
+        "chunk_queries": {
+            "count": len(query_rows),
+            **compare_recall(corpus, corpus[query_rows], args.dimensions, exclude=query_rows)
+        }
+    }
+    
+    if args.persona_queries:
+        from test_personas import SCIENTIST_QUERIES, INVESTOR_QUERIES, ARCHITECT_QUERIES
+        texts = SCIENTIST_QUERIES + INVESTOR_QUERIES + ARCHITECT_QUERIES
+        full_service = EmbeddingService(dimensions=source_dimensions)
+        queries = np.asarray(full_service._embed_texts(texts, 100), dtype=np.float32)
+        report["persona_queries"] = {
+            "count": len(texts),
+            **compare_recall(corpus, queries, args.dimensions)
+        }
+    
+    report_path = Path("data/processed") / f"embedding_migration_{args.dimensions}.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print("-" * 60)
+    for section in ("chunk_queries", "persona_queries"):
+        if section in report:
+            recalls = ", ".join(f"{k}={v}" for k, v in report[section].items() if k.startswith("recall"))
+            print(f"{section}: {recalls}")
+    print(f"Report written to {report_path}")
+    
+    if target:
+        print(f"\n✓ Copied {copied} vectors into {target_index} at {args.dimensions} dimensions")
+        print("To switch over, set:")
+        print(f"  EMBEDDING_DIMENSIONS={args.dimensions}")
+        print(f"  PINECONE_INDEX_NAME={target_index}")
+
+if __name__ == "__main__":
+    main()
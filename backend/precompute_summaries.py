@@ -0,0 +1,121 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+from app.api.routes import PERSONA_CONTEXTS, result_texts, search_filter_dict, transform_results
+from app.config import get_settings
+from app.models.schemas import SearchQuery
+from app.services.container import BOOST_SECTIONS
+from app.services.llm_service import LLMService
+from app.services.metrics import CACHE_REQUESTS
+from app.services.query_log import get_query_log
+from app.services.shared_cache import get_shared_cache
+from app.services.vector_store import VectorStore
+
+settings = get_settings()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute persona summaries of the top papers, and consensus, for the most popular logged searches "
+                    "into the shared cache (run on a schedule, e.g. hourly from cron)"
+    )
+    parser.add_argument("--days", type=int, default=7, help="Days of query log to count")
+    parser.add_argument("--top", type=int, default=50, help="Number of queries to precompute")
+    parser.add_argument("--papers", type=int, default=3, help="Top results per query to summarize")
+    parser.add_argument("--concurrency", type=int, default=4, help="Searches and LLM calls in flight at once")
+    parser.add_argument("--personas", default=",".join(PERSONA_CONTEXTS), help="Comma-separated personas to summarize for")
+    parser.add_argument("--skip-consensus", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="List the queries without calling anything")
+    args = parser.parse_args()
+    
+    query_log = get_query_log()
+    if query_log is None:
+        print("Error: QUERY_LOG_DIRECTORY is empty, so there are no logged queries")
+        sys.exit(1)
+    if get_shared_cache() is None or not settings.cache_ttl_llm:
+        print("Error: the shared LLM cache is disabled (SHARED_CACHE_PATH / CACHE_TTL_LLM); results would be thrown away")
+        sys.exit(1)
+    personas = [p for p in args.personas.split(",") if p]
+    unknown = set(personas) - set(PERSONA_CONTEXTS)
+    if unknown:
+        print(f"Error: unknown personas {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    
+    popular = query_log.popular(args.days, args.top)
+    if not popular:
+        print(f"No queries logged in the last {args.days} days")
+        return
+    
+    print(f"Top {len(popular)} queries over the last {args.days} days:")
+    for entry in popular:
+        print(f"  {entry['requests']:>5}  {entry['query']}" + (f"  filters={entry['filters']}" if entry["filters"] else ""))
+    print("-" * 60)
+    if args.dry_run:
+        return
+    
+    store = VectorStore()
+    llm_service = LLMService()
+    
+    # The same result set and prompts the API would build, so the answers land under the
+    # cache keys a later /summarize or /consensus on these results looks up. The UI
+    # summarizes one paper at a time (results=[paper] from the detail drawer), so each of
+    # the top papers is summarized on its own.
+    def retrieve(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raw_results = store.search_with_reranking(
+            query=entry["query"],
+            top_k=entry["top_k"] or SearchQuery.model_fields["top_k"].default,
+            filter_dict=search_filter_dict(entry["filters"]),
+            boost_sections=BOOST_SECTIONS
+        )
+        return transform_results(raw_results)
+    
+    def summarize(paper: Dict[str, Any], persona: str):
+        llm_service.generate_summary(result_texts([paper], 10), PERSONA_CONTEXTS[persona], persona=persona)
+    
+    def consensus(results: List[Dict[str, Any]], topic: str):
+        llm_service.analyze_consensus(result_texts(results, 8), topic)
+    
+    hits_before = CACHE_REQUESTS.values.get(("shared_llm", "hit"), 0)
+    start = time.time()
+    done = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        searches = {executor.submit(retrieve, entry): entry for entry in popular}
+        jobs = {}
+        for future in as_completed(searches):
+            query = searches[future]["query"]
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"✗ search '{query}': {e}")
+                failed += 1
+                continue
+            papers = [r for r in results if result_texts([r], 1)][:args.papers]
+            if not papers:
+                print(f"- '{query}': no results with text")
+                continue
+            for paper in papers:
+                for persona in personas:
+                    jobs[executor.submit(summarize, paper, persona)] = (f"{query} / {paper['metadata']['paper_id'] or paper['id']}", persona)
+            if not args.skip_consensus:
+                jobs[executor.submit(consensus, results, query)] = (query, "consensus")
+        
+        for future in as_completed(jobs):
+            query, kind = jobs[future]
+            try:
+                future.result()
+                done += 1
+                print(f"✓ {kind:<10} {query}")
+            except Exception as e:
+                print(f"✗ {kind:<10} {query}: {e}")
+                failed += 1
+    
+    cached = CACHE_REQUESTS.values.get(("shared_llm", "hit"), 0) - hits_before
+    print("-" * 60)
+    print(f"Precomputed {done} answers ({int(cached)} were still cached) in {time.time() - start:.1f}s; {failed} failed")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from app.config import get_settings
+from app.services.artifact_cache import ArtifactCache, EmbeddingCache
+from app.services.file_lock import ingest_lock
+from app.services.reconcile import IndexReconciler
+from app.services.vector_store import VectorStore
+
+settings = get_settings()
+
+# Refuse to delete more than this share of the index without --force; usually means a cleared cache
+MAX_ORPHAN_FRACTION = 0.5
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the vector index with the processed manifest")
+    parser.add_argument("--index", default=settings.pinecone_index_name, help="Index or alias to reconcile")
+    parser.add_argument("--pdf-directory", default="data/pdfs")
+    parser.add_argument("--dry-run", action="store_true", help="Only write the drift report")
+    parser.add_argument("--verify-content", action="store_true", help="Also re-upsert vectors whose stored text differs from the cached chunk")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel delete requests")
+    parser.add_argument("--force", action="store_true", help=f"Allow deleting more than {MAX_ORPHAN_FRACTION:.0%} of the index")
+    args = parser.parse_args()
+    
+    cache = ArtifactCache("data/processed")
+    if not cache.manifest_path.exists():
+        print("Error: no processed manifest; run ingest_pdfs.py first")
+        sys.exit(1)
+    
+    # Applying writes the manifest and chunk store, and a plan taken mid-ingest is already stale
+    lock = ingest_lock()
+    if not args.dry_run and not lock.acquire(blocking=False):
+        print("Error: an ingest is running (an /api/ingest job, watch_pdfs.py or ingest_pdfs.py); try again when it is done")
+        sys.exit(1)
+    
+    vector_store = VectorStore(
+        embedding_cache=EmbeddingCache("data/processed/embeddings.sqlite"),
+        index_name=args.index
+    )
+    reconciler = IndexReconciler(vector_store, cache, args.pdf_directory)
+    
+    start = time.time()
+    plan = reconciler.plan(verify_content=args.verify_content)
+    
+    print("-" * 60)
+    print(f"Index vectors:    {plan['index_vectors']}")
+    print(f"Expected vectors: {plan['expected_vectors']}")
+    print(f"Orphans:          {len(plan['orphans'])}")
+    for paper_id, count in list(plan["orphans_by_paper"].items())[:10]:
+        print(f"  {paper_id}: {count}")
+    print(f"Missing:          {len(plan['missing'])}")
+    if args.verify_content:
+        print(f"Stale:            {len(plan['stale'])}")
+    print(f"Removed PDFs:     {len(plan['removed_papers'])}")
+    
+    report_path = Path("data/processed/drift_report.json")
+    with open(report_path, 'w') as f:
+        json.dump({"checked_at": time.time(), "index": vector_store.index_name, "namespace": vector_store.namespace, **plan}, f, indent=2)
+    print(f"Drift report written to {report_path}")
+    
+    if args.dry_run:
+        return
+    
+    if plan["index_vectors"] and len(plan["orphans"]) > MAX_ORPHAN_FRACTION * plan["index_vectors"] and not args.force:
+        print(f"Error: {len(plan['orphans'])} of {plan['index_vectors']} vectors would be deleted; re-run with --force if that is intended")
+        sys.exit(1)
+    
+    result = reconciler.apply(plan, workers=args.workers)
+    print("-" * 60)
+    print(f"✓ Deleted {result['deleted']} orphans, upserted {result['upserted']} vectors, "
+          f"forgot {result['forgotten']} removed papers in {time.time() - start:.1f}s")
+    if result["unhydrated"]:
+        print(f"✗ {len(result['unhydrated'])} papers do not hydrate with their paper fields: {', '.join(result['unhydrated'][:10])}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from app.config import get_settings
+from app.services.artifact_cache import EmbeddingCache
+from app.services.index_aliases import IndexAliasRegistry
+from app.services.vector_store import VectorStore
+from test_personas import SCIENTIST_QUERIES, INVESTOR_QUERIES, ARCHITECT_QUERIES
+
+settings = get_settings()
+
+def current_target(alias: str) -> dict:
+    """The unaliased index as it is served today."""
+    return {
+        "index": alias,
+        "namespace": "",
+        "dimensions": settings.embedding_dimensions,
+        "embedding_model": settings.embedding_model,
+        "chunk_size": settings.chunk_size,
+        "chunk_overlap": settings.chunk_overlap,
+        "chunk_store": settings.chunk_store_path if settings.slim_vector_metadata else None
+    }
+
+def validate(store: VectorStore, active_store: VectorStore, expected_ids: set, timeout: float = 120.0) -> list:
+    """Return a list of problems; empty means the generation can take traffic."""
+    problems = []
+    
+    # Pinecone counts are eventually consistent, so give the upserts time to land
+    deadline = time.time() + timeout
+    count = store.vector_count()
+    while count < len(expected_ids) and time.time() < deadline:
+        time.sleep(2)
+        count = store.vector_count()
+    if count != len(expected_ids):
+        problems.append(f"expected {len(expected_ids)} vectors, index reports {count}")
+    
+    # Persona queries that find something today must still find something after the flip
+    for query in SCIENTIST_QUERIES + INVESTOR_QUERIES + ARCHITECT_QUERIES:
+        results = store.search(query, top_k=5)
+        if any(r["id"] not in expected_ids for r in results):
+            problems.append(f"results outside this build for: {query}")
+        elif not results and active_store.search(query, top_k=5):
+            problems.append(f"no results above threshold for: {query}")
+    return problems
+
+def build(args, registry: IndexAliasRegistry):
+    # Imported here so status/promote/rollback do not load PyMuPDF
+    from app.services.pdf_processor import PDFProcessor
+    
+    alias = args.alias
+    active = registry.resolve(alias)
+    if active is None:
+        registry.adopt(alias, current_target(alias))
+        active = registry.resolve(alias)
+        print(f"Registered existing index {alias} as generation g0")
+    
+    dimensions = args.dimensions or settings.embedding_dimensions
+    # Same-sized vectors can share the physical index in a new namespace
+    index_name = args.index or (active["index"] if dimensions == active["dimensions"] else f"{alias}-{dimensions}")
+    
+    target = {
+        "index": index_name,
+        "namespace": "",
+        "dimensions": dimensions,
+        "embedding_model": settings.embedding_model,
+        "chunk_size": settings.chunk_size,
+        "chunk_overlap": settings.chunk_overlap,
+        "chunk_store": None
+    }
+    generation = registry.stage(alias, target)
+    target["namespace"] = generation
+    if settings.slim_vector_metadata:
+        target["chunk_store"] = str(Path(settings.chunk_store_path) / f"{alias}-{generation}")
+    registry.update(alias, generation, namespace=target["namespace"], chunk_store=target["chunk_store"])
+    print(f"Building {alias} generation {generation} in {index_name}/{generation} ({dimensions} dimensions)")
+    print("-" * 60)
+    
+    processor = PDFProcessor()
+    papers_data = processor.process_all_pdfs(args.pdf_directory)
+    expected_ids = {
+        f"{chunk.paper_id}_chunk_{chunk.chunk_index}"
+        for _, chunks in papers_data
+        for chunk in chunks
+    }
+    
+    store = VectorStore(
+        embedding_cache=EmbeddingCache("data/processed/embeddings.sqlite"),
+        index_name=alias,
+        generation=target
+    )
+    store.upsert_papers(papers_data)
+    
+    print("-" * 60)
+    print("Validating...")
+    active_store = VectorStore(index_name=alias, generation=active)
+    problems = validate(store, active_store, expected_ids)
+    registry.update(alias, generation, vector_count=len(expected_ids))
+    if problems:
+        registry.update(alias, generation, status="failed", problems=problems)
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        print(f"Generation {generation} was not promoted; {active['generation']} is still serving")
+        sys.exit(1)
+    
+    registry.update(alias, generation, status="ready")
+    if args.no_promote:
+        print(f"✓ Generation {generation} is ready. Promote with: python reindex.py promote {generation}")
+        return
+    
+    registry.promote(alias, generation)
+    print(f"✓ {alias} now serves {generation}; roll back with: python reindex.py rollback")
+
+def drop(args, registry: IndexAliasRegistry):
+    target = registry.generations(args.alias).get("generations", {}).get(args.generation)
+    if target is None:
+        print(f"Error: {args.alias} has no generation {args.generation}")
+        sys.exit(1)
+    
+    registry.remove(args.alias, args.generation)
+    store = VectorStore(index_name=args.alias, generation=target)
+    store.initialize_index()
+    store.index.delete(delete_all=True, namespace=target["namespace"])
+    print(f"✓ Deleted generation {args.generation} ({target['index']}/{target['namespace'] or 'default'})")
+
+def status(args, registry: IndexAliasRegistry):
+    entry = registry.generations(args.alias)
+    if not entry:
+        print(f"{args.alias} is not an alias; searches go straight to the index of that name")
+        return
+    
+    for name, target in sorted(entry["generations"].items(), key=lambda item: int(item[0][1:])):
+        marker = "*" if name == entry["active"] else ("↩" if name == entry["previous"] else " ")
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(target["created_at"]))
+        print(
+            f"{marker} {name:<4} {target['status']:<9} {target['index']}/{target['namespace'] or 'default'}"
+            f"  dims={target['dimensions']} chunks={target.get('chunk_size')}/{target.get('chunk_overlap')}"
+            f"  vectors={target.get('vector_count', '?')}  created {created}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Blue/green re-indexing behind an index alias")
+    parser.add_argument("--alias", default=settings.pinecone_index_name)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build_parser = commands.add_parser("build", help="Build a new generation from data/pdfs, validate it and promote it")
+    build_parser.add_argument("--pdf-directory", default="data/pdfs")
+    build_parser.add_argument("--dimensions", type=int, help="Embedding dimensions for the new generation")
+    build_parser.add_argument("--index", help="Physical index for the new generation")
+    build_parser.add_argument("--no-promote", action="store_true", help="Leave the validated generation on standby")
+    
+    promote_parser = commands.add_parser("promote", help="Point the alias at a generation")
+    promote_parser.add_argument("generation")
+    commands.add_parser("rollback", help="Swap back to the previous generation")
+    drop_parser = commands.add_parser("drop", help="Delete a generation that is neither active nor previous")
+    drop_parser.add_argument("generation")
+    commands.add_parser("status", help="List generations")
+    args = parser.parse_args()
+    
+    registry = IndexAliasRegistry(settings.index_alias_path)
+    if args.command == "build":
+        if not Path(args.pdf_directory).exists():
+            print(f"Error: Directory {args.pdf_directory} does not exist")
+            sys.exit(1)
+        build(args, registry)
+    elif args.command == "promote":
+        registry.promote(args.alias, args.generation)
+        print(f"✓ {args.alias} now serves {args.generation}")
+    elif args.command == "rollback":
+        print(f"✓ {args.alias} rolled back to {registry.rollback(args.alias)}")
+    elif args.command == "drop":
+        drop(args, registry)
+    else:
+        status(args, registry)
+
+if __name__ == "__main__":
+    main()
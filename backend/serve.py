@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+def main():
+    parser = argparse.ArgumentParser(description="Production server: N uvicorn workers under gunicorn with the app preloaded")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--timeout", type=int, default=120, help="Seconds before a silent worker is restarted")
+    parser.add_argument("--max-requests", type=int, default=0, help="Recycle each worker after this many requests (0 = never)")
+    args = parser.parse_args()
+    
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # Without gunicorn there is no preload: each worker imports the app itself
+        import uvicorn
+        print("gunicorn is not installed; starting uvicorn workers without preloading (pip install gunicorn)")
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers, timeout_keep_alive=5)
+        return
+    
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            # Import the app once in the master; workers share its pages copy-on-write.
+            # Clients and caches that hold sockets or SQLite handles connect lazily per process.
+            self.cfg.set("preload_app", True)
+            self.cfg.set("timeout", args.timeout)
+            self.cfg.set("graceful_timeout", 30)
+            self.cfg.set("max_requests", args.max_requests)
+            self.cfg.set("max_requests_jitter", args.max_requests // 10)
+            self.cfg.set("accesslog", "-")
+        
+        def load(self):
+            from app.main import app
+            return app
+    
+    print(f"Serving on {args.host}:{args.port} with {args.workers} workers")
+    ProductionServer().run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from app.config import get_settings
+from app.services.snapshot import SnapshotReader, export_snapshot, restore_snapshot
+from app.services.vector_store import VectorStore
+
+settings = get_settings()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the vector index to a snapshot file, or restore one")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = commands.add_parser("export", help="Stream every vector, ID and metadata field into a snapshot")
+    export_parser.add_argument("--index", default=settings.pinecone_index_name, help="Index or alias to export")
+    export_parser.add_argument("--output", help="Defaults to data/snapshots/<index>-<timestamp>.zip")
+    export_parser.add_argument("--group-size", type=int, default=10000, help="Vectors per row group")
+    
+    restore_parser = commands.add_parser("restore", help="Bulk-load a snapshot into an index")
+    restore_parser.add_argument("snapshot")
+    restore_parser.add_argument("--index", default=settings.pinecone_index_name, help="Index or alias to load into")
+    restore_parser.add_argument("--workers", type=int, default=8, help="Parallel upsert requests")
+    restore_parser.add_argument("--batch-size", type=int, default=100)
+    restore_parser.add_argument("--force", action="store_true", help="Load a slim-metadata snapshot even with SLIM_VECTOR_METADATA off")
+    args = parser.parse_args()
+    
+    if args.command == "export":
+        output = args.output or f"data/snapshots/{args.index}-{time.strftime('%Y%m%d-%H%M%S')}.zip"
+        start = time.time()
+        manifest = export_snapshot(VectorStore(index_name=args.index), output, group_size=args.group_size)
+        size_mb = Path(output).stat().st_size / 1e6
+        print("-" * 60)
+        print(f"✓ Exported {manifest['vector_count']} vectors ({manifest['dimension']} dims) in {time.time() - start:.1f}s")
+        print(f"Snapshot: {output} ({size_mb:.1f} MB)")
+        return
+    
+    if not Path(args.snapshot).exists():
+        print(f"Error: {args.snapshot} does not exist")
+        sys.exit(1)
+    
+    reader = SnapshotReader(args.snapshot)
+    manifest = reader.manifest
+    reader.close()
+    print(f"Restoring {manifest['vector_count']} vectors from {manifest['source_index']} into {args.index}")
+    
+    # A missing index is created with the snapshot's dimensions
+    store = VectorStore(index_name=args.index, dimensions=manifest["dimension"])
+    try:
+        result = restore_snapshot(store, args.snapshot, batch_size=args.batch_size, workers=args.workers, force=args.force)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    print("-" * 60)
+    print(f"✓ Restored {result['restored']} vectors in {result['seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.config import get_settings
+from app.models.schemas import SearchQuery
+from app.services.vector_store import VectorStore, rerank_matches
+
+settings = get_settings()
+
+DEFAULT_GRID = {
+    "top_k": "5,10,20",
+    "fetch_multiplier": "2,3,5",
+    "max_fetch": "50,150",
+    "min_score": "0.25,0.30,0.35",
+    "section_boost": "1.0,1.15,1.3",
+    "recency_boost": "1.0,1.05"
+}
+
+def load_golden_set(path: str) -> List[Dict[str, Any]]:
+    """
+    JSON list or JSONL of {"query": ..., "relevant": [paper_id, ...]}, with an
+    optional "filters" dict in the /api/search format.
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+    entries = json.loads(text) if text.lstrip().startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    for entry in entries:
+        if not entry.get("query") or not entry.get("relevant"):
+            raise ValueError(f"Golden entry needs a query and relevant paper IDs: {entry}")
+    return entries
+
+def filter_dict_for(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Same translation as /api/search."""
+    if not filters:
+        return None
+    filter_dict = {}
+    if filters.get("year"):
+        filter_dict["year"] = {"$eq": filters["year"]}
+    if filters.get("organisms"):
+        filter_dict["organisms"] = {"$in": filters["organisms"]}
+    if filters.get("section"):
+        filter_dict["section"] = {"$eq": filters["section"]}
+    return filter_dict
+
+def ranked_papers(results: List[Dict[str, Any]]) -> List[str]:
+    """Paper IDs in order of their best chunk; golden relevance is judged per paper."""
+    papers = []
+    for r in results:
+        paper_id = r["metadata"].get("paper_id") or r["id"].rsplit("_chunk_", 1)[0]
+        if paper_id not in papers:
+            papers.append(paper_id)
+    return papers
+
+def recall(papers: List[str], relevant: set) -> float:
+    return len(relevant.intersection(papers)) / len(relevant)
+
+def ndcg(papers: List[str], relevant: set, k: int) -> float:
+    dcg = sum(1 / np.log2(rank + 2) for rank, paper_id in enumerate(papers[:k]) if paper_id in relevant)
+    ideal = sum(1 / np.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    return dcg / ideal
+
+def parse_grid(values: str, kind) -> List:
+    return sorted({kind(v) for v in values.split(",")})
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep search reranking parameters against a golden query set")
+    parser.add_argument("golden", help="Golden set: JSON list or JSONL of {query, relevant: [paper_id, ...]}")
+    for name, default in DEFAULT_GRID.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", default=default, help=f"Comma-separated values (default {default})")
+    parser.add_argument("--boost-sections", default="abstract,results,conclusion")
+    parser.add_argument("--repeat", type=int, default=3, help="Index queries per (query, fetch size); the median latency is kept")
+    parser.add_argument("--min-recall", type=float, default=0.8, help="Quality bar for the recommendation")
+    parser.add_argument("--min-ndcg", type=float, default=0.0)
+    parser.add_argument("--latency-tolerance", type=float, default=0.1,
+                        help="Relative p50 latency difference treated as noise when breaking ties (default 0.1 = 10%%)")
+    parser.add_argument("--output", default="data/processed/retrieval_sweep.json")
+    args = parser.parse_args()
+    
+    if not Path(args.golden).exists():
+        print(f"Error: {args.golden} does not exist")
+        sys.exit(1)
+    golden = load_golden_set(args.golden)
+    
+    grid = {
+        "top_k": parse_grid(args.top_k, int),
+        "fetch_multiplier": parse_grid(args.fetch_multiplier, int),
+        "max_fetch": parse_grid(args.max_fetch, int),
+        "min_score": parse_grid(args.min_score, float),
+        "section_boost": parse_grid(args.section_boost, float),
+        "recency_boost": parse_grid(args.recency_boost, float)
+    }
+    boost_sections = [s for s in args.boost_sections.split(",") if s]
+    fetch_sizes = sorted({
+        min(top_k * multiplier, max_fetch)
+        for top_k, multiplier, max_fetch in itertools.product(grid["top_k"], grid["fetch_multiplier"], grid["max_fetch"])
+    })
+    
+    store = VectorStore()
+    vector_count = store.vector_count()
+    print(f"Index: {store.index_name} (namespace {store.namespace or 'default'}), {vector_count} vectors")
+    print(f"Golden set: {len(golden)} queries; {len(fetch_sizes)} fetch sizes; "
+          f"{int(np.prod([len(v) for v in grid.values()]))} configurations")
+    print("-" * 60)
+    
+    # Embedding cost does not depend on the parameters, so it is measured once per query
+    # and each distinct fetch size is queried once; reranking variants reuse the matches.
+    embed_ms = []
+    matches: Dict[tuple, Any] = {}
+    query_ms: Dict[tuple, float] = {}
+    for qi, entry in enumerate(golden):
+        start = time.perf_counter()
+        vector = store.embedding_service.generate_embedding(entry["query"])
+        embed_ms.append((time.perf_counter() - start) * 1000)
+        for fetch_k in fetch_sizes:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = store._query(
+                    vector=vector,
+                    top_k=fetch_k,
+                    include_metadata=True,
+                    filter=filter_dict_for(entry.get("filters")),
+                    hedge=False
+                )
+                timings.append((time.perf_counter() - start) * 1000)
+            matches[(qi, fetch_k)] = results.matches
+            query_ms[(qi, fetch_k)] = float(np.median(timings))
+    
+    configs = []
+    names = list(grid)
+    for values in itertools.product(*grid.values()):
+        params = dict(zip(names, values))
+        fetch_k = min(params["top_k"] * params["fetch_multiplier"], params["max_fetch"])
+        recalls, ndcgs, latencies = [], [], []
+        for qi, entry in enumerate(golden):
+            start = time.perf_counter()
+            reranked = rerank_matches(
+                matches[(qi, fetch_k)],
+                boost_sections,
+                min_score=params["min_score"],
+                section_boost=params["section_boost"],
+                recency_boost=params["recency_boost"],
+                recency_year=settings.recency_year
+            )[:params["top_k"]]
+            rerank_ms = (time.perf_counter() - start) * 1000
+            
+            relevant = set(entry["relevant"])
+            papers = ranked_papers(reranked)
+            recalls.append(recall(papers, relevant))
+            ndcgs.append(ndcg(papers, relevant, params["top_k"]))
+            latencies.append(query_ms[(qi, fetch_k)] + rerank_ms)
+        
+        configs.append({
+            **params,
+            "fetch_k": fetch_k,
+            "recall": round(float(np.mean(recalls)), 4),
+            "ndcg": round(float(np.mean(ndcgs)), 4),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "per_query": [
+                {"query": entry["query"], "recall": round(r, 4), "ndcg": round(n, 4), "latency_ms": round(l, 3)}
+                for entry, r, n, l in zip(golden, recalls, ndcgs, latencies)
+            ]
+        })
+    
+    current = {
+        "top_k": SearchQuery.model_fields["top_k"].default,
+        "fetch_multiplier": settings.rerank_fetch_multiplier,
+        "max_fetch": settings.rerank_max_fetch,
+        "min_score": settings.min_score_threshold,
+        "section_boost": settings.section_boost,
+        "recency_boost": settings.recency_boost
+    }
+    # Cheapest configuration meeting the bar: the smallest fetch (index work), then the best
+    # recall and nDCG. Measured latency is noisy, so it only breaks ties beyond the tolerance;
+    # within it, the configuration changing the fewest current settings wins.
+    passing = [c for c in configs if c["recall"] >= args.min_recall and c["ndcg"] >= args.min_ndcg]
+    recommended = None
+    if passing:
+        best = min(passing, key=lambda c: (c["fetch_k"], -c["recall"], -c["ndcg"]))
+        tied = [c for c in passing if (c["fetch_k"], c["recall"], c["ndcg"]) == (best["fetch_k"], best["recall"], best["ndcg"])]
+        fastest = min(c["latency_p50_ms"] for c in tied)
+        recommended = min(
+            (c for c in tied if c["latency_p50_ms"] <= fastest * (1 + args.latency_tolerance)),
+            key=lambda c: sum(c[k] != v for k, v in current.items())
+        )
+    
+    configs.sort(key=lambda c: (-c["recall"], -c["ndcg"], c["latency_p50_ms"]))
+    print(f"{'top_k':>5} {'fetch':>5} {'min':>5} {'sect':>5} {'rec':>5}  {'recall':>6} {'nDCG':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for c in configs[:15]:
+        marker = "  <- current" if all(c[k] == v for k, v in current.items()) else ""
+        print(f"{c['top_k']:>5} {c['fetch_k']:>5} {c['min_score']:>5.2f} {c['section_boost']:>5.2f} {c['recency_boost']:>5.2f}  "
+              f"{c['recall']:>6.3f} {c['ndcg']:>6.3f} {c['latency_p50_ms']:>8.2f} {c['latency_p95_ms']:>8.2f}{marker}")
+    print("-" * 60)
+    print(f"Query embedding: {np.median(embed_ms):.1f} ms median (not included above)")
+    if recommended:
+        print(f"Cheapest meeting recall >= {args.min_recall} and nDCG >= {args.min_ndcg}: "
+              + ", ".join(f"{k}={recommended[k]}" for k in names)
+              + f" (recall {recommended['recall']}, nDCG {recommended['ndcg']}, p50 {recommended['latency_p50_ms']} ms)")
+    else:
+        print(f"No configuration reaches recall >= {args.min_recall} and nDCG >= {args.min_ndcg}")
+    
+    report = {
+        "index": store.index_name,
+        "namespace": store.namespace,
+        "queries": len(golden),
+        "embed_ms_median": round(float(np.median(embed_ms)), 3),
+        "current": current,
+        "recommended": {k: recommended[k] for k in names} if recommended else None,
+        "configurations": configs
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
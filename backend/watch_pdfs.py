@@ -0,0 +1,42 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from app.config import get_settings
+from app.services.folder_watcher import FolderWatcher
+from app.services.ingestion import IngestionPipeline
+
+settings = get_settings()
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest PDFs as they are added to, changed in or removed from the PDF folder")
+    parser.add_argument("--pdf-directory", default=settings.pdf_directory)
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between folder scans")
+    parser.add_argument("--debounce", type=float, default=5.0, help="Seconds a file must stay unchanged before it is ingested")
+    parser.add_argument("--once", action="store_true", help="Handle pending changes once and exit")
+    args = parser.parse_args()
+    
+    if not Path(args.pdf_directory).exists():
+        print(f"Error: Directory {args.pdf_directory} does not exist")
+        sys.exit(1)
+    
+    watcher = FolderWatcher(IngestionPipeline(), args.pdf_directory, debounce=args.debounce)
+    
+    if args.once:
+        watcher.debounce = 0
+        watcher.poll()
+        outcome = watcher.poll(wait=True)
+        print(f"Ingested {len(outcome['ingested'])}, unchanged {len(outcome['unchanged'])}, "
+              f"removed {len(outcome['removed'])}, failed {len(outcome['failed'])}")
+        return
+    
+    print(f"Watching {args.pdf_directory} (scan every {args.interval}s, debounce {args.debounce}s). Ctrl+C to stop.")
+    try:
+        while True:
+            watcher.poll()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,7 @@ export default function SearchView({ currentPersona }: SearchViewProps) {
     setHasSearched(true);
 
     try {
-      const response = await searchPapers(searchQuery, 25, filters);
+      const response = await searchPapers(searchQuery, 25, filters, currentPersona);
       setResults(response.results);
     } catch (err) {
       setError('Failed to search. Please check your backend connection.');
@@ -44,7 +44,7 @@ export default function SearchView({ currentPersona }: SearchViewProps) {
     if (query) {
       setIsLoading(true);
       try {
-        const response = await searchPapers(query, 25, newFilters);
+        const response = await searchPapers(query, 25, newFilters, currentPersona);
         setResults(response.results);
       } catch (err) {
         setError('Failed to apply filters.');
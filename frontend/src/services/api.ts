@@ -22,12 +22,14 @@ const api = axios.create({
 export const searchPapers = async (
   query: string,
   topK: number = 25,
-  filters?: SearchFilters
+  filters?: SearchFilters,
+  persona?: Persona
 ): Promise<SearchResponse> => {
   const response = await api.post('/search', {
     query,
     top_k: topK,
     filters: filters || {},
+    persona,
   });
   return response.data;
 };